@@ -16,6 +16,9 @@ setup(
         'backoff==2.2.1',
         'pendulum==3.1.0'
     ],
+    extras_require={
+        "parquet": ["pyarrow"],
+    },
     entry_points="""
     [console_scripts]
     tap-listrak=tap_listrak:main
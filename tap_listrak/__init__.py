@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
+import argparse
+import sys
 import singer
 from singer import utils, metadata
 from singer.catalog import Catalog, CatalogEntry, Schema
-from . import streams as streams_
 from .context import Context
 from . import schemas
+from . import dedupe
+from . import telemetry
 
 REQUIRED_CONFIG_KEYS = ["start_date", "username", "password"]
 LOGGER = singer.get_logger()
@@ -47,8 +50,15 @@ def discover(ctx):
         if tap_stream_id in ['lists', 'messages']:
             mdata = metadata.write(mdata, (), 'inclusion', 'automatic')
 
+        # Keys are always synced; every other field may be deselected and
+        # is synced unless it is.
         for field_name in schema_dict['properties'].keys():
-            mdata = metadata.write(mdata, ('properties', field_name), 'inclusion', 'automatic')
+            breadcrumb = ('properties', field_name)
+            if field_name in schemas.PK_FIELDS[tap_stream_id]:
+                mdata = metadata.write(mdata, breadcrumb, 'inclusion', 'automatic')
+            else:
+                mdata = metadata.write(mdata, breadcrumb, 'inclusion', 'available')
+                mdata = metadata.write(mdata, breadcrumb, 'selected-by-default', True)
 
         if parent_stream := STREAM_DEPENDENCIES.get(tap_stream_id):
             mdata = metadata.write(mdata, (), 'parent-tap-stream-id', parent_stream)
@@ -72,22 +82,89 @@ def sync(ctx):
     2. Parent streams must be synced first to provide the necessary context and IDs for their child streams
     """
 
+    # Imported here so that discovery never loads zeep
+    from . import streams as streams_ # pylint: disable=import-outside-toplevel
+
     # All lists-dependent streams are synced through sync_lists
     LOGGER.info("Syncing lists and its dependent streams")
 
     streams_.sync_lists(ctx)
+    streams_.retry_failed_units(ctx)
+    if not ctx.advances_bookmarks():
+        ctx.checkpoint_synced()
+    if ctx.should_stop():
+        LOGGER.info("Sync stopped early (%s), the next run resumes from its state",
+                    ctx.stop_reason)
+    ctx.prune_entities()
     ctx.write_state()
+    ctx.memory.log_metrics()
+    dedupe.log_metrics()
+    telemetry.flush()
+
+
+def parse_args():
+    """Parses the standard Singer arguments plus the tap-specific flags,
+    which are folded into the config so they can also be set there."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Profile the sync and write the results to DIR")
+    parser.add_argument("--plan", action="store_true",
+                        help="Print an estimate of the work a sync would do instead of syncing")
+    parser.add_argument("--accounts", metavar="FILE",
+                        help="Sync each account in the JSON list in FILE")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running and re-sync every daemon_interval_seconds")
+    tap_args, remaining = parser.parse_known_args()
+    sys.argv = sys.argv[:1] + remaining
+    # Credentials are given per account in multi-account mode
+    args = utils.parse_args(["start_date"])
+    if tap_args.accounts:
+        args.config["accounts"] = utils.load_json(tap_args.accounts)
+    if not args.config.get("accounts"):
+        utils.check_config(args.config, REQUIRED_CONFIG_KEYS)
+    if tap_args.profile:
+        args.config["profile_dir"] = tap_args.profile
+    if tap_args.daemon and args.config.get("accounts"):
+        raise ValueError("--daemon cannot be combined with multiple accounts")
+    args.plan = tap_args.plan
+    args.daemon = tap_args.daemon
+    return args
+
+
+def run_sync(ctx):
+    from . import profiling # pylint: disable=import-outside-toplevel
+    from .stopping import stop_on_signals # pylint: disable=import-outside-toplevel
+    profile_dir = ctx.config.get("profile_dir")
+    with stop_on_signals(ctx.request_stop):
+        if not profile_dir:
+            sync(ctx)
+            return
+        interval = float(ctx.config.get("profile_interval",
+                                        profiling.DEFAULT_SAMPLE_INTERVAL))
+        with profiling.profile(profile_dir, interval):
+            sync(ctx)
 
 
 def main_impl():
-    args = utils.parse_args(REQUIRED_CONFIG_KEYS)
+    args = parse_args()
     ctx = Context(args.config, args.state)
     if args.discover:
         discover(ctx).dump()
-    elif args.catalog:
-        ctx.catalog = Catalog.from_dict(args.properties) \
-            if args.properties else discover(ctx)
-        sync(ctx)
+    elif args.catalog or args.plan or args.daemon:
+        ctx.catalog = args.catalog or (Catalog.from_dict(args.properties)
+                                       if args.properties else discover(ctx))
+        if args.plan:
+            from . import planning # pylint: disable=import-outside-toplevel
+            planning.print_plan(ctx)
+        elif args.daemon:
+            from . import daemon # pylint: disable=import-outside-toplevel
+            daemon.run_daemon(ctx.config, ctx.state, ctx.catalog, run_sync,
+                              getattr(args, "state_path", None))
+        elif ctx.config.get("accounts"):
+            from . import accounts # pylint: disable=import-outside-toplevel
+            accounts.sync_accounts(ctx.config, ctx.catalog, sync)
+        else:
+            run_sync(ctx)
 
 
 def main():
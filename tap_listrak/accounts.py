@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import sys
+import singer
+from . import scope
+from .context import Context
+from .stopping import Stopper, stop_on_signals
+
+LOGGER = singer.get_logger()
+
+DEFAULT_ACCOUNT_WORKERS = 4
+DEFAULT_SHARED_WORKERS = 8
+
+ACCOUNT_KEYS = ["name", "username", "password"]
+
+
+class ScopedStdout(object):
+    """Stands in for sys.stdout while accounts are synced, sending what
+    each account writes to the output file of its scope."""
+    def __init__(self, default):
+        self.default = default
+
+    def target(self):
+        return scope.get("stdout", self.default)
+
+    def write(self, data):
+        return self.target().write(data)
+
+    def flush(self):
+        self.target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.target(), name)
+
+
+def account_configs(config):
+    """Returns the config of each account: the top-level config updated with
+    the keys of the account's entry in `accounts`."""
+    shared = {k: v for k, v in config.items() if k != "accounts"}
+    configs = []
+    for account in config["accounts"]:
+        missing = [key for key in ACCOUNT_KEYS if key not in account and key not in shared]
+        if missing:
+            raise ValueError("Account {} is missing the config keys {}".format(
+                account.get("name", len(configs)), missing))
+        configs.append(dict(shared, **account))
+    names = [account_config["name"] for account_config in configs]
+    if len(set(names)) != len(names):
+        raise ValueError("Account names must be unique")
+    return configs
+
+
+def state_path(output_dir, name):
+    return os.path.join(output_dir, name + ".state.json")
+
+
+def read_state(output_dir, name):
+    path = state_path(output_dir, name)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as state_file:
+        return json.load(state_file)
+
+
+def save_state(output_dir, name, state):
+    path = state_path(output_dir, name)
+    with open(path + ".tmp", "w") as state_file:
+        json.dump(state, state_file)
+    os.replace(path + ".tmp", path)
+
+
+def sync_account(account_config, catalog, sync_fn, output_dir, unit_pool, stopper):
+    """Syncs one account in a scope of its own, writing its Singer messages
+    to `<name>.jsonl` and its final state to `<name>.state.json`, from which
+    the next run resumes, even when the sync fails."""
+    scope.isolate()
+    scope.put("unit_pool", unit_pool)
+    name = account_config["name"]
+    if stopper.reason:
+        LOGGER.info("Not syncing account %s, the run is stopping", name)
+        return
+    LOGGER.info("Syncing account %s", name)
+    with open(os.path.join(output_dir, name + ".jsonl"), "w") as output:
+        scope.put("stdout", output)
+        ctx = Context(account_config, read_state(output_dir, name))
+        ctx.catalog = catalog
+        stopper.add(ctx)
+        try:
+            sync_fn(ctx)
+        finally:
+            # A failed account keeps what it recorded before failing, such
+            # as deferred units and costs, for the next run to resume from
+            save_state(output_dir, name, ctx.encoded_state())
+    LOGGER.info("Finished syncing account %s", name)
+
+
+def sync_accounts(config, catalog, sync_fn):
+    """Syncs every account in the `accounts` config option in this process,
+    `account_workers` at a time. Their clients share one parsed WSDL and one
+    connection pool, and messages of accounts with `message_workers` above
+    one are synced on a single pool of `shared_workers` threads.
+
+    An account that fails does not stop the others; the first failure is
+    raised once they have all finished. SIGTERM and SIGINT stop every
+    account as they would a single sync."""
+    output_dir = config.get("accounts_output_dir", ".")
+    os.makedirs(output_dir, exist_ok=True)
+    configs = account_configs(config)
+    account_workers = max(int(config.get("account_workers", DEFAULT_ACCOUNT_WORKERS)), 1)
+    shared_workers = max(int(config.get("shared_workers", DEFAULT_SHARED_WORKERS)), 1)
+
+    stdout, sys.stdout = sys.stdout, ScopedStdout(sys.stdout)
+    unit_pool = ThreadPoolExecutor(max_workers=shared_workers, thread_name_prefix="entity")
+    stopper = Stopper()
+    failures = []
+    try:
+        with stop_on_signals(stopper.request_stop), \
+             ThreadPoolExecutor(max_workers=account_workers,
+                                thread_name_prefix="account") as pool:
+            futures = [(account_config["name"],
+                        scope.submit(pool, sync_account, account_config, catalog, sync_fn,
+                                     output_dir, unit_pool, stopper))
+                       for account_config in configs]
+            for name, future in futures:
+                exc = future.exception()
+                if exc:
+                    LOGGER.error("Syncing account %s failed: %s", name, exc)
+                    failures.append(exc)
+    finally:
+        unit_pool.shutdown(wait=True)
+        sys.stdout = stdout
+    LOGGER.info("Synced %d of %d accounts", len(configs) - len(failures), len(configs))
+    if failures:
+        raise failures[0]
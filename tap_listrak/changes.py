@@ -0,0 +1,81 @@
+import hashlib
+import json
+import singer
+from singer import metrics
+from .schemas import PK_FIELDS
+
+LOGGER = singer.get_logger()
+
+
+def content_hash(record):
+    """A 48-bit hash of a record as emitted, as 12 hex characters. It is
+    only ever compared with the previous hash of the same key, so a change
+    goes unnoticed with a probability of 2**-48."""
+    data = json.dumps(record, sort_keys=True, default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=6).hexdigest()
+
+
+class ChangeIndex(object):
+    """Drops records of a parent stream identical to the one emitted for the
+    same primary key by an earlier run.
+
+    `hashes` is {key: content_hash} and is kept in the `hashes` key of the
+    stream's bookmark, so it is written with each STATE message. A record's
+    hash is only stored as it is handed on to be written. Keys not seen by
+    a complete run are dropped by `prune`."""
+    def __init__(self, tap_stream_id, hashes):
+        self.tap_stream_id = tap_stream_id
+        self.key_field, = PK_FIELDS[tap_stream_id]
+        self.hashes = hashes
+        self.seen = set()
+        self.unchanged = 0
+
+    def is_changed(self, record):
+        key = str(record[self.key_field])
+        digest = content_hash(record)
+        self.seen.add(key)
+        if self.hashes.get(key) == digest:
+            self.unchanged += 1
+            return False
+        self.hashes[key] = digest
+        return True
+
+    def filter(self, records):
+        return (record for record in records if self.is_changed(record))
+
+    def prune(self):
+        for key in set(self.hashes) - self.seen:
+            del self.hashes[key]
+
+    def log_metrics(self):
+        metrics.log(LOGGER, metrics.Point("counter", "unchanged_records", self.unchanged,
+                                          {"stream": self.tap_stream_id}))
+
+
+def get_index(ctx, tap_stream_id):
+    """Returns the ChangeIndex of `tap_stream_id`, creating it on first use,
+    or None unless the `skip_unchanged_parents` config option is on."""
+    if not ctx.config.get("skip_unchanged_parents"):
+        return None
+    indexes = ctx.cache.setdefault("change_indexes", {})
+    if tap_stream_id not in indexes:
+        hashes = ctx.get_bookmark([tap_stream_id, "hashes"]) or {}
+        ctx.set_bookmark([tap_stream_id, "hashes"], hashes)
+        indexes[tap_stream_id] = ChangeIndex(tap_stream_id, hashes)
+    return indexes[tap_stream_id]
+
+
+def filter_changed(ctx, tap_stream_id, records):
+    index = get_index(ctx, tap_stream_id)
+    return index.filter(records) if index else records
+
+
+def finish(ctx, tap_stream_id, complete=True):
+    """Called once every record of `tap_stream_id` has been read. Only a
+    complete read shows which keys no longer exist."""
+    index = get_index(ctx, tap_stream_id)
+    if not index:
+        return
+    if complete:
+        index.prune()
+    index.log_metrics()
@@ -0,0 +1,216 @@
+from datetime import datetime, timezone
+import json
+import os
+import threading
+import uuid
+import singer
+from . import schemas
+from . import scope
+
+LOGGER = singer.get_logger()
+
+DEFAULT_STREAMS = ("message_sends", "message_opens", "message_clicks")
+DEFAULT_BATCH_ROWS = 100000
+
+
+def is_timestamp(field_name, field_schema):
+    # Event dates such as OpenDate are plain strings in the schemas, but are
+    # always the ISO 8601 datetimes written by `transform_dts`.
+    return field_schema.get("format") == "date-time" or field_name.endswith("Date")
+
+
+def arrow_type(field_name, field_schema):
+    import pyarrow as pa # pylint: disable=import-outside-toplevel
+    types = [t for t in field_schema.get("type", []) if t != "null"]
+    if is_timestamp(field_name, field_schema):
+        return pa.timestamp("us", tz="UTC")
+    if types == ["integer"]:
+        return pa.int64()
+    if types == ["number"]:
+        return pa.float64()
+    if types == ["boolean"]:
+        return pa.bool_()
+    # Strings, and objects and arrays as JSON
+    return pa.string()
+
+
+def arrow_schema(tap_stream_id):
+    import pyarrow as pa # pylint: disable=import-outside-toplevel
+    properties = schemas.load_schema(tap_stream_id)["properties"]
+    return pa.schema([pa.field(name, arrow_type(name, field_schema))
+                      for name, field_schema in properties.items()])
+
+
+def to_timestamps(values, arrow_type_):
+    """Converts a column of ISO 8601 strings in one vectorized cast, or value
+    by value if some cannot be cast, in which case those become null."""
+    import pyarrow as pa # pylint: disable=import-outside-toplevel
+    strings = pa.array(values, pa.string())
+    try:
+        return strings.cast(arrow_type_)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        pass
+    parsed = []
+    for value in values:
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+        except ValueError:
+            LOGGER.warning("Writing unparseable datetime %r as null", value)
+            value = None
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        parsed.append(value)
+    return pa.array(parsed, arrow_type_)
+
+
+def to_array(values, field):
+    import pyarrow as pa # pylint: disable=import-outside-toplevel
+    if pa.types.is_timestamp(field.type):
+        return to_timestamps(values, field.type)
+    if pa.types.is_string(field.type):
+        values = [v if v is None or isinstance(v, str) else json.dumps(v, default=str)
+                  for v in values]
+    return pa.array(values, field.type)
+
+
+class StreamBuffer(object):
+    """The rows of one stream not yet written, kept as one list per column."""
+    def __init__(self, schema):
+        self.schema = schema
+        self.columns = {name: [] for name in schema.names}
+        self.rows = 0
+
+    def append(self, record):
+        for name, column in self.columns.items():
+            column.append(record.get(name))
+        self.rows += 1
+
+    def take_batch(self):
+        import pyarrow as pa # pylint: disable=import-outside-toplevel
+        batch = pa.RecordBatch.from_arrays(
+            [to_array(self.columns[field.name], field) for field in self.schema],
+            schema=self.schema)
+        self.columns = {name: [] for name in self.schema.names}
+        self.rows = 0
+        return batch
+
+
+class OpenFile(object):
+    def __init__(self, writer, path):
+        self.writer = writer
+        self.path = path
+        self.rows = 0
+
+
+class ParquetExporter(object):
+    """Writes the records of `streams` to Parquet files under `directory`
+    instead of as Singer messages.
+
+    Records are buffered per stream as columns and written as an Arrow
+    record batch, one row group, every `batch_rows` rows. Files are named
+    `<stream>/sync_date=<date>/<run>-<n>.parquet` and only get that name
+    once complete. `checkpoint` completes every open file and lists it in
+    the run's `manifest-<run>.json`, and is called before each STATE
+    message so that the state never covers rows not yet in a file."""
+    def __init__(self, directory, streams=DEFAULT_STREAMS, batch_rows=DEFAULT_BATCH_ROWS,
+                 now=None):
+        now = now or datetime.now(timezone.utc)
+        self.directory = directory
+        self.streams = frozenset(streams)
+        self.batch_rows = batch_rows
+        self.run_id = now.strftime("%Y%m%dT%H%M%SZ") + "-" + uuid.uuid4().hex[:8]
+        self.sync_date = now.strftime("%Y-%m-%d")
+        self.buffers = {}
+        self.writers = {}
+        self.files = []
+        self._lock = threading.Lock()
+
+    def exports(self, tap_stream_id):
+        return tap_stream_id in self.streams
+
+    def add(self, tap_stream_id, records):
+        """Buffers records, writing a batch whenever `batch_rows` are
+        buffered, and returns how many there were."""
+        count = 0
+        with self._lock:
+            if tap_stream_id not in self.buffers:
+                self.buffers[tap_stream_id] = StreamBuffer(arrow_schema(tap_stream_id))
+            buffer = self.buffers[tap_stream_id]
+            for record in records:
+                buffer.append(record)
+                count += 1
+                if buffer.rows >= self.batch_rows:
+                    self._write_batch(tap_stream_id)
+        return count
+
+    def _write_batch(self, tap_stream_id):
+        import pyarrow.parquet as pq # pylint: disable=import-outside-toplevel
+        buffer = self.buffers[tap_stream_id]
+        if not buffer.rows:
+            return
+        if tap_stream_id not in self.writers:
+            partition = os.path.join(self.directory, tap_stream_id,
+                                     "sync_date=" + self.sync_date)
+            os.makedirs(partition, exist_ok=True)
+            path = os.path.join(partition, "{}-{:05d}.parquet".format(
+                self.run_id, sum(1 for f in self.files if f["stream"] == tap_stream_id)))
+            self.writers[tap_stream_id] = OpenFile(
+                pq.ParquetWriter(path + ".tmp", buffer.schema), path)
+        open_file = self.writers[tap_stream_id]
+        open_file.rows += buffer.rows
+        open_file.writer.write_batch(buffer.take_batch())
+
+    def checkpoint(self):
+        with self._lock:
+            for tap_stream_id in self.buffers:
+                self._write_batch(tap_stream_id)
+            if not self.writers:
+                return
+            for tap_stream_id, open_file in sorted(self.writers.items()):
+                open_file.writer.close()
+                os.replace(open_file.path + ".tmp", open_file.path)
+                self.files.append({"stream": tap_stream_id, "rows": open_file.rows,
+                                   "path": os.path.relpath(open_file.path, self.directory)})
+            self.writers = {}
+            self.write_manifest()
+
+    def write_manifest(self):
+        path = os.path.join(self.directory, "manifest-{}.json".format(self.run_id))
+        manifest = {
+            "run_id": self.run_id,
+            "files": self.files,
+            "schemas": {tap_stream_id: {field.name: str(field.type) for field in buffer.schema}
+                        for tap_stream_id, buffer in sorted(self.buffers.items())},
+        }
+        with open(path + ".tmp", "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(path + ".tmp", path)
+
+
+# Set by `configure_export` when the `parquet_dir` config option is set.
+EXPORTER = None
+
+
+def exporter():
+    return scope.lookup(globals(), "EXPORTER")
+
+
+def is_exported(tap_stream_id):
+    parquet_exporter = exporter()
+    return bool(parquet_exporter and parquet_exporter.exports(tap_stream_id))
+
+
+def configure_export(config):
+    parquet_exporter = None
+    if config.get("parquet_dir"):
+        try:
+            import pyarrow # pylint: disable=import-outside-toplevel,unused-import
+        except ImportError as exc:
+            raise ImportError("parquet_dir requires pyarrow, install tap-listrak[parquet]") \
+                from exc
+        parquet_exporter = ParquetExporter(
+            config["parquet_dir"],
+            config.get("parquet_streams", DEFAULT_STREAMS),
+            int(config.get("parquet_batch_rows", DEFAULT_BATCH_ROWS)))
+    scope.replace(globals(), "EXPORTER", parquet_exporter)
+    return parquet_exporter
@@ -0,0 +1,167 @@
+import base64
+from datetime import datetime, timezone
+import json
+import math
+import zlib
+
+VERSION = 1
+
+# The per-entity bookmark keys, each {MsgID or ListID: value}, and how
+# their values are encoded.
+ENTITY_KEYS = {
+    "costs": "json",
+    "deferred": "times",
+    "message_counts": "json",
+    "synced_to": "times",
+    "hashes": "hex",
+}
+
+# The parent stream whose IDs key the per-entity bookmarks of a stream.
+# Every other stream is keyed by MsgID.
+ENTITY_PARENTS = {
+    "lists": "lists",
+    "subscribed_contacts": "lists",
+}
+
+
+def entity_parent(tap_stream_id):
+    return ENTITY_PARENTS.get(tap_stream_id, "messages")
+
+
+def encode_ids(ids):
+    """Encodes sorted integer IDs as [first, last] ranges of consecutive
+    IDs."""
+    ranges = []
+    for entity_id in ids:
+        if ranges and ranges[-1][1] == entity_id - 1:
+            ranges[-1][1] = entity_id
+        else:
+            ranges.append([entity_id, entity_id])
+    return ranges
+
+
+def decode_ids(ranges):
+    return [entity_id for first, last in ranges for entity_id in range(first, last + 1)]
+
+
+def to_seconds(value):
+    parsed = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return math.floor(parsed.timestamp())
+
+
+def encode_times(values):
+    """Encodes ISO 8601 datetimes as whole seconds, the first since the
+    epoch and each later one as the difference from the one before.
+
+    Sub-second parts are dropped, which only ever moves a start date
+    (deferred) or an end date (synced_to) earlier, so at worst a second of
+    events is fetched twice."""
+    seconds = [to_seconds(value) for value in values]
+    return [b - a for a, b in zip([0] + seconds, seconds)]
+
+
+def decode_times(deltas):
+    values = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        values.append(datetime.fromtimestamp(total, timezone.utc).isoformat())
+    return values
+
+
+def encode_entities(entities, kind):
+    """Encodes {entity_id: value} as {"ids": ranges, "values": ...}, or
+    returns None if it cannot be, e.g. for IDs that are not integers."""
+    try:
+        if any(str(int(key)) != key for key in entities):
+            return None
+        ids = sorted(int(key) for key in entities)
+        values = [entities[str(entity_id)] for entity_id in ids]
+        if kind == "times":
+            values = encode_times(values)
+        elif kind == "hex":
+            if len({len(value) for value in values}) > 1:
+                return None
+            values = "".join(values)
+    except (TypeError, ValueError, AttributeError):
+        return None
+    return {"ids": encode_ids(ids), "values": values}
+
+
+def decode_entities(encoded, kind):
+    ids = [str(entity_id) for entity_id in decode_ids(encoded["ids"])]
+    values = encoded["values"]
+    if kind == "times":
+        values = decode_times(values)
+    elif kind == "hex":
+        width = len(values) // len(ids) if ids else 0
+        values = [values[i * width:(i + 1) * width] for i in range(len(ids))]
+    return dict(zip(ids, values))
+
+
+def compact_state(state, compress=False):
+    """Returns `state` with the per-entity bookmarks moved to an `entities`
+    section and encoded as ID ranges and value lists, compressed with zlib
+    and base64-encoded when `compress` is set.
+
+    `state` itself is never modified; `expand_state` reverses this."""
+    bookmarks = {}
+    section = {}
+    for tap_stream_id, bookmark in state.get("bookmarks", {}).items():
+        bookmarks[tap_stream_id] = dict(bookmark)
+        for key, kind in ENTITY_KEYS.items():
+            if not isinstance(bookmark.get(key), dict):
+                continue
+            encoded = encode_entities(bookmark[key], kind)
+            if encoded is not None:
+                section.setdefault(tap_stream_id, {})[key] = encoded
+                del bookmarks[tap_stream_id][key]
+    if not section:
+        return state
+    if compress:
+        data = json.dumps(section, separators=(",", ":")).encode("utf-8")
+        section = {"zlib": base64.b64encode(zlib.compress(data, 9)).decode("ascii")}
+    section["v"] = VERSION
+    return dict(state, bookmarks=bookmarks, entities=section)
+
+
+def expand_state(state):
+    """Moves the per-entity bookmarks of a state written by `compact_state`
+    back into its bookmarks, in place. Other states are left as they are."""
+    section = state.pop("entities", None)
+    if not section:
+        return state
+    if section.get("v") != VERSION:
+        raise ValueError("Unsupported version {!r} of the state's entities section"
+                         .format(section.get("v")))
+    if "zlib" in section:
+        section = json.loads(zlib.decompress(base64.b64decode(section["zlib"])))
+    section.pop("v", None)
+    bookmarks = state.setdefault("bookmarks", {})
+    for tap_stream_id, keys in section.items():
+        for key, encoded in keys.items():
+            bookmarks.setdefault(tap_stream_id, {})[key] = \
+                decode_entities(encoded, ENTITY_KEYS[key])
+    return state
+
+
+def prune_state(state, seen):
+    """Drops the per-entity bookmarks of MsgIDs and ListIDs not in `seen`,
+    {parent tap_stream_id: set of IDs} read in full by this run. They are
+    outside the window the tap syncs, so no later run reads them. Streams
+    whose parent was not read in full are left as they are."""
+    pruned = 0
+    for tap_stream_id, bookmark in state.get("bookmarks", {}).items():
+        ids = seen.get(entity_parent(tap_stream_id))
+        if ids is None:
+            continue
+        for key in ENTITY_KEYS:
+            entities = bookmark.get(key)
+            if not isinstance(entities, dict):
+                continue
+            for entity_id in [k for k in entities if k not in ids]:
+                del entities[entity_id]
+                pruned += 1
+    return pruned
@@ -1,9 +1,46 @@
+import copy
 from datetime import date
+import threading
+import time
 import pendulum
 import singer
 from singer import bookmarks as bks_
 from singer import metadata
-from .http import get_client
+from .columnar import configure_export, exporter
+from .compact import compact_state, expand_state, prune_state
+from .dedupe import configure_dedupe
+from .memory import MemoryTracker
+from .pagination import PageSizes
+from .progress import configure_progress
+from .telemetry import configure_telemetry
+
+LOGGER = singer.get_logger()
+
+
+class SyncStopped(Exception):
+    """Raised in place of a request once the sync has been asked to stop."""
+
+
+def is_field_selected(field_mdata):
+    if field_mdata.get("inclusion") == "automatic":
+        return True
+    if field_mdata.get("inclusion") == "unsupported":
+        return False
+    selected = field_mdata.get("selected")
+    if selected is None:
+        return field_mdata.get("selected-by-default", True)
+    return selected
+
+
+def selected_fields(catalog_entry):
+    """Compiles the field selection of a catalog entry into a frozenset of
+    field names, or None if no field is deselected."""
+    mdata = metadata.to_map(catalog_entry.metadata)
+    fields = [breadcrumb[1] for breadcrumb in mdata
+              if len(breadcrumb) == 2 and breadcrumb[0] == "properties"]
+    selected = frozenset(f for f in fields
+                         if is_field_selected(mdata[("properties", f)]))
+    return None if len(selected) == len(fields) else selected
 
 
 class Context(object):
@@ -12,20 +49,62 @@ class Context(object):
 
     - config  - The JSON structure from the config.json argument
     - state   - The mutable state dict that is shared among streams
-    - client  - An HTTP client object for interacting with Listrak
+    - client  - An HTTP client object for interacting with Listrak, created
+                on first use so that discovery never loads zeep or fetches
+                the WSDL
     - catalog - A singer.catalog.Catalog. Note this will be None during
                 discovery.
     - cache   - A place for streams to store data so it can be shared between
                 streams.
+    - memory  - A MemoryTracker recording peak RSS per stream.
+    - page_sizes - PageSizes used to end pagination on a short page.
+    - retry_queue - Units of work that failed during this run and will be
+                    retried once at the end of it.
+    - lock    - Guards the state shared by messages synced on worker threads.
+    - stop_reason - Why the sync is stopping early, or None. See `should_stop`.
+    - synced  - {tap_stream_id: set of entity IDs} synced in this run.
+    - seen    - {tap_stream_id: set of IDs} of the lists and messages read
+                in full by this run. See `prune_entities`.
     """
     def __init__(self, config, state):
         self.config = config
-        self.state = state
-        self.client = get_client(config)
+        self.state = expand_state(state)
+        self._client = None
+        configure_progress(config)
+        configure_dedupe(config)
+        configure_export(config)
+        configure_telemetry(config)
         self._catalog = None
         self.selected_stream_ids = None
+        self.projections = {}
         self.cache = {}
         self.now = pendulum.now("UTC")
+        self.memory = MemoryTracker(config.get("max_rss_mb"))
+        self.retry_queue = []
+        self.lock = threading.Lock()
+        self.stop_reason = None
+        self.deadline = None
+        if config.get("max_runtime_seconds"):
+            self.deadline = time.monotonic() + float(config["max_runtime_seconds"])
+        self.synced = {}
+        self.seen = {}
+        self.page_sizes = PageSizes(state.setdefault("page_sizes", {}),
+                                    config.get("page_sizes"),
+                                    config.get("verify_page_sizes", False))
+
+    @property
+    def client(self):
+        if self._client is None:
+            from . import http # pylint: disable=import-outside-toplevel
+            http.configure_hedging(self.config)
+            http.configure_circuit_breaker(self.config)
+            http.configure_engines(self.config)
+            self._client = http.get_client(self.config)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
 
     @property
     def catalog(self):
@@ -40,6 +119,12 @@ class Context(object):
                                                 (),
                                                 'inclusion') == 'automatic']
         )
+        self.projections = {s.tap_stream_id: selected_fields(s) for s in catalog.streams}
+
+    def get_projection(self, tap_stream_id):
+        """Returns the set of fields to emit for `tap_stream_id`, or None when
+        every field is selected."""
+        return self.projections.get(tap_stream_id)
 
     def get_bookmark(self, path):
         return bks_.get_bookmark(self.state, *path)
@@ -56,5 +141,135 @@ class Context(object):
             self.set_bookmark(path, val)
         return pendulum.parse(val)
 
+    def get_deferred(self, tap_stream_id):
+        """Returns {entity_id: start_date} for the MsgIDs or ListIDs of
+        `tap_stream_id` that failed on a previous run and must be re-synced
+        from that start date."""
+        return self.get_bookmark([tap_stream_id, "deferred"]) or {}
+
+    def defer(self, tap_stream_id, entity_id, start_dt):
+        key = str(entity_id)
+        if isinstance(start_dt, date):
+            start_dt = start_dt.isoformat()
+        with self.lock:
+            deferred = self.get_deferred(tap_stream_id)
+            # Keep the earliest start so repeated failures never lose a window
+            if key not in deferred or pendulum.parse(start_dt) < pendulum.parse(deferred[key]):
+                deferred[key] = start_dt
+            self.set_bookmark([tap_stream_id, "deferred"], deferred)
+
+    def clear_deferred(self, tap_stream_id, entity_id):
+        with self.lock:
+            deferred = self.get_deferred(tap_stream_id)
+            if deferred.pop(str(entity_id), None) is not None:
+                self.set_bookmark([tap_stream_id, "deferred"], deferred)
+
+    def queue_retry(self, unit):
+        with self.lock:
+            self.retry_queue.append(unit)
+
+    def get_costs(self, tap_stream_id):
+        """Returns {entity_id: [pages, seconds]} as recorded the last time
+        each MsgID or ListID of `tap_stream_id` was synced."""
+        return self.get_bookmark([tap_stream_id, "costs"]) or {}
+
+    def record_cost(self, tap_stream_id, entity_id, pages, seconds):
+        with self.lock:
+            costs = self.get_costs(tap_stream_id)
+            costs[str(entity_id)] = [pages, round(seconds, 2)]
+            self.set_bookmark([tap_stream_id, "costs"], costs)
+
+    def request_stop(self, reason):
+        """Asks the sync to stop: no request is made after the pages in
+        flight, and the state reached is written."""
+        with self.lock:
+            if self.stop_reason is None:
+                self.stop_reason = reason
+                LOGGER.warning("Stopping the sync after the requests in flight: %s", reason)
+
+    def should_stop(self):
+        if self.stop_reason is None and self.deadline is not None \
+           and time.monotonic() >= self.deadline:
+            self.request_stop("max_runtime_seconds of {} reached".format(
+                self.config["max_runtime_seconds"]))
+        return self.stop_reason is not None
+
+    def mark_synced(self, tap_stream_id, entity_id):
+        with self.lock:
+            self.synced.setdefault(tap_stream_id, set()).add(str(entity_id))
+
+    def get_synced_to(self, tap_stream_id):
+        """Returns {entity_id: end_date} for the MsgIDs or ListIDs of
+        `tap_stream_id` that a stopped or snapshot run synced past the
+        stream's bookmark, up to end_date."""
+        return self.get_bookmark([tap_stream_id, "synced_to"]) or {}
+
+    def clear_synced_to(self, tap_stream_id):
+        """Called once the stream's bookmark has moved past every entry."""
+        if self.get_bookmark([tap_stream_id, "synced_to"]) is not None:
+            bks_.clear_bookmark(self.state, tap_stream_id, "synced_to")
+
+    def advances_bookmarks(self):
+        """Returns whether the stream bookmarks of the children of lists and
+        messages may move to `now`. A stopped run has not reached every list
+        and message, and a run from the parent snapshot does not see those
+        created since it was updated, so their bookmarks stay and the
+        entities they did sync are recorded by `checkpoint_synced`."""
+        return not (self.should_stop() or self.cache.get("parents_from_snapshot"))
+
+    def checkpoint_synced(self):
+        """Records the entities synced by a run that does not move the
+        stream bookmarks, one stopped early or synced from the parent
+        snapshot, in the `synced_to` bookmark of their streams, so the next
+        run starts them from `now` rather than from the stream's bookmark."""
+        end = self.now.isoformat()
+        for tap_stream_id, entity_ids in sorted(self.synced.items()):
+            synced_to = self.get_synced_to(tap_stream_id)
+            synced_to.update(dict.fromkeys(sorted(entity_ids), end))
+            self.set_bookmark([tap_stream_id, "synced_to"], synced_to)
+
+    def mark_seen(self, tap_stream_id, entity_ids):
+        """Records every ListID or MsgID of `tap_stream_id`, once all of
+        them have been read."""
+        self.seen[tap_stream_id] = {str(entity_id) for entity_id in entity_ids}
+
+    def prune_entities(self):
+        """Drops the per-entity bookmarks of lists and messages that this
+        run no longer read, so the state does not grow with every message
+        ever sent."""
+        pruned = prune_state(self.state, self.seen)
+        if pruned:
+            LOGGER.info("Dropped %d bookmark entries of lists and messages no longer synced",
+                        pruned)
+
+    def encoded_state(self):
+        """Returns the state as written, with per-entity bookmarks encoded
+        by `compact_state` when the `compact_state` config option is set,
+        compressed too when it is `zlib`.
+
+        The state is copied under the lock, since worker threads such as
+        contact slices update it, e.g. its page sizes, while it is written."""
+        with self.lock:
+            state = copy.deepcopy(self.state)
+        mode = self.config.get("compact_state")
+        if not mode:
+            return state
+        return compact_state(state, compress=mode == "zlib")
+
+    def is_last_page(self, endpoint, page_len):
+        return self.page_sizes.is_last_page(endpoint, page_len)
+
+    def observe_page(self, endpoint, prev_len, page_len):
+        with self.lock:
+            self.page_sizes.observe(endpoint, prev_len, page_len)
+
+    def check_memory(self, tap_stream_id):
+        return self.memory.check(tap_stream_id)
+
     def write_state(self):
-        singer.write_state(self.state)
+        # Rows exported to Parquet must be in complete files before a state
+        # covering them is emitted
+        parquet_exporter = exporter()
+        if parquet_exporter:
+            parquet_exporter.checkpoint()
+        singer.write_state(self.encoded_state())
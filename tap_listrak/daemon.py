@@ -0,0 +1,97 @@
+import json
+import os
+import signal
+import threading
+import time
+import singer
+from .context import Context
+
+LOGGER = singer.get_logger()
+
+DEFAULT_INTERVAL = 300
+
+
+def save_state(path, state):
+    with open(path + ".tmp", "w") as state_file:
+        json.dump(state, state_file)
+    os.replace(path + ".tmp", path)
+
+
+class Daemon(object):
+    """Re-runs the incremental sync every `interval` seconds in one process.
+
+    The zeep client, its connection pool and the request engines of the
+    first cycle are reused by every later one, and the state is carried from
+    cycle to cycle in memory, so a cycle only costs its API calls. After each
+    cycle the state is saved to `state_path`, if given, so a restarted daemon
+    resumes where it stopped. A cycle that fails is logged and the next one
+    starts from the state the failed one left behind."""
+    def __init__(self, config, state, catalog, sync_fn, state_path=None,
+                 interval=DEFAULT_INTERVAL, clock=time.monotonic):
+        self.config = config
+        self.state = state
+        self.catalog = catalog
+        self.sync_fn = sync_fn
+        self.state_path = state_path
+        self.interval = interval
+        self.clock = clock
+        self.client = None
+        self.cycles = 0
+        self.stopping = False
+        self.wake = threading.Event()
+
+    def run_cycle(self):
+        ctx = Context(self.config, self.state)
+        ctx.catalog = self.catalog
+        if self.client is not None:
+            ctx.client = self.client
+        try:
+            self.sync_fn(ctx)
+            self.client = ctx.client
+        finally:
+            self.state = ctx.state
+            self.cycles += 1
+            if self.state_path:
+                save_state(self.state_path, ctx.encoded_state())
+
+    def trigger(self):
+        """Starts the next cycle now instead of at the end of the interval."""
+        self.wake.set()
+
+    def stop(self):
+        """Stops the daemon once the cycle in flight, if any, finishes."""
+        self.stopping = True
+        self.wake.set()
+
+    def run(self, max_cycles=None):
+        while not self.stopping:
+            started = self.clock()
+            LOGGER.info("Starting sync cycle %d", self.cycles + 1)
+            try:
+                self.run_cycle()
+            except Exception as exc: # pylint: disable=broad-except
+                LOGGER.exception("Sync cycle %d failed: %s", self.cycles, exc)
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+            remaining = self.interval - (self.clock() - started)
+            if remaining > 0 and self.wake.wait(remaining) and not self.stopping:
+                LOGGER.info("Sync triggered")
+            self.wake.clear()
+        LOGGER.info("Daemon stopped after %d sync cycles", self.cycles)
+
+
+def install_signal_handlers(daemon):
+    """SIGTERM stops the daemon, after the cycle in flight has stopped at
+    its next page, and SIGUSR1, where the platform has it, starts a cycle at
+    once."""
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: daemon.trigger())
+
+
+def run_daemon(config, state, catalog, sync_fn, state_path=None):
+    daemon = Daemon(config, state, catalog, sync_fn, state_path,
+                    float(config.get("daemon_interval_seconds", DEFAULT_INTERVAL)))
+    install_signal_handlers(daemon)
+    daemon.run()
+    return daemon
@@ -0,0 +1,124 @@
+from array import array
+from collections import Counter
+import hashlib
+import json
+import singer
+from singer import metrics
+from . import scope
+from .schemas import PK_FIELDS
+
+LOGGER = singer.get_logger()
+
+DEFAULT_MAX_KEYS = 1000000
+
+# The message event streams, which may return the same rows again when a
+# page is retried or message windows overlap on resume.
+EVENT_STREAMS = frozenset(tap_stream_id for tap_stream_id, pk in PK_FIELDS.items()
+                          if pk == ["MsgID", "EmailAddress"])
+
+
+def record_digest(tap_stream_id, record):
+    """A 64-bit hash of a whole record. Distinct records collide with a
+    negligible probability, in which case one of them is dropped."""
+    data = json.dumps([tap_stream_id, record], sort_keys=True, default=str)
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class Deduplicator(object):
+    """Drops event records identical to one already written in this run.
+
+    Whole records are compared rather than their primary keys, since several
+    clicks or opens of one message by one contact share a key but are
+    distinct events. Only the hashes of the latest `max_keys` records are
+    kept, so memory stays bounded and a duplicate is only missed when its
+    first copy was written longer ago than that.
+
+    The hashes are kept in a ring of 8-byte integers, indexed by an
+    open-addressing table of 4-byte ring positions at most half full, so
+    each key costs 16 to 24 bytes (about 16 MB for the default 1000000)
+    rather than the ~100 bytes of a Python int in a set and a deque.
+
+    Records are filtered inside `write_records`, which holds the write lock,
+    so no further locking is needed."""
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS, streams=EVENT_STREAMS):
+        self.max_keys = max(int(max_keys), 1)
+        self.streams = streams
+        self.dropped = Counter()
+        self._ring = array("Q", [0]) * self.max_keys
+        self._next = 0
+        self._size = 0
+        # Ring position + 1 of each hash, 0 for an empty slot
+        slots = 1 << (2 * self.max_keys - 1).bit_length()
+        self._mask = slots - 1
+        self._index = array("I", [0]) * slots
+
+    def _find(self, digest):
+        """Returns the index slot holding `digest`, or the empty slot where
+        it belongs."""
+        slot = digest & self._mask
+        while self._index[slot] and self._ring[self._index[slot] - 1] != digest:
+            slot = (slot + 1) & self._mask
+        return slot
+
+    def _remove(self, slot):
+        """Empties `slot`, moving later entries of its probe run back so
+        that every entry stays reachable from its home slot."""
+        index, mask = self._index, self._mask
+        other = slot
+        while True:
+            other = (other + 1) & mask
+            if not index[other]:
+                break
+            home = self._ring[index[other] - 1] & mask
+            if (other - home) & mask >= (other - slot) & mask:
+                index[slot] = index[other]
+                slot = other
+        index[slot] = 0
+
+    def is_new(self, tap_stream_id, record):
+        digest = record_digest(tap_stream_id, record)
+        slot = self._find(digest)
+        if self._index[slot]:
+            self.dropped[tap_stream_id] += 1
+            return False
+        if self._size == self.max_keys:
+            self._remove(self._find(self._ring[self._next]))
+            slot = self._find(digest)
+        else:
+            self._size += 1
+        self._ring[self._next] = digest
+        self._index[slot] = self._next + 1
+        self._next = (self._next + 1) % self.max_keys
+        return True
+
+    def filter(self, tap_stream_id, records):
+        if tap_stream_id not in self.streams:
+            return records
+        return (record for record in records if self.is_new(tap_stream_id, record))
+
+    def log_metrics(self):
+        for tap_stream_id, dropped in sorted(self.dropped.items()):
+            metrics.log(LOGGER, metrics.Point("counter", "duplicate_records", dropped,
+                                              {"stream": tap_stream_id}))
+
+
+# Set by `configure_dedupe` when the `dedupe_records` config option is on.
+DEDUPER = None
+
+
+def deduper():
+    return scope.lookup(globals(), "DEDUPER")
+
+
+def configure_dedupe(config):
+    deduplicator = None
+    if config.get("dedupe_records"):
+        deduplicator = Deduplicator(int(config.get("dedupe_max_keys", DEFAULT_MAX_KEYS)))
+    scope.replace(globals(), "DEDUPER", deduplicator)
+    return deduplicator
+
+
+def log_metrics():
+    deduplicator = deduper()
+    if deduplicator:
+        deduplicator.log_metrics()
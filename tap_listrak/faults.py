@@ -0,0 +1,126 @@
+import re
+import threading
+import time
+import requests
+import singer
+from zeep.exceptions import Fault, TransportError, XMLSyntaxError
+
+LOGGER = singer.get_logger()
+
+RETRIABLE = "retriable"
+THROTTLING = "throttling"
+PERMANENT = "permanent"
+PER_ENTITY = "per_entity"
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN_SECONDS = 600
+
+PERMANENT_PATTERN = re.compile(r"InvalidLogonAttempt|AccessDenied|Unauthori[sz]ed|Permission",
+                               re.IGNORECASE)
+THROTTLING_PATTERN = re.compile(r"throttl|rate limit|too many requests|quota",
+                                re.IGNORECASE)
+# Names the MsgID or ListID requested. HTTP errors are only PER_ENTITY when
+# their body matches this, since a bare 404 more likely means a wrong URL.
+ENTITY_PATTERN = re.compile(r"Invalid(Message|List|Contact)|(MsgID|ListID).*(invalid|not found)",
+                            re.IGNORECASE)
+PER_ENTITY_PATTERN = re.compile(ENTITY_PATTERN.pattern + r"|does not exist|not found",
+                                re.IGNORECASE)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+    def __init__(self, endpoint, retry_at):
+        super().__init__(
+            "Circuit open for {} after repeated failures, not calling it for another {:.0f}s".format(
+                endpoint, max(retry_at - time.monotonic(), 0)))
+        self.endpoint = endpoint
+
+
+# Errors a sync loop may expect from `http.request`. zeep and the REST
+# engine let connection errors and timeouts of `requests` through as they are.
+REQUEST_ERRORS = (Fault, TransportError, XMLSyntaxError, requests.exceptions.RequestException,
+                  CircuitOpenError)
+
+
+def transport_error_text(exc):
+    content = exc.content if isinstance(exc.content, (bytes, str)) else b""
+    if isinstance(content, bytes):
+        content = content[:2000].decode("utf-8", "replace")
+    return "{} {}".format(exc, content)
+
+
+def classify(exc):
+    """Sorts a request error into one of RETRIABLE, THROTTLING, PERMANENT or
+    PER_ENTITY.
+
+    - PERMANENT errors (bad credentials) will fail every call and end the run.
+      Other client errors, such as a 404 from a wrong URL, are PERMANENT
+      too.
+    - PER_ENTITY errors are specific to the MsgID or ListID requested, so
+      retrying is pointless but other entities can still be synced.
+    - THROTTLING and RETRIABLE errors are worth retrying and count towards
+      opening the endpoint's circuit. Connection errors and timeouts are
+      RETRIABLE.
+    """
+    if isinstance(exc, CircuitOpenError):
+        return THROTTLING
+    if isinstance(exc, TransportError):
+        status_code = exc.status_code if isinstance(exc.status_code, int) else 0
+        text = transport_error_text(exc)
+        if status_code in (401, 403):
+            return PERMANENT
+        if status_code in (429, 503) or THROTTLING_PATTERN.search(text):
+            return THROTTLING
+        if 400 <= status_code < 500 and status_code != 408:
+            return PER_ENTITY if ENTITY_PATTERN.search(text) else PERMANENT
+        return RETRIABLE
+    if isinstance(exc, Fault):
+        message = str(exc)
+        if PERMANENT_PATTERN.search(message):
+            return PERMANENT
+        if THROTTLING_PATTERN.search(message):
+            return THROTTLING
+        if PER_ENTITY_PATTERN.search(message):
+            return PER_ENTITY
+    return RETRIABLE
+
+
+class CircuitBreaker(object):
+    """Tracks consecutive failed requests per endpoint. Once an endpoint has
+    failed `failure_threshold` times in a row its circuit opens and calls to
+    it fail fast for `cooldown` seconds, after which a single trial call is
+    let through. Only retriable and throttling errors count as failures."""
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 cooldown=DEFAULT_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = {}
+        self.open_until = {}
+        self._lock = threading.Lock()
+
+    def before_call(self, endpoint):
+        with self._lock:
+            retry_at = self.open_until.get(endpoint)
+            if retry_at is None:
+                return
+            if time.monotonic() < retry_at:
+                raise CircuitOpenError(endpoint, retry_at)
+            # Half-open: let this call through, and re-open immediately if
+            # it fails.
+            del self.open_until[endpoint]
+            self.failures[endpoint] = self.failure_threshold - 1
+
+    def record_success(self, endpoint):
+        with self._lock:
+            self.failures.pop(endpoint, None)
+
+    def record_failure(self, endpoint, exc):
+        if classify(exc) not in (RETRIABLE, THROTTLING):
+            return
+        with self._lock:
+            failures = self.failures.get(endpoint, 0) + 1
+            self.failures[endpoint] = failures
+            if failures >= self.failure_threshold:
+                LOGGER.warning("Opening circuit for %s for %ss after %d consecutive failures",
+                               endpoint, self.cooldown, failures)
+                self.open_until[endpoint] = time.monotonic() + self.cooldown
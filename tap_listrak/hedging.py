@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import singer
+
+LOGGER = singer.get_logger()
+
+DEFAULT_BUDGET = 0.05
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_WINDOW = 200
+DEFAULT_PERCENTILE = 0.95
+
+
+class LatencyTracker(object):
+    """Keeps a sliding window of successful call durations per endpoint."""
+    def __init__(self, window=DEFAULT_WINDOW, min_samples=DEFAULT_MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, duration):
+        with self._lock:
+            self._samples[endpoint].append(duration)
+
+    def percentile(self, endpoint, pct=DEFAULT_PERCENTILE):
+        """Returns the `pct` latency of `endpoint`, or None until enough
+        samples have been observed."""
+        with self._lock:
+            samples = sorted(self._samples[endpoint])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(int(len(samples) * pct), len(samples) - 1)]
+
+
+class Hedger(object):
+    """Issues a duplicate of any call that runs longer than the observed p95
+    of its endpoint and returns whichever copy finishes first.
+
+    Hedges are capped at `budget` times the number of calls made so far so
+    that a slow API is never hit with more than a small fraction of extra
+    load. The losing call is left to finish in the background and its result
+    is discarded.
+
+    `concurrency` is the number of threads that make calls at once. The pool
+    has room for a primary and a hedge of each, so hedging never limits how
+    many requests are in flight. Only the time spent in `service_fn` is
+    recorded as latency, never time queued for the pool.
+    """
+    def __init__(self, budget=DEFAULT_BUDGET, min_samples=DEFAULT_MIN_SAMPLES,
+                 window=DEFAULT_WINDOW, concurrency=1):
+        self.budget = budget
+        self.latency = LatencyTracker(window, min_samples)
+        self.calls = 0
+        self.hedges = 0
+        self._executor = ThreadPoolExecutor(max_workers=2 * max(concurrency, 1),
+                                            thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+
+    def _acquire_hedge(self):
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def call(self, endpoint, service_fn, kwargs):
+        with self._lock:
+            self.calls += 1
+        threshold = self.latency.percentile(endpoint)
+        if threshold is None:
+            return self._timed(endpoint, service_fn, kwargs)
+        return self._call_hedged(endpoint, service_fn, kwargs, threshold)
+
+    def _timed(self, endpoint, service_fn, kwargs):
+        """Makes the call, recording how long it took if it succeeds. Losing
+        copies are recorded too, so slow calls still count towards the p95."""
+        started = time.monotonic()
+        response = service_fn(**kwargs)
+        self.latency.record(endpoint, time.monotonic() - started)
+        return response
+
+    def _call_hedged(self, endpoint, service_fn, kwargs, threshold):
+        primary = self._executor.submit(self._timed, endpoint, service_fn, kwargs)
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self._acquire_hedge():
+            return primary.result()
+
+        LOGGER.info("Hedging %s call after %.2fs (p95) | Page: %s",
+                    endpoint, threshold, kwargs.get("Page", "N/A"))
+        hedge = self._executor.submit(self._timed, endpoint, service_fn, kwargs)
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
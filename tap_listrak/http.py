@@ -1,51 +1,191 @@
+import threading
+import time
+import requests
 import zeep
 import singer
 from singer import metrics
 from zeep.exceptions import Fault, TransportError, XMLSyntaxError
 import backoff
+from . import pagination
+from . import profiling
+from . import progress
+from . import scope
+from . import telemetry
+from . import faults
+from .hedging import Hedger, DEFAULT_BUDGET, DEFAULT_MIN_SAMPLES
 
 LOGGER = singer.get_logger()
 
 WSDL = "https://webservices.listrak.com/v31/IntegrationService.asmx?wsdl"
+DEFAULT_POOL_SIZE = 32
+
+# Set by `configure_hedging` when the `hedge_requests` config option is on.
+HEDGER = None
+BREAKER = faults.CircuitBreaker()
+
+# The parsed WSDL and the transport shared by every client of the process,
+# set by `get_service` on first use.
+SERVICE = None
+SERVICE_LOCK = threading.Lock()
+
+def get_service(config):
+    """Returns (wsdl_document, transport), parsing the WSDL on first use.
+    Clients of several accounts share them, so the WSDL is only fetched and
+    parsed once and their requests reuse one pool of connections."""
+    global SERVICE # pylint: disable=global-statement
+    with SERVICE_LOCK:
+        if SERVICE is None:
+            pool_size = int(config.get("http_pool_size", DEFAULT_POOL_SIZE))
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+                                                    pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(telemetry.count_response_bytes)
+            transport = zeep.Transport(session=session)
+            SERVICE = (zeep.wsdl.Document(WSDL, transport), transport)
+        return SERVICE
 
 def get_client(config):
-    client = zeep.Client(wsdl=WSDL)
+    document, transport = get_service(config)
+    client = zeep.Client(wsdl=document, transport=transport)
     elem = client.get_element("{http://webservices.listrak.com/v31/}WSUser")
     headers = elem(UserName=config["username"], Password=config["password"])
     client.set_default_soapheaders([headers])
     return client
 
+def configure_hedging(config):
+    hedger = None
+    if config.get("hedge_requests"):
+        hedger = Hedger(
+            budget=float(config.get("hedge_budget", DEFAULT_BUDGET)),
+            min_samples=int(config.get("hedge_min_samples", DEFAULT_MIN_SAMPLES)),
+            concurrency=max(int(config.get("message_workers", 1)),
+                            int(config.get("subscribed_contacts_slices", 1))))
+    previous = scope.replace(globals(), "HEDGER", hedger)
+    if previous:
+        previous.shutdown()
+    return hedger
+
+def configure_circuit_breaker(config):
+    breaker = faults.CircuitBreaker(
+        failure_threshold=int(config.get("circuit_failure_threshold",
+                                         faults.DEFAULT_FAILURE_THRESHOLD)),
+        cooldown=float(config.get("circuit_cooldown_seconds",
+                                  faults.DEFAULT_COOLDOWN_SECONDS)))
+    scope.replace(globals(), "BREAKER", breaker)
+    return breaker
+
+class SoapEngine(object):
+    """Calls operations through the zeep client, the default engine."""
+    name = "soap"
+
+    def operation(self, service_fn, endpoint): # pylint: disable=unused-argument
+        return service_fn
+
+
+SOAP_ENGINE = SoapEngine()
+# {tap_stream_id: engine} for streams not using SOAP_ENGINE, set by
+# `configure_engines` from the `engines` config option.
+ENGINES = {}
+
+
+def configure_engines(config):
+    """Selects the engine each stream's requests go through. An engine turns
+    the zeep operation a stream asks for into the callable that is made,
+    returning a response shaped like zeep's."""
+    engines = {}
+    pagination.reset_cursor_paged()
+    selected = config.get("engines") or {}
+    if any(name == "rest" for name in selected.values()):
+        from .rest import RestEngine # pylint: disable=import-outside-toplevel
+        rest_engine = RestEngine(config)
+    for tap_stream_id, name in selected.items():
+        if name == "rest":
+            engines[tap_stream_id] = rest_engine
+        elif name != SOAP_ENGINE.name:
+            raise ValueError("Unknown engine {!r} for {}".format(name, tap_stream_id))
+    scope.replace(globals(), "ENGINES", engines)
+    return engines
+
+def endpoint_name(service_fn):
+    """Returns the SOAP operation name of a zeep operation proxy."""
+    return getattr(service_fn, "_op_name", getattr(service_fn, "__name__", None))
+
 def log_retry_attempt(details):
     """Log details about a backoff retry attempt."""
     exception = details.get("exception")
+    # `_request` is called as (tap_stream_id, endpoint, service_fn)
+    endpoint = details["args"][1] if len(details.get("args", ())) > 1 else None
+    telemetry.TELEMETRY.inc("listrak_retries_total", endpoint=endpoint,
+                            kind=faults.classify(exception))
     LOGGER.warning(
-        "Retry attempt %s due to error: %s. Waiting %s more seconds before retrying...",
+        "Retry attempt %s due to %s error: %s. Waiting %s more seconds before retrying...",
         details["tries"],
+        faults.classify(exception),
         str(exception),
         details["wait"]
     )
 
 def is_non_retriable_exception(exc):
-    """Avoid retrying on InvalidLogonAttempt errors."""
-    return isinstance(exc, Fault) and "InvalidLogonAttempt" in str(exc)
+    """Avoid retrying errors that will fail identically every time, such as
+    InvalidLogonAttempt or a fault about the requested MsgID."""
+    return faults.classify(exc) in (faults.PERMANENT, faults.PER_ENTITY)
 
 @backoff.on_exception(
     backoff.expo,
-    (XMLSyntaxError, TransportError, Fault),
+    (XMLSyntaxError, TransportError, Fault, requests.exceptions.RequestException),
     max_tries=5,
     jitter=None,
     on_backoff=log_retry_attempt,
     giveup=is_non_retriable_exception
 )
-def request(tap_stream_id, service_fn, **kwargs):
-    """Make SOAP API request with retry, metrics, and centralized error logging."""
+def _request(tap_stream_id, endpoint, service_fn, **kwargs):
+    profiling.set_current(tap_stream_id, endpoint)
+    engines = scope.lookup(globals(), "ENGINES")
+    call = engines.get(tap_stream_id, SOAP_ENGINE).operation(service_fn, endpoint)
+    hedger = scope.lookup(globals(), "HEDGER")
+    labels = {"stream": tap_stream_id, "endpoint": endpoint}
+    telemetry.TELEMETRY.inc("listrak_requests_in_flight", **labels)
+    started = time.monotonic()
     with metrics.http_request_timer(tap_stream_id) as timer:
-        response = service_fn(**kwargs)
+        try:
+            if hedger:
+                response = hedger.call(endpoint, call, kwargs)
+            else:
+                response = call(**kwargs)
+        except Exception:
+            telemetry.TELEMETRY.inc("listrak_requests_total", outcome="error", **labels)
+            raise
+        finally:
+            telemetry.TELEMETRY.dec("listrak_requests_in_flight", **labels)
+            telemetry.TELEMETRY.observe("listrak_request_duration_seconds",
+                                        time.monotonic() - started, **labels)
+        telemetry.TELEMETRY.inc("listrak_requests_total", outcome="ok", **labels)
         timer.tags[metrics.Tag.http_status_code] = 200
-        LOGGER.info(
+        LOGGER.debug(
             "Request successful for stream: %s | Page: %s | Start: %s",
             tap_stream_id,
             kwargs.get('Page', 'N/A'),
             kwargs.get('StartDate', 'N/A')
         )
+        progress.reporter().request_done(tap_stream_id, kwargs)
         return response
+
+
+def request(tap_stream_id, service_fn, **kwargs):
+    """Make SOAP API request with retry, metrics, and centralized error logging.
+
+    Calls to an endpoint whose circuit is open raise `CircuitOpenError`
+    without touching the API."""
+    endpoint = endpoint_name(service_fn)
+    breaker = scope.lookup(globals(), "BREAKER")
+    breaker.before_call(endpoint)
+    try:
+        response = _request(tap_stream_id, endpoint, service_fn, **kwargs)
+    except (XMLSyntaxError, TransportError, Fault,
+            requests.exceptions.RequestException) as exc:
+        breaker.record_failure(endpoint, exc)
+        raise
+    breaker.record_success(endpoint)
+    return response
@@ -0,0 +1,58 @@
+import gc
+import os
+import sys
+import singer
+from singer import metrics
+
+LOGGER = singer.get_logger()
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class MemoryCeilingExceeded(Exception):
+    pass
+
+
+def peak_rss():
+    """Returns the peak resident set size of the process in bytes."""
+    import resource # pylint: disable=import-outside-toplevel
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes everywhere else
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss():
+    """Returns the current resident set size of the process in bytes,
+    falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+
+class MemoryTracker(object):
+    """Tracks the peak RSS observed after each page of each stream and
+    enforces an optional ceiling, so that a run which would be OOM-killed
+    instead fails with a clear error naming the stream at fault."""
+    def __init__(self, max_rss_mb=None):
+        self.max_rss = int(float(max_rss_mb) * 1024 * 1024) if max_rss_mb else None
+        self.peaks = {}
+
+    def check(self, tap_stream_id):
+        rss = current_rss()
+        if self.max_rss and rss > self.max_rss:
+            gc.collect()
+            rss = current_rss()
+        if rss > self.peaks.get(tap_stream_id, 0):
+            self.peaks[tap_stream_id] = rss
+        if self.max_rss and rss > self.max_rss:
+            raise MemoryCeilingExceeded(
+                "RSS of {:.0f} MB exceeds max_rss_mb of {:.0f} MB while syncing {}".format(
+                    rss / 1024 / 1024, self.max_rss / 1024 / 1024, tap_stream_id))
+        return rss
+
+    def log_metrics(self):
+        for tap_stream_id, peak in sorted(self.peaks.items()):
+            metrics.log(LOGGER, metrics.Point("gauge", "peak_rss_bytes", peak,
+                                              {"stream": tap_stream_id}))
@@ -0,0 +1,78 @@
+import singer
+from . import scope
+
+LOGGER = singer.get_logger()
+
+# A learned page size is only trusted to end pagination early once a short
+# page has been followed by an empty one this many times.
+REQUIRED_VERIFICATIONS = 3
+
+# Endpoints served by the REST engine. Their pages are walked by cursor, so
+# the end of the results is known without a trailing request and page sizes
+# learned from SOAP responses must not be applied to them.
+CURSOR_PAGED = set()
+
+
+def cursor_paged():
+    return scope.lookup(globals(), "CURSOR_PAGED")
+
+
+def reset_cursor_paged():
+    scope.replace(globals(), "CURSOR_PAGED", set())
+
+
+class PageSizes(object):
+    """Knows the page size of each paginated endpoint so that a short page can
+    be treated as the last one, saving the request for the trailing empty
+    page.
+
+    Sizes come from the `page_sizes` config option or are learned from
+    responses: a page followed by a non-empty page must have been full. A
+    learned size is verified by still requesting the page after a short one
+    until REQUIRED_VERIFICATIONS of them came back empty, or always when
+    `verify` is set. If a short page is ever followed by more data, early
+    stopping is disabled for that endpoint.
+
+    `learned` is the `page_sizes` dict of the state, updated in place, and
+    looks like {endpoint: {"size": 5000, "verified": 3}}.
+    """
+    def __init__(self, learned, configured=None, verify=False):
+        self.learned = learned
+        self.configured = configured or {}
+        self.verify = verify
+
+    def size(self, endpoint):
+        if endpoint in self.configured:
+            return int(self.configured[endpoint])
+        return self.learned.get(endpoint, {}).get("size")
+
+    def is_trusted(self, endpoint):
+        if endpoint in self.configured:
+            return True
+        entry = self.learned.get(endpoint, {})
+        return not self.verify and entry.get("verified", 0) >= REQUIRED_VERIFICATIONS
+
+    def is_last_page(self, endpoint, page_len):
+        if endpoint in cursor_paged():
+            return False
+        size = self.size(endpoint)
+        return bool(size) and page_len < size and self.is_trusted(endpoint)
+
+    def observe(self, endpoint, prev_len, page_len):
+        """Learns from a page of `page_len` records that followed a page of
+        `prev_len` records, or the first page when `prev_len` is None."""
+        if prev_len is None or endpoint in self.configured or endpoint in cursor_paged():
+            return
+        entry = self.learned.setdefault(endpoint, {})
+        size = entry.get("size")
+        if size == 0:
+            return
+        if page_len:
+            if size and prev_len < size:
+                LOGGER.warning("%s returned more data after a short page of %d records, "
+                               "no longer stopping early on short pages", endpoint, prev_len)
+                entry.update(size=0, verified=0)
+            elif prev_len > (size or 0):
+                entry.update(size=prev_len, verified=0)
+        elif size and prev_len < size:
+            entry["verified"] = entry.get("verified", 0) + 1
@@ -0,0 +1,214 @@
+import json
+import sys
+import time
+import pendulum
+import singer
+from . import schemas
+from . import streams as streams_
+from .http import request
+from .schemas import IDS
+
+LOGGER = singer.get_logger()
+
+# Rough size in bytes of a JSON value of each type, used to estimate the
+# size of records that are not fetched while planning.
+VALUE_BYTES = {"integer": 8, "number": 10, "boolean": 5, "string": 24, "array": 2}
+DATE_TIME_BYTES = 27
+
+# Messages have no count of sends, the delivered count is the closest.
+SENDS_COUNT_FIELD = "DeliverCount"
+SENDS_ENDPOINT = "ReportMessageContactSent"
+CONTACTS_ENDPOINT = "ReportRangeSubscribedContacts"
+
+
+def schema_record_bytes(schema, fields=None):
+    """Estimates the size of a record of `schema` serialised as JSON,
+    counting only `fields` when given."""
+    total = 2
+    for name, prop in schema.get("properties", {}).items():
+        if fields is not None and name not in fields:
+            continue
+        types = prop.get("type", [])
+        types = [types] if isinstance(types, str) else types
+        kind = next((t for t in types if t != "null"), "string")
+        if kind == "object":
+            size = schema_record_bytes(prop)
+        elif prop.get("format") == "date-time":
+            size = DATE_TIME_BYTES
+        else:
+            size = VALUE_BYTES.get(kind, 0)
+        total += len(name) + 4 + size
+    return total
+
+
+def records_bytes(records):
+    return sum(len(json.dumps(record, default=str)) + 1 for record in records)
+
+
+def seconds_per_request(costs):
+    """The average time a page took on previous runs, from the per-entity
+    costs stored in state, or None if there is no history."""
+    pages = sum(cost[0] for cost in costs.values())
+    seconds = sum(cost[1] for cost in costs.values())
+    return seconds / pages if pages else None
+
+
+def estimate_requests(ctx, endpoint, records, history):
+    """Estimates the requests needed to page through one entity.
+
+    With a known page size the count is derived from `records`, including
+    the trailing short or empty page. Otherwise the pages the entity took on
+    its last run are used, and failing that a single page is assumed."""
+    size = ctx.page_sizes.size(endpoint)
+    if records is not None and size:
+        full, partial = divmod(records, size)
+        trailing = 1 if partial and not ctx.page_sizes.is_trusted(endpoint) else 0
+        return full + 1 + trailing
+    if history:
+        return history[0] + 1
+    return 2 if records else 1
+
+
+class StreamPlan(object):
+    """Accumulates the estimated work for one stream."""
+    def __init__(self, record_bytes=0, latency=None):
+        self.requests = 0
+        self.records = 0
+        self.bytes = 0
+        self.record_bytes = record_bytes
+        self.latency = latency
+        self.work = 0.0
+        self.longest = 0
+
+    def add(self, requests, records, workers=1, measured_bytes=None):
+        self.requests += requests
+        self.records += records or 0
+        if measured_bytes is not None:
+            self.bytes += measured_bytes
+        else:
+            self.bytes += (records or 0) * self.record_bytes
+        self.work += requests / workers
+        self.longest = max(self.longest, requests)
+
+    def seconds(self, default_latency):
+        latency = self.latency if self.latency is not None else default_latency
+        # No entity can finish faster than its own pages, however many
+        # workers there are.
+        return max(self.work, self.longest) * latency
+
+    def to_dict(self, default_latency):
+        return {"requests": self.requests,
+                "records": self.records,
+                "bytes": self.bytes,
+                "seconds": round(self.seconds(default_latency), 1)}
+
+
+def new_stream_plan(ctx, tap_stream_id, latency=None):
+    history = seconds_per_request(ctx.get_costs(tap_stream_id))
+    record_bytes = schema_record_bytes(schemas.load_schema(tap_stream_id),
+                                       ctx.get_projection(tap_stream_id))
+    return StreamPlan(record_bytes, history if history is not None else latency)
+
+
+def plan_message_sub_streams(ctx, plans, messages):
+    workers = streams_.message_workers(ctx)
+    for sub_stream in streams_.MESSAGE_SUB_STREAMS:
+        if sub_stream.tap_stream_id not in plans:
+            continue
+        costs = ctx.get_costs(sub_stream.tap_stream_id)
+        deferred = ctx.get_deferred(sub_stream.tap_stream_id)
+        counts = None
+        if streams_.skips_unchanged_messages(ctx, sub_stream):
+            counts = ctx.get_bookmark([sub_stream.tap_stream_id, "message_counts"]) or {}
+        for msg in messages:
+            msg_id = str(msg["MsgID"])
+            if counts is not None and msg_id not in deferred \
+               and not streams_.has_new_events(counts, msg, sub_stream):
+                continue
+            records = msg.get(sub_stream.count_field) if sub_stream.count_field else None
+            if records is not None and counts is not None and msg_id in counts:
+                records = max(records - counts[msg_id], 0)
+            history = costs.get(msg_id)
+            if records is None and history and ctx.page_sizes.size(sub_stream.endpoint):
+                records = history[0] * ctx.page_sizes.size(sub_stream.endpoint)
+            plans[sub_stream.tap_stream_id].add(
+                estimate_requests(ctx, sub_stream.endpoint, records, history),
+                records, workers)
+
+
+def plan_message_sends(ctx, plans, messages):
+    if IDS.MESSAGE_SENDS not in plans:
+        return
+    start_dt = pendulum.parse(ctx.get_bookmark(streams_.BOOK.MESSAGE_SENDS)
+                              or ctx.config["start_date"])
+    costs = ctx.get_costs(IDS.MESSAGE_SENDS)
+    deferred = ctx.get_deferred(IDS.MESSAGE_SENDS)
+    for msg in messages:
+        msg_id = str(msg["MsgID"])
+        if streams_.parse_datetime(msg["SendDate"]) < start_dt and msg_id not in deferred:
+            continue
+        records = msg.get(SENDS_COUNT_FIELD)
+        plans[IDS.MESSAGE_SENDS].add(
+            estimate_requests(ctx, SENDS_ENDPOINT, records, costs.get(msg_id)),
+            records, streams_.message_workers(ctx))
+
+
+def plan_subscribed_contacts(ctx, plans, lists):
+    if IDS.SUBSCRIBED_CONTACTS not in plans:
+        return
+    costs = ctx.get_costs(IDS.SUBSCRIBED_CONTACTS)
+    size = ctx.page_sizes.size(CONTACTS_ENDPOINT)
+    for lst in lists:
+        history = costs.get(str(lst["ListID"]))
+        records = history[0] * size if history and size else None
+        plans[IDS.SUBSCRIBED_CONTACTS].add(
+            estimate_requests(ctx, CONTACTS_ENDPOINT, records, history),
+            records, streams_.contact_slices(ctx, lst))
+
+
+def plan(ctx):
+    """Estimates the requests, records, bytes and seconds each selected
+    stream will take, calling only the lists and message activity endpoints.
+    Sub-stream sizes come from the aggregate counts on each message and the
+    page sizes and costs stored in state by previous runs."""
+    selected = [tap_stream_id for tap_stream_id in schemas.stream_ids
+                if tap_stream_id in ctx.selected_stream_ids]
+    plans = {tap_stream_id: new_stream_plan(ctx, tap_stream_id) for tap_stream_id in selected}
+
+    started = time.monotonic()
+    lists = streams_.transform(request(IDS.LISTS, ctx.client.service.GetContactListCollection)) or []
+    latency = time.monotonic() - started
+    if IDS.LISTS in plans:
+        plans[IDS.LISTS].add(1, len(lists), measured_bytes=records_bytes(
+            streams_.project_records(lists, ctx.get_projection(IDS.LISTS))))
+
+    if IDS.MESSAGES in plans:
+        windows = len(list(streams_.gen_intervals(ctx, ctx.config["start_date"])))
+        started = time.monotonic()
+        for lst in lists:
+            for batch in streams_.iter_list_messages(ctx, lst):
+                messages = batch.pop()
+                plans[IDS.MESSAGES].add(0, len(messages), measured_bytes=records_bytes(
+                    streams_.project_records(messages, ctx.get_projection(IDS.MESSAGES))))
+                plan_message_sub_streams(ctx, plans, messages)
+                plan_message_sends(ctx, plans, messages)
+            plans[IDS.MESSAGES].add(windows, 0, measured_bytes=0)
+        if lists and windows:
+            latency = (time.monotonic() - started) / (len(lists) * windows)
+
+    plan_subscribed_contacts(ctx, plans, lists)
+
+    stream_plans = {tap_stream_id: plans[tap_stream_id].to_dict(latency)
+                    for tap_stream_id in selected}
+    return {
+        "message_workers": streams_.message_workers(ctx),
+        "seconds_per_request": round(latency, 3),
+        "streams": stream_plans,
+        "total": {key: round(sum(p[key] for p in stream_plans.values()), 1)
+                  for key in ("requests", "records", "bytes", "seconds")},
+    }
+
+
+def print_plan(ctx):
+    json.dump(plan(ctx), sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write("\n")
@@ -0,0 +1,168 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+import singer
+
+LOGGER = singer.get_logger()
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# {thread ident: (stream, endpoint)} of the request each thread has in
+# flight. Set by `http.request` so both the sampler and anyone inspecting a
+# stuck run can see where the tap is spending its time, with messages and
+# contact slices synced on worker threads.
+CURRENT = {}
+
+
+def set_current(stream, endpoint):
+    if stream is None and endpoint is None:
+        CURRENT.pop(threading.get_ident(), None)
+    else:
+        CURRENT[threading.get_ident()] = (stream, endpoint)
+
+
+def current(thread_id=None):
+    """Returns {"stream": ..., "endpoint": ...} of the request in flight on
+    `thread_id`, by default the calling thread."""
+    stream, endpoint = CURRENT.get(threading.get_ident() if thread_id is None else thread_id,
+                                   (None, None))
+    return {"stream": stream, "endpoint": endpoint}
+
+
+def frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return "{}:{}".format(module, code.co_name)
+
+
+def collapse_stack(frame):
+    """Returns the stack ending at `frame` as a list of labels, outermost
+    frame first."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class Sampler(object):
+    """Samples the stacks of `thread_id`, or of every other thread when it
+    is None, at a fixed interval and counts the collapsed stacks, prefixed
+    with the stream and endpoint current on that thread when the sample was
+    taken."""
+    def __init__(self, thread_id=None, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self):
+        frames = sys._current_frames() # pylint: disable=protected-access
+        if self.thread_id is not None:
+            frames = {self.thread_id: frames[self.thread_id]} \
+                if self.thread_id in frames else {}
+        for thread_id, frame in frames.items():
+            if thread_id == self._thread.ident:
+                continue
+            tags = current(thread_id)
+            stack = ["stream={}".format(tags["stream"] or "-"),
+                     "endpoint={}".format(tags["endpoint"] or "-")]
+            stack.extend(collapse_stack(frame))
+            self.counts[";".join(stack)] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write("{} {}\n".format(stack, count))
+
+
+# Before 3.12 each thread can run its own cProfile. From 3.12 cProfile is
+# built on sys.monitoring and only one profiler may be active at a time, so
+# threads other than the one calling `profile` are covered by the sampler
+# alone.
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+
+class ThreadProfiles(object):
+    """Runs cProfile on the calling thread and, where the interpreter allows
+    it, on every thread started while it is enabled, such as the message
+    workers and contact slices, and merges their stats."""
+    def __init__(self):
+        self.profilers = [cProfile.Profile()]
+        self._lock = threading.Lock()
+
+    def _profile_thread(self, frame, event, arg): # pylint: disable=unused-argument
+        # Installed by `threading.setprofile`, so it runs once at the start
+        # of each new thread and is replaced by that thread's profiler.
+        # Failing here would kill the thread before it runs its target, so
+        # a thread whose profiler cannot start is left to the sampler.
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            sys.setprofile(None)
+            return
+        with self._lock:
+            self.profilers.append(profiler)
+
+    def enable(self):
+        if PER_THREAD_PROFILES:
+            threading.setprofile(self._profile_thread)
+        self.profilers[0].enable()
+
+    def disable(self):
+        self.profilers[0].disable()
+        threading.setprofile(None)
+
+    def dump_stats(self, path):
+        stats = pstats.Stats()
+        with self._lock:
+            profilers = list(self.profilers)
+        for profiler in profilers:
+            profiler.create_stats()
+            if profiler.stats:
+                stats.add(profiler)
+        stats.dump_stats(path)
+
+
+@contextmanager
+def profile(output_dir, interval=DEFAULT_SAMPLE_INTERVAL):
+    """Runs the body under cProfile and a stack sampler of every thread,
+    writing `sync.pstats` and a flamegraph-ready `sync.collapsed` to
+    `output_dir`."""
+    os.makedirs(output_dir, exist_ok=True)
+    profiler = ThreadProfiles()
+    sampler = Sampler(interval=interval)
+    started = time.monotonic()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        pstats_path = os.path.join(output_dir, "sync.pstats")
+        collapsed_path = os.path.join(output_dir, "sync.collapsed")
+        profiler.dump_stats(pstats_path)
+        sampler.write(collapsed_path)
+        CURRENT.clear()
+        LOGGER.info("Profiled sync in %.1fs, wrote %s and %s",
+                    time.monotonic() - started, pstats_path, collapsed_path)
@@ -0,0 +1,126 @@
+import threading
+import time
+import singer
+from . import scope
+
+LOGGER = singer.get_logger()
+
+DEFAULT_INTERVAL = 30
+
+# The request argument naming the entity a request is for.
+ENTITY_KEYS = ("MsgID", "ListID")
+
+
+class StreamProgress(object):
+    def __init__(self):
+        self.records = 0
+        self.requests = 0
+        self.reported_records = 0
+        self.reported_requests = 0
+        self.current = None
+        self.units_total = 0
+        self.units_done = 0
+        self.units_started = None
+
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return "{}:{:02d}:{:02d}".format(hours, minutes, seconds)
+
+
+class ProgressReporter(object):
+    """Counts the requests and records of each stream and logs a single
+    summary line at most every `interval` seconds, so the cost of logging
+    does not grow with the number of pages.
+
+    The ETA is for the batch of messages or lists a stream is working
+    through, from the average time its units have taken so far."""
+    def __init__(self, interval=DEFAULT_INTERVAL, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.streams = {}
+        self.last_report = clock()
+        self._lock = threading.Lock()
+
+    def _stream(self, tap_stream_id):
+        if tap_stream_id not in self.streams:
+            self.streams[tap_stream_id] = StreamProgress()
+        return self.streams[tap_stream_id]
+
+    def request_done(self, tap_stream_id, kwargs):
+        with self._lock:
+            stream = self._stream(tap_stream_id)
+            stream.requests += 1
+            for key in ENTITY_KEYS:
+                if key in kwargs:
+                    stream.current = "{} {}".format(key, kwargs[key])
+                    break
+        self.maybe_report()
+
+    def records_written(self, tap_stream_id, count):
+        with self._lock:
+            self._stream(tap_stream_id).records += count
+        self.maybe_report()
+
+    def units_started(self, tap_stream_id, count):
+        with self._lock:
+            stream = self._stream(tap_stream_id)
+            stream.units_total = count
+            stream.units_done = 0
+            stream.units_started = self.clock()
+
+    def unit_done(self, tap_stream_id):
+        with self._lock:
+            self._stream(tap_stream_id).units_done += 1
+
+    def eta(self, stream, now):
+        if not stream.units_done or stream.units_done >= stream.units_total:
+            return None
+        per_unit = (now - stream.units_started) / stream.units_done
+        return per_unit * (stream.units_total - stream.units_done)
+
+    def maybe_report(self):
+        now = self.clock()
+        if now - self.last_report < self.interval:
+            return
+        with self._lock:
+            if now - self.last_report < self.interval:
+                return
+            elapsed = now - self.last_report
+            self.last_report = now
+            lines = [self.summary(tap_stream_id, stream, elapsed, now)
+                     for tap_stream_id, stream in sorted(self.streams.items())
+                     if stream.requests != stream.reported_requests
+                     or stream.records != stream.reported_records]
+        for line in lines:
+            LOGGER.info("Progress | %s", line)
+
+    def summary(self, tap_stream_id, stream, elapsed, now):
+        records_rate = (stream.records - stream.reported_records) / elapsed
+        requests_rate = (stream.requests - stream.reported_requests) / elapsed
+        stream.reported_records = stream.records
+        stream.reported_requests = stream.requests
+        parts = ["{}: {} records ({:.1f}/s), {} requests ({:.2f}/s)".format(
+            tap_stream_id, stream.records, records_rate, stream.requests, requests_rate)]
+        if stream.current:
+            parts.append("at " + stream.current)
+        if stream.units_total:
+            parts.append("{}/{} done".format(stream.units_done, stream.units_total))
+        eta = self.eta(stream, now)
+        if eta is not None:
+            parts.append("ETA " + format_eta(eta))
+        return " | ".join(parts)
+
+
+REPORTER = ProgressReporter()
+
+
+def reporter():
+    return scope.lookup(globals(), "REPORTER")
+
+
+def configure_progress(config):
+    progress_reporter = ProgressReporter(float(config.get("progress_interval", DEFAULT_INTERVAL)))
+    scope.replace(globals(), "REPORTER", progress_reporter)
+    return progress_reporter
@@ -0,0 +1,198 @@
+from collections import OrderedDict
+import threading
+import time
+from datetime import date
+import requests
+import singer
+from zeep.exceptions import TransportError
+from . import pagination
+from . import telemetry
+
+LOGGER = singer.get_logger()
+
+DEFAULT_BASE_URL = "https://api.listrak.com/email/v1"
+DEFAULT_TOKEN_URL = "https://auth.listrak.com/OAuth2/Token"
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_TIMEOUT = 300
+
+# Refresh the access token this many seconds before it expires.
+TOKEN_EXPIRY_MARGIN = 60
+
+# The number of requests whose page cursors are kept, least recently used
+# first out. A request is one walk of an endpoint's pages for one entity
+# and date range.
+MAX_CURSOR_WALKS = 1000
+
+# REST paths of the SOAP operations, formatted with the request's
+# arguments. Others must be given in the `rest_routes` config option.
+DEFAULT_ROUTES = {
+    "GetContactListCollection": "/List",
+    "ReportListMessageActivity": "/List/{ListID}/Message",
+    "ReportRangeSubscribedContacts": "/List/{ListID}/Contact",
+}
+
+# SOAP operations whose records are wrapped in a result object, which the
+# REST engine reproduces so streams can read either response alike.
+RESPONSE_WRAPPERS = {
+    "ReportListMessageActivity": ("ReportListMessageActivityResult", "WSMessageActivity"),
+    "ReportMessageContactSent": ("ReportMessageContactSentResult", "WSMessageRecipient"),
+}
+
+# JSON field names whose SOAP name is not simply capitalised.
+DEFAULT_FIELD_NAMES = {
+    "listId": "ListID",
+    "msgId": "MsgID",
+    "messageId": "MsgID",
+    "contactId": "ContactID",
+}
+
+
+def soap_field_name(name, field_names):
+    if name in field_names:
+        return field_names[name]
+    return name[:1].upper() + name[1:]
+
+
+def query_param(name, value):
+    """Converts a SOAP argument to a REST query parameter."""
+    if isinstance(value, date):
+        value = value.isoformat()
+    elif isinstance(value, bool):
+        value = str(value).lower()
+    return name[:1].lower() + name[1:], value
+
+
+class RestEngine(object):
+    """Makes the calls of SOAP operations against Listrak's JSON REST API
+    and returns responses shaped like zeep's, so streams are unchanged.
+
+    Authenticates with OAuth client credentials. REST pages are walked with
+    an opaque cursor, so the cursor leading to each page number is kept per
+    request and a page whose cursor is not known, e.g. when a failed message
+    is resumed, is reached by walking the pages before it. HTTP errors are
+    raised as zeep's TransportError so they are retried and classified like
+    SOAP errors.
+
+    Once a walk reaches the end of its results only the page past the end
+    is kept, and only the latest MAX_CURSOR_WALKS walks are kept at all, so
+    the cursors stay bounded when the engine is reused by the daemon."""
+    name = "rest"
+
+    def __init__(self, config, session=None):
+        self.base_url = config.get("rest_base_url", DEFAULT_BASE_URL).rstrip("/")
+        self.token_url = config.get("rest_token_url", DEFAULT_TOKEN_URL)
+        self.client_id = config.get("rest_client_id")
+        self.client_secret = config.get("rest_client_secret")
+        self.page_size = int(config.get("rest_page_size", DEFAULT_PAGE_SIZE))
+        self.timeout = float(config.get("rest_timeout_seconds", DEFAULT_TIMEOUT))
+        self.routes = dict(DEFAULT_ROUTES, **config.get("rest_routes", {}))
+        self.field_names = dict(DEFAULT_FIELD_NAMES, **config.get("rest_field_names", {}))
+        if session is None:
+            session = requests.Session()
+            session.hooks["response"].append(telemetry.count_response_bytes)
+        self.session = session
+        self.token = None
+        self.token_expires_at = 0
+        self.cursors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def operation(self, service_fn, endpoint): # pylint: disable=unused-argument
+        if endpoint not in self.routes:
+            raise ValueError("No REST route for {}, add it to rest_routes".format(endpoint))
+        pagination.cursor_paged().add(endpoint)
+        return lambda **kwargs: self.call(endpoint, kwargs)
+
+    def access_token(self, refresh=False):
+        with self._lock:
+            if refresh or not self.token or time.monotonic() >= self.token_expires_at:
+                resp = self.session.post(self.token_url, timeout=self.timeout, data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret})
+                self.raise_for_status(resp)
+                body = resp.json()
+                self.token = body["access_token"]
+                self.token_expires_at = (time.monotonic() + float(body.get("expires_in", 3600))
+                                         - TOKEN_EXPIRY_MARGIN)
+            return self.token
+
+    @staticmethod
+    def raise_for_status(resp):
+        if resp.status_code >= 400:
+            raise TransportError("{} {}: {}".format(resp.status_code, resp.reason, resp.text[:500]),
+                                 resp.status_code, resp.content)
+
+    def get(self, path, params):
+        url = self.base_url + path
+        resp = self.session.get(url, params=params, timeout=self.timeout, headers={
+            "Authorization": "Bearer " + self.access_token()})
+        if resp.status_code == 401:
+            # The token may have been revoked before it expired
+            resp = self.session.get(url, params=params, timeout=self.timeout, headers={
+                "Authorization": "Bearer " + self.access_token(refresh=True)})
+        self.raise_for_status(resp)
+        return resp.json()
+
+    def fetch_page(self, endpoint, kwargs, cursor):
+        path = self.routes[endpoint].format(**kwargs)
+        params = dict(query_param(k, v) for k, v in kwargs.items()
+                      if k != "Page" and "{" + k + "}" not in self.routes[endpoint])
+        params["count"] = self.page_size
+        if cursor:
+            params["cursor"] = cursor
+        body = self.get(path, params)
+        records = [{soap_field_name(k, self.field_names): v for k, v in record.items()}
+                   for record in body.get("data") or []]
+        return records, body.get("nextPageCursor")
+
+    def walk_cursors(self, key):
+        """Returns {page: cursor} of the walk `key`, marking it as the most
+        recently used."""
+        with self._lock:
+            cursors = self.cursors.pop(key, None) or {1: None}
+            self.cursors[key] = cursors
+            while len(self.cursors) > MAX_CURSOR_WALKS:
+                self.cursors.popitem(last=False)
+            return cursors
+
+    def record_cursor(self, cursors, page, next_cursor):
+        """Records the cursor of the page after `page`. At the end of the
+        results the earlier cursors are dropped and only the page past the
+        end is kept, which is all that is asked for again."""
+        with self._lock:
+            if next_cursor:
+                cursors[page + 1] = next_cursor
+            else:
+                cursors.clear()
+                cursors.update({1: None, page + 1: False})
+
+    def page_cursor(self, endpoint, kwargs, page):
+        """Returns the walk's cursors and the cursor of `page`, walking
+        earlier pages if needed, or False if the results end before it."""
+        key = (endpoint, tuple(sorted((k, str(v)) for k, v in kwargs.items() if k != "Page")))
+        cursors = self.walk_cursors(key)
+        while True:
+            with self._lock:
+                known = max(p for p in cursors if p <= page)
+                cursor = cursors[known]
+            if known == page or cursor is False:
+                return cursors, cursor
+            _, next_cursor = self.fetch_page(endpoint, kwargs, cursor)
+            self.record_cursor(cursors, known, next_cursor)
+
+    def call(self, endpoint, kwargs):
+        page = kwargs.get("Page")
+        if page is None:
+            records, _ = self.fetch_page(endpoint, kwargs, None)
+        else:
+            cursors, cursor = self.page_cursor(endpoint, kwargs, page)
+            if cursor is False:
+                records = []
+            else:
+                records, next_cursor = self.fetch_page(endpoint, kwargs, cursor)
+                self.record_cursor(cursors, page, next_cursor)
+        wrapper = RESPONSE_WRAPPERS.get(endpoint)
+        if wrapper:
+            result_key, records_key = wrapper
+            return {result_key: {records_key: records} if records else None}
+        return records
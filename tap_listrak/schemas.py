@@ -53,5 +53,8 @@ def load_schema(tap_stream_id):
 
 
 def load_and_write_schema(tap_stream_id):
+    from .columnar import is_exported # pylint: disable=import-outside-toplevel
+    if is_exported(tap_stream_id):
+        return
     schema = load_schema(tap_stream_id)
     singer.write_schema(tap_stream_id, schema, PK_FIELDS[tap_stream_id])
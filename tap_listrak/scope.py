@@ -0,0 +1,57 @@
+import contextvars
+
+# {(module, name): value} of the singletons overridden in the current scope,
+# or None outside of one. See `isolate`.
+_OVERRIDES = contextvars.ContextVar("tap_listrak_overrides", default=None)
+
+
+def isolate():
+    """Starts a scope in the current context, in which the module-level
+    singletons set through `replace`, such as the circuit breaker and the
+    progress reporter, are private to it. Used to sync several accounts in
+    one process; call it inside a context of its own, e.g. via `submit`."""
+    _OVERRIDES.set({})
+
+
+def lookup(namespace, name):
+    """Returns the singleton `name` of the module whose globals are
+    `namespace`, as overridden in the current scope."""
+    overrides = _OVERRIDES.get()
+    if overrides is not None:
+        key = (namespace["__name__"], name)
+        if key in overrides:
+            return overrides[key]
+    return namespace[name]
+
+
+def replace(namespace, name, value):
+    """Sets the singleton `name` to `value` in the current scope, or for the
+    whole module outside of one, and returns the value it replaces there."""
+    overrides = _OVERRIDES.get()
+    if overrides is None:
+        previous = namespace[name]
+        namespace[name] = value
+        return previous
+    key = (namespace["__name__"], name)
+    previous = overrides.get(key)
+    overrides[key] = value
+    return previous
+
+
+def get(name, default=None):
+    """Returns a value stored with `put` in the current scope."""
+    overrides = _OVERRIDES.get()
+    return default if overrides is None else overrides.get(name, default)
+
+
+def put(name, value):
+    overrides = _OVERRIDES.get()
+    if overrides is None:
+        raise RuntimeError("No scope to store {} in, call isolate() first".format(name))
+    overrides[name] = value
+
+
+def submit(executor, fn, *args):
+    """Submits `fn` to run in a copy of the caller's context, so that it
+    sees the caller's scope."""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
@@ -0,0 +1,77 @@
+import json
+import sqlite3
+import singer
+
+LOGGER = singer.get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lists (
+    list_id PRIMARY KEY,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    msg_id PRIMARY KEY,
+    list_id NOT NULL,
+    send_date TEXT,
+    fields TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_by_list ON messages (list_id, send_date);
+"""
+
+
+class ParentSnapshot(object):
+    """An SQLite copy of the lists and messages seen by the last full sync,
+    so that their child streams can be synced without walking the API.
+
+    Lists are stored whole. Messages keep only the `fields` their child
+    streams read and are only rewritten when one of those changed."""
+    def __init__(self, path, fields):
+        self.fields = fields
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def save_lists(self, lists):
+        with self.conn:
+            self.conn.execute("DELETE FROM lists")
+            self.conn.executemany(
+                "INSERT INTO lists (list_id, record) VALUES (?, ?)",
+                [(lst["ListID"], json.dumps(lst, sort_keys=True)) for lst in lists])
+
+    def save_messages(self, list_id, messages):
+        rows = [(msg["MsgID"], list_id, msg.get("SendDate"),
+                 json.dumps({field: msg.get(field) for field in self.fields}, sort_keys=True))
+                for msg in messages]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO messages (msg_id, list_id, send_date, fields) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (msg_id) DO UPDATE SET list_id = excluded.list_id, "
+                "send_date = excluded.send_date, fields = excluded.fields "
+                "WHERE fields != excluded.fields OR list_id != excluded.list_id",
+                rows)
+
+    def has_parents(self):
+        return self.conn.execute("SELECT 1 FROM lists LIMIT 1").fetchone() is not None
+
+    def lists(self):
+        return [json.loads(record) for record,
+                in self.conn.execute("SELECT record FROM lists ORDER BY list_id")]
+
+    def messages(self, list_id):
+        """Returns the stored fields of each message of `list_id` as dicts."""
+        return [json.loads(fields) for fields,
+                in self.conn.execute("SELECT fields FROM messages WHERE list_id = ? "
+                                     "ORDER BY send_date, msg_id", (list_id,))]
+
+    def close(self):
+        self.conn.close()
+
+
+def get_snapshot(ctx, fields):
+    """Returns the ParentSnapshot at the `parent_snapshot_path` config
+    option, opening it on first use, or None if the option is not set."""
+    path = ctx.config.get("parent_snapshot_path")
+    if not path:
+        return None
+    if "parent_snapshot" not in ctx.cache:
+        ctx.cache["parent_snapshot"] = ParentSnapshot(path, fields)
+    return ctx.cache["parent_snapshot"]
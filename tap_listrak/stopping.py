@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+import signal
+import threading
+import singer
+
+LOGGER = singer.get_logger()
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+@contextmanager
+def stop_on_signals(request_stop):
+    """Calls `request_stop(reason)` on SIGTERM or SIGINT instead of dying,
+    so the sync can finish its pages in flight and write its state. A second
+    signal interrupts the tap at once. A handler installed before, such as the
+    daemon's, is still called.
+
+    Signal handlers can only be set from the main thread; elsewhere this
+    does nothing."""
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    previous = {signum: signal.getsignal(signum) for signum in STOP_SIGNALS}
+    received = []
+
+    def handle(signum, frame):
+        name = signal.Signals(signum).name
+        if received:
+            LOGGER.warning("Received %s again, exiting without waiting", name)
+            raise KeyboardInterrupt()
+        received.append(signum)
+        request_stop("received " + name)
+        handler = previous[signum]
+        if callable(handler) and handler is not signal.default_int_handler:
+            handler(signum, frame)
+
+    for signum in STOP_SIGNALS:
+        signal.signal(signum, handle)
+    try:
+        yield
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+class Stopper(object):
+    """Passes a stop request on to every Context added to it, including
+    those added afterwards."""
+    def __init__(self):
+        self.reason = None
+        self.contexts = []
+        self._lock = threading.Lock()
+
+    def add(self, ctx):
+        with self._lock:
+            self.contexts.append(ctx)
+            reason = self.reason
+        if reason:
+            ctx.request_stop(reason)
+
+    def request_stop(self, reason):
+        with self._lock:
+            self.reason = self.reason or reason
+            contexts = list(self.contexts)
+        for ctx in contexts:
+            ctx.request_stop(reason)
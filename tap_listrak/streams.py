@@ -1,15 +1,34 @@
 from collections import namedtuple
-from datetime import timedelta, date, timezone
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, date, timezone
 import pendulum
-from zeep.helpers import serialize_object
+from zeep.xsd import CompoundValue
 import singer
 from singer.utils import strftime
 from . import schemas
+from . import changes
+from . import columnar
+from . import dedupe
+from . import faults
+from . import http
+from . import progress
+from . import scope
+from . import telemetry
+from . import snapshot as snapshot_
+from .context import SyncStopped
 from .schemas import IDS
 from .http import request
 
 LOGGER = singer.get_logger()
 
+# Held while a page is written so that messages synced on worker threads
+# never interleave their output.
+WRITE_LOCK = threading.Lock()
+
 
 def gen_intervals(ctx, start_str):
     start_dt = pendulum.parse(start_str)
@@ -20,51 +39,92 @@ def gen_intervals(ctx, start_str):
         start_dt = end_dt
 
 
-def metrics(tap_stream_id, records):
-    with singer.metrics.record_counter(tap_stream_id) as counter:
-        counter.increment(len(records))
-
-
 def write_records(tap_stream_id, records):
-    singer.write_records(tap_stream_id, records)
-    metrics(tap_stream_id, records)
+    """Writes an iterable of records one at a time so that pages never need
+    to be held in memory as a whole."""
+    count = 0
+    with WRITE_LOCK, singer.metrics.record_counter(tap_stream_id) as counter:
+        deduper = dedupe.deduper()
+        if deduper:
+            records = deduper.filter(tap_stream_id, records)
+        parquet_exporter = columnar.exporter()
+        if parquet_exporter and parquet_exporter.exports(tap_stream_id):
+            count = parquet_exporter.add(tap_stream_id, records)
+            counter.increment(count)
+        else:
+            for record in records:
+                singer.write_record(tap_stream_id, record)
+                counter.increment()
+                count += 1
+    progress.reporter().records_written(tap_stream_id, count)
+    telemetry.TELEMETRY.inc("listrak_records_total", count, stream=tap_stream_id)
 
 
 def transform_dts(data):
+    """Converts zeep objects to plain dicts and lists, formatting datetimes
+    as strings, in a single pass."""
     if isinstance(data, list):
-        new = []
-        for item in data:
-            new.append(transform_dts(item))
-        return new
-    if isinstance(data, dict):
-        new = {}
-        for k, v in data.items():
-            new[k] = transform_dts(v)
-        return new
+        return [transform_dts(item) for item in data]
+    if isinstance(data, (dict, CompoundValue)):
+        return {k: transform_dts(data[k]) for k in data}
     if isinstance(data, date):
         new = data.replace(tzinfo=timezone.utc)
         return strftime(new)
     return data
 
 
+@functools.lru_cache(maxsize=4096)
+def parse_datetime(value):
+    """Parses an ISO 8601 string such as those written by `transform_dts`.
+
+    `datetime.fromisoformat` is dozens of times cheaper than `pendulum.parse`
+    and the result is cached, since the same SendDate is compared several
+    times per batch of messages. Other formats fall back to pendulum. Naive
+    values are taken to be UTC."""
+    try:
+        parsed = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        return pendulum.parse(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
 def transform(response):
-    return transform_dts(serialize_object(response))
+    return transform_dts(response)
+
+
+def transform_records(records, fields=None):
+    """Lazily transforms each record of a response page, dropping any field
+    not in `fields` before it is converted."""
+    for record in records:
+        if fields is None:
+            yield transform_dts(record)
+        else:
+            yield {k: transform_dts(record[k]) for k in record if k in fields}
+
+
+def project_records(records, fields):
+    """Drops fields not in `fields` from already transformed records without
+    modifying them, for parent records still needed in full by children."""
+    if fields is None:
+        return records
+    return ({k: v for k, v in record.items() if k in fields} for record in records)
 
 
 def add_list_id(lst, records):
     for record in records:
         record["ListID"] = lst["ListID"]
-    return records
+        yield record
 
 
 def add_msg_id(msg, records):
     for record in records:
         record["MsgID"] = msg["MsgID"]
-    return records
+        yield record
 
 
 class BOOK(object):
     SUBSCRIBED_CONTACTS = [IDS.SUBSCRIBED_CONTACTS, "AdditionDate"]
+    SUBSCRIBED_CONTACT_SLICES = [IDS.SUBSCRIBED_CONTACTS, "slices"]
     MESSAGE_CLICKS = [IDS.MESSAGE_CLICKS, "ClickDate"]
     MESSAGE_UNSUBS = [IDS.MESSAGE_UNSUBS, "RemovalDate"]
     MESSAGE_BOUNCES = [IDS.MESSAGE_BOUNCES, "BounceDate"]
@@ -73,53 +133,441 @@ class BOOK(object):
     MESSAGE_SENDS = [IDS.MESSAGE_SENDS, "SendDate"]
 
 
+def entity_start_date(deferred, entity_id, start_dt, synced_to=None):
+    """Widens `start_dt` back to the start of a window deferred on a previous
+    run for this entity, or else narrows it to the end of the window a
+    stopped run synced it up to."""
+    deferred_start = deferred.get(str(entity_id))
+    if deferred_start:
+        return min(pendulum.parse(deferred_start), start_dt)
+    synced_end = synced_to and synced_to.get(str(entity_id))
+    if synced_end:
+        return max(pendulum.parse(synced_end), start_dt)
+    return start_dt
+
+
+def check_stop(ctx):
+    """Called before each request of a page loop, so a stopping sync makes
+    no further request once the page in flight is written."""
+    if ctx.should_stop():
+        raise SyncStopped()
+
+
+class Cursor(object):
+    """The next page to request for a single MsgID or ListID, kept outside
+    the page loop so a failed entity can be resumed from the page that
+    failed."""
+    __slots__ = ("page",)
+
+    def __init__(self, page=1):
+        self.page = page
+
+
+RetryUnit = namedtuple("RetryUnit", ("tap_stream_id", "entity_id", "start_dt",
+                                     "cursor", "sync_fn", "args"))
+
+
+def run_unit(ctx, unit):
+    """Runs `unit.sync_fn(*unit.args, unit.cursor)`. If it fails with an
+    error that does not doom the rest of the run, the entity is recorded in
+    state to be re-synced from `unit.start_dt` and False is returned. The
+    pages and time taken by a successful unit are recorded in state so the
+    next run can schedule it.
+
+    Once the sync is stopping, units are not started and a unit in flight
+    ends after its current page; both return False and are synced again by
+    the next run."""
+    if ctx.should_stop():
+        return False
+    first_page = unit.cursor.page
+    started = time.monotonic()
+    telemetry.TELEMETRY.inc("listrak_units_running", stream=unit.tap_stream_id)
+    try:
+        unit.sync_fn(*unit.args, unit.cursor)
+    except SyncStopped:
+        return False
+    except faults.REQUEST_ERRORS as exc:
+        kind = faults.classify(exc)
+        if kind == faults.PERMANENT:
+            raise
+        LOGGER.warning("Deferring %s for ID %s at page %s after %s error: %s",
+                       unit.tap_stream_id, unit.entity_id, unit.cursor.page, kind, exc)
+        ctx.defer(unit.tap_stream_id, unit.entity_id, unit.start_dt)
+        if kind != faults.PER_ENTITY:
+            ctx.queue_retry(unit)
+        return False
+    finally:
+        telemetry.TELEMETRY.dec("listrak_units_running", stream=unit.tap_stream_id)
+        progress.reporter().unit_done(unit.tap_stream_id)
+    ctx.clear_deferred(unit.tap_stream_id, unit.entity_id)
+    ctx.mark_synced(unit.tap_stream_id, unit.entity_id)
+    ctx.record_cost(unit.tap_stream_id, unit.entity_id,
+                    unit.cursor.page - first_page, time.monotonic() - started)
+    return True
+
+
+def make_unit(tap_stream_id, entity_id, start_dt, sync_fn, *args):
+    return RetryUnit(tap_stream_id, entity_id, start_dt, Cursor(), sync_fn, args)
+
+
+def sync_entity(ctx, tap_stream_id, entity_id, start_dt, sync_fn, *args):
+    """Syncs a single MsgID or ListID. On a transient failure the entity is
+    deferred in state and queued to be retried at the end of the run."""
+    return run_unit(ctx, make_unit(tap_stream_id, entity_id, start_dt, sync_fn, *args))
+
+
+def schedule_units(ctx, units):
+    """Orders units longest-first by the time each entity took the last
+    time it was synced. Handing the most expensive messages to workers first
+    (LPT scheduling) keeps a late-starting giant from extending a run on
+    several workers. Entities with no history keep their order after those
+    with one."""
+    if len(units) <= 1:
+        return list(units)
+    costs = {}
+    for tap_stream_id in set(unit.tap_stream_id for unit in units):
+        costs[tap_stream_id] = ctx.get_costs(tap_stream_id)
+
+    def seconds(unit):
+        cost = costs[unit.tap_stream_id].get(str(unit.entity_id))
+        return cost[1] if cost else 0
+
+    return sorted(units, key=seconds, reverse=True)
+
+
+def run_units(ctx, units, workers=1):
+    """Runs units longest-first on up to `workers` threads, or in
+    multi-account mode on the pool shared by all accounts. On one worker
+    they run in the order given, as reordering cannot shorten a serial run.
+    Returns the result of `run_unit` for each unit, in the order given."""
+    for tap_stream_id in set(unit.tap_stream_id for unit in units):
+        count = sum(1 for unit in units if unit.tap_stream_id == tap_stream_id)
+        progress.reporter().units_started(tap_stream_id, count)
+        telemetry.TELEMETRY.inc("listrak_units_pending", count, stream=tap_stream_id)
+
+    def run(unit):
+        telemetry.TELEMETRY.dec("listrak_units_pending", stream=unit.tap_stream_id)
+        return run_unit(ctx, unit)
+
+    if workers <= 1 or len(units) <= 1:
+        return [run(unit) for unit in units]
+
+    ordered = schedule_units(ctx, units)
+    shared_pool = scope.get("unit_pool")
+    pool = shared_pool or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="entity")
+    futures = {id(unit): scope.submit(pool, run, unit) for unit in ordered}
+    try:
+        results = [futures[id(unit)].result() for unit in units]
+    except BaseException:
+        for unit in ordered:
+            if futures[id(unit)].cancel():
+                telemetry.TELEMETRY.dec("listrak_units_pending", stream=unit.tap_stream_id)
+        if pool is not shared_pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    if pool is not shared_pool:
+        pool.shutdown(wait=True)
+    return results
+
+
+def message_workers(ctx):
+    return max(int(ctx.config.get("message_workers", 1)), 1)
+
+
+def retry_failed_units(ctx):
+    """Re-attempts every unit that failed during the run, starting from the
+    page that failed, with fresh circuit breakers. Units that fail again stay
+    deferred in state for the next run."""
+    units, ctx.retry_queue = ctx.retry_queue, []
+    if not units or ctx.should_stop():
+        return
+    LOGGER.info("Retrying %d failed messages and lists", len(units))
+    http.configure_circuit_breaker(ctx.config)
+    recovered = sum(1 for synced in run_units(ctx, units) if synced)
+    # Units that failed again re-queued themselves, but they are left
+    # deferred in state for the next run rather than retried a third time.
+    ctx.retry_queue = []
+    LOGGER.info("Recovered %d of %d failed messages and lists, %d deferred to the next run",
+                recovered, len(units), len(units) - recovered)
+
+
+def iter_contact_pages(ctx, lst, start_dt, end_dt, page=1, stop=None):
+    """Yields (page, response) for each non-empty page of subscribed contacts
+    of a list between `start_dt` and `end_dt`, starting at `page`."""
+    endpoint = "ReportRangeSubscribedContacts"
+    prev_len = None
+    while not (stop and stop.is_set()):
+        check_stop(ctx)
+        response = request(IDS.SUBSCRIBED_CONTACTS,
+                           getattr(ctx.client.service, endpoint),
+                           ListID=lst["ListID"],
+                           StartDate=start_dt,
+                           EndDate=end_dt,
+                           Page=page)
+        page_len = len(response) if response else 0
+        ctx.observe_page(endpoint, prev_len, page_len)
+        if not response:
+            return
+        yield page, response
+        if ctx.is_last_page(endpoint, page_len):
+            return
+        prev_len = page_len
+        page += 1
+
+
+def write_contacts(ctx, lst, response):
+    contacts = add_list_id(lst, transform_records(
+        response, ctx.get_projection(IDS.SUBSCRIBED_CONTACTS)))
+    write_records(IDS.SUBSCRIBED_CONTACTS, contacts)
+    ctx.check_memory(IDS.SUBSCRIBED_CONTACTS)
+
+
+def contact_slices(ctx, lst):
+    """Returns the number of date ranges the contacts of `lst` should be
+    split into and fetched concurrently."""
+    split_lists = ctx.config.get("subscribed_contacts_split_lists")
+    if split_lists is not None and str(lst["ListID"]) not in {str(l) for l in split_lists}:
+        return 1
+    return int(ctx.config.get("subscribed_contacts_slices", 1))
+
+
+def split_range(start_dt, end_dt, slices):
+    step = (end_dt - start_dt) / slices
+    bounds = [start_dt + step * i for i in range(slices)] + [end_dt]
+    return list(zip(bounds, bounds[1:]))
+
+
+def plan_contact_slices(ctx, plans, lst, start_dt, slices):
+    """Returns the [start, end, next_page] ranges left to fetch for a list.
+
+    A plan left by an interrupted run is resumed at the next page of each
+    unfinished range, with the time since it ended split into new ranges.
+    Ranges that are done have a next_page of None."""
+    plan = plans.get(str(lst["ListID"]))
+    if plan:
+        start_dt = pendulum.parse(plan[-1][1])
+        plan = [r for r in plan if r[2] is not None]
+    else:
+        plan = []
+    if start_dt < ctx.now:
+        plan += [[s.isoformat(), e.isoformat(), 1]
+                 for s, e in split_range(start_dt, ctx.now, slices)]
+    return plan
+
+
+def sync_list_subscribed_contacts_sliced(ctx, lst, start_dt, slices, cursor):
+    """Fetches the contacts of one list as `slices` date ranges in parallel.
+
+    Worker threads only make requests; records are written, and the page
+    reached in each range checkpointed to state, from this thread so output
+    stays serial. Ranges resume from the plan in state rather than from
+    `cursor`, which only counts the pages written for the list's cost."""
+    plans = ctx.get_bookmark(BOOK.SUBSCRIBED_CONTACT_SLICES) or {}
+    key = str(lst["ListID"])
+    plan = plans[key] = plan_contact_slices(ctx, plans, lst, start_dt, slices)
+    LOGGER.info("Fetching subscribed contacts of list %s as %d concurrent date ranges",
+                lst["ListID"], len(plan))
+    pages = queue.Queue(maxsize=2 * len(plan))
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def fetch(index, start, end, page):
+        try:
+            for page_num, response in iter_contact_pages(
+                    ctx, lst, pendulum.parse(start), pendulum.parse(end), page, stop):
+                put((index, page_num, response))
+        except Exception as exc: # pylint: disable=broad-except
+            # Raised from this thread once every range has stopped
+            put((index, None, exc))
+            return
+        put((index, None, None))
+
+    error = None
+    with ThreadPoolExecutor(max_workers=max(len(plan), 1)) as executor:
+        try:
+            for index, (start, end, page) in enumerate(plan):
+                scope.submit(executor, fetch, index, start, end, page)
+            remaining = len(plan)
+            while remaining:
+                index, page, response = pages.get()
+                if page is None:
+                    remaining -= 1
+                    if response is None:
+                        plan[index][2] = None
+                    else:
+                        error = error or response
+                else:
+                    write_contacts(ctx, lst, response)
+                    plan[index][2] = page + 1
+                    cursor.page += 1
+                ctx.set_bookmark(BOOK.SUBSCRIBED_CONTACT_SLICES, plans)
+                ctx.write_state()
+        finally:
+            stop.set()
+    if error:
+        raise error
+    del plans[key]
+    ctx.set_bookmark(BOOK.SUBSCRIBED_CONTACT_SLICES, plans)
+
+
+def sync_list_subscribed_contacts(ctx, lst, start_dt, cursor):
+    slices = contact_slices(ctx, lst)
+    if slices > 1:
+        sync_list_subscribed_contacts_sliced(ctx, lst, start_dt, slices, cursor)
+        return
+    for page, response in iter_contact_pages(ctx, lst, start_dt, ctx.now, cursor.page):
+        write_contacts(ctx, lst, response)
+        cursor.page = page + 1
+
+
 def sync_subscribed_contacts(ctx, lists):
     schemas.load_and_write_schema(IDS.SUBSCRIBED_CONTACTS)
     start_dt = ctx.update_start_date_bookmark(BOOK.SUBSCRIBED_CONTACTS)
+    deferred = ctx.get_deferred(IDS.SUBSCRIBED_CONTACTS)
+    synced_to = ctx.get_synced_to(IDS.SUBSCRIBED_CONTACTS)
+    units = []
     for lst in lists:
-        page = 1
-        while True:
-            response = request(IDS.SUBSCRIBED_CONTACTS,
-                               ctx.client.service.ReportRangeSubscribedContacts,
-                               ListID=lst["ListID"],
-                               StartDate=start_dt,
-                               EndDate=ctx.now,
-                               Page=page)
-            if not response:
-                break
-            contacts = add_list_id(lst, transform(response))
-            write_records(IDS.SUBSCRIBED_CONTACTS, contacts)
-            page += 1
-    ctx.set_bookmark(BOOK.SUBSCRIBED_CONTACTS, ctx.now)
+        list_start_dt = entity_start_date(deferred, lst["ListID"], start_dt, synced_to)
+        units.append(make_unit(IDS.SUBSCRIBED_CONTACTS, lst["ListID"], list_start_dt,
+                               sync_list_subscribed_contacts, ctx, lst, list_start_dt))
+    # Lists checkpoint state mid-sync, so they run one at a time and are
+    # parallelised by `subscribed_contacts_slices` instead.
+    run_units(ctx, units)
+    if ctx.advances_bookmarks():
+        ctx.set_bookmark(BOOK.SUBSCRIBED_CONTACTS, ctx.now)
+        ctx.clear_synced_to(IDS.SUBSCRIBED_CONTACTS)
     ctx.write_state()
 
-SubStream = namedtuple("SubStream", ("tap_stream_id", "bookmark", "endpoint"))
+# `count_field` is the field of a `messages` record counting the events the
+# sub-stream returns for that message. Bounces have no such count.
+SubStream = namedtuple("SubStream", ("tap_stream_id", "bookmark", "endpoint", "count_field"),
+                       defaults=(None,))
 MESSAGE_SUB_STREAMS = [
-    SubStream(IDS.MESSAGE_CLICKS, BOOK.MESSAGE_CLICKS, "ReportRangeMessageContactClick"),
-    SubStream(IDS.MESSAGE_OPENS, BOOK.MESSAGE_OPENS, "ReportRangeMessageContactOpen"),
-    SubStream(IDS.MESSAGE_READS, BOOK.MESSAGE_READS, "ReportRangeMessageContactRead"),
-    SubStream(IDS.MESSAGE_UNSUBS, BOOK.MESSAGE_UNSUBS, "ReportRangeMessageContactRemoval"),
+    SubStream(IDS.MESSAGE_CLICKS, BOOK.MESSAGE_CLICKS, "ReportRangeMessageContactClick", "ClickCount"),
+    SubStream(IDS.MESSAGE_OPENS, BOOK.MESSAGE_OPENS, "ReportRangeMessageContactOpen", "OpenCount"),
+    SubStream(IDS.MESSAGE_READS, BOOK.MESSAGE_READS, "ReportRangeMessageContactRead", "ReadCount"),
+    SubStream(IDS.MESSAGE_UNSUBS, BOOK.MESSAGE_UNSUBS, "ReportRangeMessageContactRemoval", "RemoveCount"),
     SubStream(IDS.MESSAGE_BOUNCES, BOOK.MESSAGE_BOUNCES, "ReportRangeMessageContactBounces"),
 ]
 
 
+# The fields of a `messages` record that its child streams read.
+PARENT_FIELDS = ("MsgID", "SendDate", "DeliverCount") + tuple(
+    sub_stream.count_field for sub_stream in MESSAGE_SUB_STREAMS if sub_stream.count_field)
+
+
+class ParentMessage(object):
+    """A slim stand-in for a `messages` record, holding only the fields its
+    child streams read plus the parsed SendDate, so a large batch of
+    messages does not keep every full record alive while its sub-streams
+    sync. Fields are read like a dict's: `msg["MsgID"]`, `msg.get(...)`."""
+    __slots__ = PARENT_FIELDS + ("send_dt",)
+
+    def __init__(self, record):
+        for field in PARENT_FIELDS:
+            setattr(self, field, record.get(field))
+        self.send_dt = parse_datetime(self.SendDate) if self.SendDate else None
+
+    def __getitem__(self, key):
+        if key not in PARENT_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in PARENT_FIELDS else default
+
+    def __repr__(self):
+        return "ParentMessage(MsgID={!r})".format(self.MsgID)
+
+
+def send_datetime(msg):
+    send_dt = getattr(msg, "send_dt", None)
+    return send_dt if send_dt is not None else parse_datetime(msg["SendDate"])
+
+
+def skips_unchanged_messages(ctx, sub_stream):
+    # Counts read from the parent snapshot may be stale, so they cannot show
+    # that a message has no new events.
+    return bool(sub_stream.count_field and ctx.config.get("skip_unchanged_message_counts")
+                and not ctx.cache.get("parents_from_snapshot"))
+
+
+def has_new_events(counts, msg, sub_stream):
+    """Returns False when the message's aggregate count shows the sub-stream
+    cannot have events beyond those already synced: the count is zero, or it
+    is unchanged since the run that last fetched the message.
+
+    This is only sound because messages whose counts are tracked are fetched
+    up to the time their counts were observed, rather than `ctx.now`, so a
+    stored count never includes events that were not fetched."""
+    count = msg.get(sub_stream.count_field)
+    if count is None:
+        return True
+    return count != 0 and counts.get(str(msg["MsgID"])) != count
+
+
+def sync_message_sub_stream_records(ctx, msg, sub_stream, start_dt, end_dt, cursor):
+    prev_len = None
+    while True:
+        check_stop(ctx)
+        response = request(sub_stream.tap_stream_id,
+                           getattr(ctx.client.service, sub_stream.endpoint),
+                           MsgID=msg["MsgID"],
+                           StartDate=start_dt,
+                           EndDate=end_dt,
+                           Page=cursor.page)
+        page_len = len(response) if response else 0
+        ctx.observe_page(sub_stream.endpoint, prev_len, page_len)
+        if not response:
+            break
+        records = add_msg_id(msg, transform_records(
+            response, ctx.get_projection(sub_stream.tap_stream_id)))
+        write_records(sub_stream.tap_stream_id, records)
+        ctx.check_memory(sub_stream.tap_stream_id)
+        cursor.page += 1
+        if ctx.is_last_page(sub_stream.endpoint, page_len):
+            break
+        prev_len = page_len
+
+
 def sync_message_sub_stream(ctx, messages, sub_stream):
     schemas.load_and_write_schema(sub_stream.tap_stream_id)
     start_dt = ctx.update_start_date_bookmark(sub_stream.bookmark)
+    deferred = ctx.get_deferred(sub_stream.tap_stream_id)
+    synced_to = ctx.get_synced_to(sub_stream.tap_stream_id)
+    end_dt = ctx.now
+    counts = None
+    if skips_unchanged_messages(ctx, sub_stream):
+        end_dt = ctx.cache.get("messages_observed_at", ctx.now)
+        counts = ctx.get_bookmark([sub_stream.tap_stream_id, "message_counts"]) or {}
+    skipped = 0
+    synced_messages, units = [], []
     for msg in messages:
-        page = 1
-        while True:
-            response = request(sub_stream.tap_stream_id,
-                               getattr(ctx.client.service, sub_stream.endpoint),
-                               MsgID=msg["MsgID"],
-                               StartDate=start_dt,
-                               EndDate=ctx.now,
-                               Page=page)
-            if not response:
-                break
-            records = add_msg_id(msg, transform(response))
-            write_records(sub_stream.tap_stream_id, records)
-            page += 1
+        msg_id = msg["MsgID"]
+        if counts is not None and str(msg_id) not in deferred \
+           and not has_new_events(counts, msg, sub_stream):
+            skipped += 1
+            continue
+        msg_start_dt = entity_start_date(deferred, msg_id, start_dt, synced_to)
+        synced_messages.append(msg)
+        units.append(make_unit(sub_stream.tap_stream_id, msg_id, msg_start_dt,
+                               sync_message_sub_stream_records,
+                               ctx, msg, sub_stream, msg_start_dt, end_dt))
+    results = run_units(ctx, units, message_workers(ctx))
+    for msg, synced in zip(synced_messages, results):
+        if counts is not None and synced and msg.get(sub_stream.count_field) is not None:
+            counts[str(msg["MsgID"])] = msg[sub_stream.count_field]
+    if counts is not None:
+        ctx.set_bookmark([sub_stream.tap_stream_id, "message_counts"], counts)
+        LOGGER.info("Skipped %d of %d messages for %s with no new %s",
+                    skipped, len(messages), sub_stream.tap_stream_id, sub_stream.count_field)
 
 
 def sync_sub_streams(ctx, messages):
@@ -128,83 +576,187 @@ def sync_sub_streams(ctx, messages):
             sync_message_sub_stream(ctx, messages, sub_stream)
 
 
+def sync_message_sends(ctx, msg, cursor):
+    endpoint = "ReportMessageContactSent"
+    prev_len = None
+    while True:
+        check_stop(ctx)
+        response = request(IDS.MESSAGE_SENDS,
+                           getattr(ctx.client.service, endpoint),
+                           MsgID=msg["MsgID"],
+                           Page=cursor.page)
+        sent_result = response["ReportMessageContactSentResult"]
+        if not sent_result:
+            ctx.observe_page(endpoint, prev_len, 0)
+            break
+        ws_recipients = sent_result["WSMessageRecipient"]
+        if not ws_recipients:
+            LOGGER.warning("No WSMessageRecipient on page %d for MsgID %s, continuing to next page",
+                           cursor.page, msg["MsgID"])
+            cursor.page += 1
+            # An empty but present page says nothing about the page size
+            prev_len = None
+            continue
+        page_len = len(ws_recipients)
+        ctx.observe_page(endpoint, prev_len, page_len)
+        records = add_msg_id(msg, transform_records(
+            ws_recipients, ctx.get_projection(IDS.MESSAGE_SENDS)))
+        write_records(IDS.MESSAGE_SENDS, records)
+        ctx.check_memory(IDS.MESSAGE_SENDS)
+        cursor.page += 1
+        if ctx.is_last_page(endpoint, page_len):
+            break
+        prev_len = page_len
+
+
 def sync_message_sends_if_selected(ctx, messages):
     if not IDS.MESSAGE_SENDS in ctx.selected_stream_ids:
         return
     schemas.load_and_write_schema(IDS.MESSAGE_SENDS)
     start_dt = ctx.update_start_date_bookmark(BOOK.MESSAGE_SENDS)
-    for msg in messages:
-        if pendulum.parse(msg["SendDate"]) < start_dt:
-            continue
-        page = 1
-        while True:
-            response = request(IDS.MESSAGE_SENDS,
-                               ctx.client.service.ReportMessageContactSent,
-                               MsgID=msg["MsgID"],
-                               Page=page)
-            sent_result = response["ReportMessageContactSentResult"]
-            if not sent_result:
-                break
-            ws_recipients = sent_result["WSMessageRecipient"]
-            if not ws_recipients:
-                LOGGER.warning("No WSMessageRecipient on page %d for MsgID %s, continuing to next page",
-                               page, msg["MsgID"])
-                page += 1
-                continue
-            records = add_msg_id(msg, transform(ws_recipients))
-            write_records(IDS.MESSAGE_SENDS, records)
-            page += 1
+    deferred = ctx.get_deferred(IDS.MESSAGE_SENDS)
+    synced_to = ctx.get_synced_to(IDS.MESSAGE_SENDS)
+    units = [make_unit(IDS.MESSAGE_SENDS, msg["MsgID"], start_dt, sync_message_sends, ctx, msg)
+             for msg in messages
+             if send_datetime(msg) >= entity_start_date(deferred, msg["MsgID"], start_dt,
+                                                         synced_to)
+             or str(msg["MsgID"]) in deferred]
+    run_units(ctx, units, message_workers(ctx))
 
 
 def update_sub_stream_bookmarks(ctx):
     for sub_stream in MESSAGE_SUB_STREAMS:
         if sub_stream.tap_stream_id in ctx.selected_stream_ids:
             ctx.set_bookmark(sub_stream.bookmark, ctx.now)
+            ctx.clear_synced_to(sub_stream.tap_stream_id)
 
 
 def update_message_sends_bookmark(ctx, max_send_dt):
     if IDS.MESSAGE_SENDS in ctx.selected_stream_ids and max_send_dt:
         ctx.set_bookmark(BOOK.MESSAGE_SENDS, max_send_dt)
+        ctx.clear_synced_to(IDS.MESSAGE_SENDS)
 
 
 def new_max_send_dt(messages, old_max):
-    max_this_batch = max(m["SendDate"] for m in messages)
-    return max(max_this_batch, old_max) if old_max else max_this_batch
+    send_dts = [m["SendDate"] for m in messages]
+    if old_max:
+        send_dts.append(old_max)
+    return max(send_dts, key=parse_datetime)
+
+
+def iter_list_messages(ctx, lst):
+    """Yields the transformed messages of `lst` for each `interval_days`
+    window from the start date, skipping empty windows.
+
+    Each batch is yielded inside a one-item list that the caller empties
+    with `pop()`, so the suspended generator does not keep the full records
+    alive while the caller works on the batch."""
+    for begin_dt, end_dt in gen_intervals(ctx, ctx.config["start_date"]):
+        if ctx.should_stop():
+            return
+        response = request(IDS.MESSAGES,
+                           ctx.client.service.ReportListMessageActivity,
+                           ListID=lst["ListID"],
+                           StartDate=begin_dt,
+                           EndDate=end_dt,
+                           IncludeTestMessages=True)
+        if ctx.config.get("skip_unchanged_message_counts"):
+            # Sub-streams are fetched up to this time so that the
+            # counts on these messages only cover fetched events.
+            ctx.cache["messages_observed_at"] = pendulum.now("UTC")
+        act_result = response["ReportListMessageActivityResult"]
+        if not act_result:
+            continue
+        ws_messages = act_result["WSMessageActivity"]
+        if not ws_messages:
+            continue
+        batch = [transform(ws_messages)]
+        # Don't hold the zeep objects while the caller works on the batch
+        del response, act_result, ws_messages
+        yield batch
+
+
+def sync_message_children(ctx, parents, max_send_dt):
+    """Syncs the selected child streams of a batch of ParentMessages and
+    returns the latest SendDate seen so far."""
+    max_send_dt = new_max_send_dt(parents, max_send_dt)
+    sync_sub_streams(ctx, parents)
+    sync_message_sends_if_selected(ctx, parents)
+    return max_send_dt
+
+
+def finish_message_children(ctx, max_send_dt):
+    if ctx.advances_bookmarks():
+        update_sub_stream_bookmarks(ctx)
+        update_message_sends_bookmark(ctx, max_send_dt)
+    ctx.write_state()
 
 
 def sync_messages(ctx, lists):
     schemas.load_and_write_schema(IDS.MESSAGES)
-    start_dt = ctx.config["start_date"]
+    snapshot = snapshot_.get_snapshot(ctx, PARENT_FIELDS)
     max_send_dt = None
+    msg_ids = []
     for lst in lists:
-        for begin_dt, end_dt in gen_intervals(ctx, start_dt):
-            response = request(IDS.MESSAGES,
-                               ctx.client.service.ReportListMessageActivity,
-                               ListID=lst["ListID"],
-                               StartDate=begin_dt,
-                               EndDate=end_dt,
-                               IncludeTestMessages=True)
-            act_result = response["ReportListMessageActivityResult"]
-            if not act_result:
-                continue
-            ws_messages = act_result["WSMessageActivity"]
-            if not ws_messages:
-                continue
-            messages = transform(ws_messages)
-            write_records(IDS.MESSAGES, messages)
-            max_send_dt = new_max_send_dt(messages, max_send_dt)
-            sync_sub_streams(ctx, messages)
-            sync_message_sends_if_selected(ctx, messages)
-    update_sub_stream_bookmarks(ctx)
-    update_message_sends_bookmark(ctx, max_send_dt)
-    ctx.write_state()
+        for batch in iter_list_messages(ctx, lst):
+            messages = batch.pop()
+            write_records(IDS.MESSAGES, changes.filter_changed(
+                ctx, IDS.MESSAGES, project_records(messages, ctx.get_projection(IDS.MESSAGES))))
+            parents = [ParentMessage(msg) for msg in messages]
+            msg_ids.extend(p.MsgID for p in parents)
+            del messages
+            if snapshot:
+                snapshot.save_messages(lst["ListID"], parents)
+            ctx.check_memory(IDS.MESSAGES)
+            max_send_dt = sync_message_children(ctx, parents, max_send_dt)
+    # A stopped run has not read every list's messages
+    complete = not ctx.should_stop()
+    changes.finish(ctx, IDS.MESSAGES, complete=complete)
+    if complete:
+        ctx.mark_seen(IDS.MESSAGES, msg_ids)
+    finish_message_children(ctx, max_send_dt)
+
+
+def sync_messages_from_snapshot(ctx, snapshot, lists):
+    """Syncs the child streams of the messages stored in the snapshot,
+    without requesting or emitting the messages themselves."""
+    max_send_dt = None
+    for lst in lists:
+        parents = [ParentMessage(msg) for msg in snapshot.messages(lst["ListID"])]
+        if parents:
+            max_send_dt = sync_message_children(ctx, parents, max_send_dt)
+    finish_message_children(ctx, max_send_dt)
+
+
+def sync_from_snapshot(ctx, snapshot):
+    # The snapshot may miss lists and messages created since it was last
+    # updated, so its IDs are not marked seen, which would prune the others,
+    # and stream bookmarks do not advance: see `Context.advances_bookmarks`.
+    ctx.cache["parents_from_snapshot"] = True
+    lists = snapshot.lists()
+    LOGGER.info("Syncing child streams of %d lists from the parent snapshot", len(lists))
+    if IDS.MESSAGES in ctx.selected_stream_ids:
+        sync_messages_from_snapshot(ctx, snapshot, lists)
+    if IDS.SUBSCRIBED_CONTACTS in ctx.selected_stream_ids:
+        sync_subscribed_contacts(ctx, lists)
 
 
 def sync_lists(ctx):
+    snapshot = snapshot_.get_snapshot(ctx, PARENT_FIELDS)
+    if snapshot and ctx.config.get("sync_from_parent_snapshot"):
+        if snapshot.has_parents():
+            sync_from_snapshot(ctx, snapshot)
+            return
+        LOGGER.warning("Parent snapshot is empty, syncing lists and messages instead")
     schemas.load_and_write_schema(IDS.LISTS)
     response = request(IDS.LISTS, ctx.client.service.GetContactListCollection)
     lists = transform(response) or []
-    write_records(IDS.LISTS, lists)
+    write_records(IDS.LISTS, changes.filter_changed(
+        ctx, IDS.LISTS, project_records(lists, ctx.get_projection(IDS.LISTS))))
+    changes.finish(ctx, IDS.LISTS)
+    ctx.mark_seen(IDS.LISTS, [lst["ListID"] for lst in lists])
+    if snapshot:
+        snapshot.save_lists(lists)
     if IDS.MESSAGES in ctx.selected_stream_ids:
         sync_messages(ctx, lists)
     if IDS.SUBSCRIBED_CONTACTS in ctx.selected_stream_ids:
@@ -0,0 +1,212 @@
+import bisect
+import os
+import threading
+import singer
+
+LOGGER = singer.get_logger()
+
+DEFAULT_INTERVAL = 15
+DEFAULT_HOST = "127.0.0.1"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# {name: (type, help)} of every metric, in the order they are written.
+METRICS = {
+    "listrak_records_total": ("counter", "Records written."),
+    "listrak_requests_total": ("counter", "API requests made, by outcome."),
+    "listrak_retries_total": ("counter", "API requests retried, by error kind."),
+    "listrak_response_bytes_total": ("counter", "Bytes of API response bodies."),
+    "listrak_request_duration_seconds": ("histogram", "Duration of API requests."),
+    "listrak_requests_in_flight": ("gauge", "API requests in progress."),
+    "listrak_units_pending": ("gauge", "Messages and lists waiting for a worker."),
+    "listrak_units_running": ("gauge", "Messages and lists being synced."),
+}
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(k, escape(v)) for k, v in labels) + "}"
+
+
+class Histogram(object):
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield "{}_bucket{} {}".format(name, format_labels(labels + (("le", str(bound)),)),
+                                          cumulative)
+        yield "{}_sum{} {}".format(name, format_labels(labels), self.sum)
+        yield "{}_count{} {}".format(name, format_labels(labels), cumulative)
+
+
+class Telemetry(object):
+    """Counters, gauges and histograms of a sync, rendered in the Prometheus
+    text format. Labels are given as keyword arguments.
+
+    Updates only take a lock and touch a dict, so they can be made on every
+    request and page."""
+    def __init__(self):
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, name, labels):
+        if name not in METRICS:
+            raise KeyError(name)
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, name, amount=1, **labels):
+        self.inc(name, -amount, **labels)
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.values:
+                self.values[key] = Histogram(LATENCY_BUCKETS)
+            self.values[key].observe(value)
+
+    def get(self, name, **labels):
+        return self.values.get(self._key(name, labels))
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for name, (metric_type, help_text) in METRICS.items():
+                series = sorted((labels, value) for (metric, labels), value in self.values.items()
+                                if metric == name)
+                if not series:
+                    continue
+                lines.append("# HELP {} {}".format(name, help_text))
+                lines.append("# TYPE {} {}".format(name, metric_type))
+                for labels, value in series:
+                    if isinstance(value, Histogram):
+                        lines.extend(value.lines(name, labels))
+                    else:
+                        lines.append("{}{} {}".format(name, format_labels(labels), value))
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Writes the metrics to `path` atomically, for node_exporter's
+        textfile collector, which may read it at any time."""
+        with open(path + ".tmp", "w") as textfile:
+            textfile.write(self.render())
+        os.replace(path + ".tmp", path)
+
+
+class Exporter(object):
+    """Publishes TELEMETRY while the tap runs: rewrites `textfile` every
+    `interval` seconds and serves `/metrics` on `port`, either or both."""
+    def __init__(self, textfile=None, port=None, host=DEFAULT_HOST, interval=DEFAULT_INTERVAL):
+        self.textfile = textfile
+        self.interval = interval
+        self.settings = (textfile, port, host, interval)
+        self._stopped = threading.Event()
+        self._server = None
+        if port is not None:
+            from http.server import ThreadingHTTPServer # pylint: disable=import-outside-toplevel
+            self._server = ThreadingHTTPServer((host, int(port)), metrics_handler())
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="metrics-http",
+                             daemon=True).start()
+            LOGGER.info("Serving metrics on http://%s:%s/metrics", host, self._server.server_port)
+        if textfile:
+            threading.Thread(target=self._write_periodically, name="metrics-textfile",
+                             daemon=True).start()
+
+    def _write_periodically(self):
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        if self.textfile:
+            try:
+                TELEMETRY.write_textfile(self.textfile)
+            except OSError as exc:
+                LOGGER.warning("Could not write metrics to %s: %s", self.textfile, exc)
+
+    def shutdown(self):
+        self._stopped.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        self.write()
+
+
+def metrics_handler():
+    """Returns the request handler class serving `/metrics`. http.server is
+    only imported when a port is configured."""
+    from http.server import BaseHTTPRequestHandler # pylint: disable=import-outside-toplevel
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self): # pylint: disable=invalid-name
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = TELEMETRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args): # pylint: disable=redefined-builtin
+            pass
+
+    return MetricsHandler
+
+
+# Shared by every account and daemon cycle of the process, so counters only
+# ever grow, as Prometheus expects.
+TELEMETRY = Telemetry()
+# Set by `configure_telemetry` when `metrics_textfile` or `metrics_port` is set.
+EXPORTER = None
+EXPORTER_LOCK = threading.Lock()
+
+
+def configure_telemetry(config):
+    """Starts publishing the metrics as configured, keeping an exporter
+    already running with the same settings."""
+    global EXPORTER # pylint: disable=global-statement
+    textfile = config.get("metrics_textfile")
+    port = config.get("metrics_port")
+    settings = (textfile, port, config.get("metrics_host", DEFAULT_HOST),
+                float(config.get("metrics_interval", DEFAULT_INTERVAL)))
+    with EXPORTER_LOCK:
+        if EXPORTER and EXPORTER.settings == settings:
+            return EXPORTER
+        if EXPORTER:
+            EXPORTER.shutdown()
+        EXPORTER = Exporter(*settings) if textfile or port is not None else None
+        return EXPORTER
+
+
+def flush():
+    """Writes the textfile now, e.g. at the end of a sync."""
+    if EXPORTER:
+        EXPORTER.write()
+
+
+def count_response_bytes(response, *args, **kwargs): # pylint: disable=unused-argument
+    """A `requests` response hook. SOAP responses are labelled with their
+    operation, REST responses with `rest`."""
+    action = response.request.headers.get("SOAPAction") if response.request else None
+    endpoint = action.strip('"').rsplit("/", 1)[-1] if action else "rest"
+    TELEMETRY.inc("listrak_response_bytes_total", len(response.content), endpoint=endpoint)
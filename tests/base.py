@@ -104,6 +104,12 @@ class ListrakBaseTest:
         ctx.client = MagicMock()
         ctx.client.service = MagicMock()
         ctx.selected_stream_ids = selected_ids or []
+        ctx.get_deferred.return_value = {}
+        ctx.is_last_page.return_value = False
+        ctx.get_projection.return_value = None
+        ctx.get_costs.return_value = {}
+        ctx.should_stop.return_value = False
+        ctx.get_synced_to.return_value = {}
         return ctx
 
     @staticmethod
@@ -10,7 +10,7 @@ from singer import metadata
 
 
 class ListrakAutomaticFieldsTest(ListrakBaseTest, unittest.TestCase):
-    """Verify automatic fields (PKs and all fields) are properly defined."""
+    """Verify automatic fields (PKs) and available fields are properly defined."""
 
     def _get_catalog(self):
         """Helper to run discover with a mocked Context."""
@@ -37,23 +37,30 @@ class ListrakAutomaticFieldsTest(ListrakBaseTest, unittest.TestCase):
                         f"PK '{pk}' in {stream_name} should be automatic",
                     )
 
-    def test_all_fields_are_automatic(self):
-        """In tap-listrak all fields are set to automatic inclusion."""
+    def test_non_key_fields_are_available_and_selected_by_default(self):
+        """Fields other than primary keys can be deselected but are synced by default."""
         catalog = self._get_catalog()
+        expected = self.expected_metadata()
 
         for stream in catalog.streams:
             mdata = metadata.to_map(stream.metadata)
             schema_dict = stream.schema.to_dict()
+            pks = expected[stream.tap_stream_id][self.PRIMARY_KEYS]
 
             for field_name in schema_dict.get("properties", {}):
+                if field_name in pks:
+                    continue
                 with self.subTest(stream=stream.tap_stream_id, field=field_name):
                     inclusion = metadata.get(
                         mdata, ("properties", field_name), "inclusion"
                     )
                     self.assertEqual(
-                        inclusion, "automatic",
-                        f"{stream.tap_stream_id}.{field_name} should be automatic",
+                        inclusion, "available",
+                        f"{stream.tap_stream_id}.{field_name} should be available",
                     )
+                    self.assertTrue(metadata.get(
+                        mdata, ("properties", field_name), "selected-by-default"
+                    ))
 
     def test_parent_streams_have_automatic_stream_inclusion(self):
         """lists and messages should have automatic stream-level inclusion."""
@@ -72,6 +72,12 @@ class ListrakStartDateTest(ListrakBaseTest, unittest.TestCase):
         ctx.set_bookmark = MagicMock()
         ctx.write_state = MagicMock()
         ctx.client = MagicMock()
+        ctx.get_deferred.return_value = {}
+        ctx.is_last_page.return_value = False
+        ctx.get_projection.return_value = None
+        ctx.get_costs.return_value = {}
+        ctx.should_stop.return_value = False
+        ctx.get_synced_to.return_value = {}
 
         mock_request.return_value = []
 
@@ -94,6 +100,12 @@ class ListrakStartDateTest(ListrakBaseTest, unittest.TestCase):
         )
         ctx.selected_stream_ids = ["message_sends"]
         ctx.client = MagicMock()
+        ctx.get_deferred.return_value = {}
+        ctx.is_last_page.return_value = False
+        ctx.get_projection.return_value = None
+        ctx.get_costs.return_value = {}
+        ctx.should_stop.return_value = False
+        ctx.get_synced_to.return_value = {}
 
         messages = [
             {"MsgID": "1", "SendDate": "2026-01-10T00:00:00Z"},
@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+import singer
+from singer.catalog import Catalog
+from tap_listrak import accounts, http, progress, scope
+
+
+class TestScope(unittest.TestCase):
+
+    def test_replace_outside_scope_sets_module_global(self):
+        breaker = http.configure_circuit_breaker({})
+        self.assertIs(http.BREAKER, breaker)
+
+    def test_scoped_singletons_do_not_leak(self):
+        module_breaker = http.configure_circuit_breaker({})
+
+        def in_scope():
+            scope.isolate()
+            breaker = http.configure_circuit_breaker({"circuit_failure_threshold": 1})
+            reporter = progress.configure_progress({})
+            return breaker, reporter, scope.lookup(vars(http), "BREAKER"), progress.reporter()
+
+        breaker, reporter, looked_up, current = contextvars.copy_context().run(in_scope)
+
+        self.assertIs(looked_up, breaker)
+        self.assertIs(current, reporter)
+        self.assertIs(http.BREAKER, module_breaker)
+        self.assertIsNot(progress.reporter(), reporter)
+
+    def test_submit_carries_the_scope(self):
+        def in_scope(pool):
+            scope.isolate()
+            scope.put("name", "a")
+            return scope.submit(pool, scope.get, "name").result()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            self.assertEqual(contextvars.copy_context().run(in_scope, pool), "a")
+            self.assertIsNone(pool.submit(scope.get, "name").result())
+
+
+class TestSharedService(unittest.TestCase):
+
+    def test_wsdl_is_parsed_once(self):
+        with patch("tap_listrak.http.zeep") as mock_zeep, \
+             patch.object(http, "SERVICE", None):
+            http.get_client({"username": "a", "password": "x"})
+            http.get_client({"username": "b", "password": "y"})
+
+        mock_zeep.wsdl.Document.assert_called_once()
+        self.assertEqual(mock_zeep.Client.call_count, 2)
+        for call in mock_zeep.Client.call_args_list:
+            self.assertIs(call.kwargs["wsdl"], mock_zeep.wsdl.Document.return_value)
+            self.assertIs(call.kwargs["transport"], mock_zeep.Transport.return_value)
+
+
+class TestAccountConfigs(unittest.TestCase):
+
+    def test_accounts_override_the_shared_config(self):
+        config = {"start_date": "2026-01-01T00:00:00Z", "message_workers": 2,
+                  "accounts": [{"name": "a", "username": "u1", "password": "p1"},
+                               {"name": "b", "username": "u2", "password": "p2",
+                                "message_workers": 4}]}
+
+        configs = accounts.account_configs(config)
+
+        self.assertEqual([c["message_workers"] for c in configs], [2, 4])
+        self.assertEqual(configs[0]["start_date"], "2026-01-01T00:00:00Z")
+        self.assertNotIn("accounts", configs[0])
+
+    def test_missing_credentials(self):
+        with self.assertRaises(ValueError):
+            accounts.account_configs({"accounts": [{"name": "a", "username": "u"}]})
+
+    def test_duplicate_names(self):
+        account = {"name": "a", "username": "u", "password": "p"}
+        with self.assertRaises(ValueError):
+            accounts.account_configs({"accounts": [account, dict(account)]})
+
+
+class TestSyncAccounts(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        self.config = {"start_date": "2026-01-01T00:00:00Z",
+                       "accounts_output_dir": self.output_dir,
+                       "accounts": [{"name": name, "username": name, "password": "p"}
+                                    for name in ("a", "b", "c")]}
+
+    def read_output(self, name):
+        with open(os.path.join(self.output_dir, name + ".jsonl")) as output:
+            return [json.loads(line) for line in output]
+
+    def test_accounts_run_concurrently(self):
+        started = threading.Barrier(3, timeout=5)
+
+        def sync(ctx):
+            # Only returns once all three accounts are in flight
+            started.wait()
+            ctx.write_state()
+
+        stdout = sys.stdout
+        accounts.sync_accounts(self.config, Catalog([]), sync)
+
+        self.assertIs(sys.stdout, stdout)
+        for name in ("a", "b", "c"):
+            self.assertEqual([message["type"] for message in self.read_output(name)], ["STATE"])
+
+    def test_each_account_writes_its_own_records(self):
+        def sync(ctx):
+            singer.write_record("lists", {"ListID": ctx.config["username"]})
+            ctx.state["runs"] = ctx.state.get("runs", 0) + 1
+
+        accounts.sync_accounts(self.config, Catalog([]), sync)
+        accounts.sync_accounts(self.config, Catalog([]), sync)
+
+        for name in ("a", "b", "c"):
+            self.assertEqual(self.read_output(name),
+                             [{"type": "RECORD", "stream": "lists", "record": {"ListID": name}}])
+            self.assertEqual(accounts.read_state(self.output_dir, name), {"runs": 2,
+                                                                        "page_sizes": {}})
+
+    def test_failed_account_does_not_stop_others(self):
+        def sync(ctx):
+            ctx.state["started"] = True
+            if ctx.config["name"] == "b":
+                raise RuntimeError("boom")
+            ctx.state["done"] = True
+
+        with self.assertRaisesRegex(RuntimeError, "boom"):
+            accounts.sync_accounts(self.config, Catalog([]), sync)
+
+        self.assertTrue(accounts.read_state(self.output_dir, "a")["done"])
+        self.assertTrue(accounts.read_state(self.output_dir, "c")["done"])
+        # The failed account's state up to the failure is still written
+        self.assertEqual(accounts.read_state(self.output_dir, "b"), {"started": True,
+                                                                    "page_sizes": {}})
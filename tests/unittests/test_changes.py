@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from tap_listrak import changes, streams
+from tap_listrak.context import Context
+
+LISTS = [{'ListID': 1, 'ListName': 'Newsletter'}, {'ListID': 2, 'ListName': 'Offers'}]
+MESSAGES = [{'MsgID': 10, 'ListID': 1, 'SendDate': '2026-01-15T00:00:00Z', 'OpenCount': 5},
+            {'MsgID': 11, 'ListID': 1, 'SendDate': '2026-01-16T00:00:00Z', 'OpenCount': 0}]
+
+
+class TestChangeIndex(unittest.TestCase):
+
+    def test_only_new_or_changed_records_pass(self):
+        hashes = {}
+        first = changes.ChangeIndex('lists', hashes)
+        self.assertEqual(list(first.filter(LISTS)), LISTS)
+        self.assertEqual(sorted(hashes), ['1', '2'])
+
+        second = changes.ChangeIndex('lists', hashes)
+        renamed = dict(LISTS[1], ListName='Deals')
+        self.assertEqual(list(second.filter([LISTS[0], renamed])), [renamed])
+        self.assertEqual(second.unchanged, 1)
+
+    @patch('tap_listrak.changes.metrics.log')
+    def test_log_metrics_tags_the_stream(self, mock_log):
+        index = changes.ChangeIndex('lists', {'1': changes.content_hash(LISTS[0])})
+        list(index.filter(LISTS))
+        index.log_metrics()
+        point = mock_log.call_args.args[1]
+        self.assertEqual((point.metric, point.value, point.tags),
+                         ('unchanged_records', 1, {'stream': 'lists'}))
+
+    def test_prune_drops_keys_not_seen(self):
+        hashes = {'1': changes.content_hash(LISTS[0]), '3': 'abc'}
+        index = changes.ChangeIndex('lists', hashes)
+        list(index.filter(LISTS))
+        index.prune()
+        self.assertEqual(sorted(hashes), ['1', '2'])
+
+
+class TestSyncChangedParents(unittest.TestCase):
+
+    def make_ctx(self, state):
+        ctx = Context({'start_date': '2026-01-01T00:00:00Z', 'skip_unchanged_parents': True},
+                      state)
+        ctx.client = MagicMock()
+        ctx.now = ctx.now.replace(year=2026, month=1, day=20)
+        ctx.selected_stream_ids = {'lists', 'messages', 'message_opens'}
+        ctx.write_state = MagicMock()
+        return ctx
+
+    @staticmethod
+    def fake_request(messages):
+        def request(tap_stream_id, service_fn, **kwargs): # pylint: disable=unused-argument
+            if tap_stream_id == 'lists':
+                return LISTS
+            if tap_stream_id == 'messages':
+                return {'ReportListMessageActivityResult': {
+                    'WSMessageActivity': messages if kwargs['ListID'] == 1 else []}}
+            return []
+        return request
+
+    def sync(self, state, messages):
+        written = {}
+
+        def write_records(tap_stream_id, records):
+            written.setdefault(tap_stream_id, []).extend(records)
+
+        with patch('tap_listrak.streams.request', side_effect=self.fake_request(messages)), \
+             patch('tap_listrak.streams.write_records', side_effect=write_records), \
+             patch('tap_listrak.streams.sync_message_sub_stream') as mock_sub_stream:
+            streams.sync_lists(self.make_ctx(state))
+        parents = [p['MsgID'] for call in mock_sub_stream.call_args_list for p in call.args[1]]
+        return written, parents
+
+    def test_unchanged_parents_are_not_emitted_but_still_traversed(self):
+        state = {}
+        written, _ = self.sync(state, MESSAGES)
+        self.assertEqual(len(written['lists']), 2)
+        self.assertEqual(len(written['messages']), 2)
+
+        opened = dict(MESSAGES[1], OpenCount=1)
+        written, parents = self.sync(state, [MESSAGES[0], opened])
+
+        self.assertEqual(written['lists'], [])
+        self.assertEqual(written['messages'], [opened])
+        self.assertEqual(parents, [10, 11])
+        self.assertEqual(sorted(state['bookmarks']['messages']['hashes']), ['10', '11'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from tap_listrak import columnar, schemas, streams
+from tap_listrak.context import Context
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+NOW = datetime(2026, 1, 15, 12, 0, tzinfo=timezone.utc)
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestParquetExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def read_manifest(self, exporter):
+        with open(os.path.join(self.directory,
+                               "manifest-{}.json".format(exporter.run_id))) as manifest:
+            return json.load(manifest)
+
+    def test_schema_is_typed_from_json_schema(self):
+        schema = columnar.arrow_schema("message_clicks")
+        self.assertEqual(schema.field("MsgID").type, pa.int64())
+        self.assertEqual(schema.field("ClickDate").type, pa.timestamp("us", tz="UTC"))
+        self.assertEqual(schema.field("LinkUrl").type, pa.string())
+        self.assertEqual(columnar.arrow_schema("messages").field("OrderTotal").type,
+                         pa.float64())
+
+    def test_batches_files_and_manifest(self):
+        exporter = columnar.ParquetExporter(self.directory, batch_rows=2, now=NOW)
+        opens = [{"MsgID": i, "EmailAddress": "a@b.c", "ContactID": None,
+                  "OpenDate": "2026-01-0{}T00:00:00.000000Z".format(i)} for i in range(1, 4)]
+
+        self.assertEqual(exporter.add("message_opens", opens), 3)
+        exporter.checkpoint()
+        exporter.add("message_opens", [dict(opens[0], OpenDate="not a date")])
+        exporter.checkpoint()
+
+        manifest = self.read_manifest(exporter)
+        self.assertEqual([(f["stream"], f["rows"]) for f in manifest["files"]],
+                         [("message_opens", 3), ("message_opens", 1)])
+        self.assertEqual(manifest["schemas"]["message_opens"]["OpenDate"],
+                         "timestamp[us, tz=UTC]")
+        first = pq.ParquetFile(os.path.join(self.directory, manifest["files"][0]["path"]))
+        self.assertEqual(first.metadata.num_row_groups, 2)
+        table = first.read()
+        self.assertEqual(table.column("MsgID").to_pylist(), [1, 2, 3])
+        self.assertEqual(table.column("OpenDate").to_pylist()[0],
+                         datetime(2026, 1, 1, tzinfo=timezone.utc))
+        self.assertIn("sync_date=2026-01-15", manifest["files"][0]["path"])
+        second = pq.read_table(os.path.join(self.directory, manifest["files"][1]["path"]))
+        self.assertEqual(second.column("OpenDate").to_pylist(), [None])
+
+    def test_nothing_written_without_records(self):
+        exporter = columnar.ParquetExporter(self.directory, now=NOW)
+        exporter.checkpoint()
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestExportMode(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.ctx = Context({"start_date": "2026-01-01T00:00:00Z",
+                            "parquet_dir": self.directory}, {})
+        self.addCleanup(columnar.configure_export, {})
+
+    def test_exported_streams_only_write_state(self):
+        stdout = io.StringIO()
+        with patch("sys.stdout", stdout):
+            schemas.load_and_write_schema("message_sends")
+            streams.write_records("message_sends", [{"MsgID": 1, "EmailAddress": "a@b.c"}])
+            self.ctx.write_state()
+
+        messages = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([message["type"] for message in messages], ["STATE"])
+        files = columnar.exporter().files
+        self.assertEqual([(f["stream"], f["rows"]) for f in files], [("message_sends", 1)])
+
+    def test_other_streams_are_still_singer_records(self):
+        stdout = io.StringIO()
+        with patch("sys.stdout", stdout):
+            schemas.load_and_write_schema("lists")
+            streams.write_records("lists", [{"ListID": 1}])
+
+        messages = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([message["type"] for message in messages], ["SCHEMA", "RECORD"])
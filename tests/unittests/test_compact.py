@@ -0,0 +1,116 @@
+import copy
+import json
+import threading
+import unittest
+from unittest.mock import patch
+from tap_listrak import compact
+from tap_listrak.context import Context
+
+STATE = {
+    "page_sizes": {"ReportRangeMessageContactOpen": 5000},
+    "bookmarks": {
+        "message_opens": {
+            "OpenDate": "2026-01-01T00:00:00Z",
+            "costs": {"10": [3, 1.5], "11": [1, 0.2], "12": [1, 0.1], "40": [9, 12.0]},
+            "deferred": {"11": "2026-01-02T00:00:00+00:00", "40": "2025-12-30T06:00:00+00:00"},
+            "message_counts": {"10": 5, "11": 0},
+            "synced_to": {"10": "2026-01-05T00:00:00.250000+00:00"},
+        },
+        "messages": {"hashes": {"10": "0123456789ab", "11": "ba9876543210"}},
+        "subscribed_contacts": {"AdditionDate": "2026-01-01T00:00:00Z",
+                                "costs": {"3": [2, 1.0]}},
+    },
+}
+
+
+class TestCompactState(unittest.TestCase):
+
+    def test_ids_as_ranges(self):
+        self.assertEqual(compact.encode_ids([1, 2, 3, 7, 9, 10]), [[1, 3], [7, 7], [9, 10]])
+        self.assertEqual(compact.decode_ids([[1, 3], [7, 7], [9, 10]]), [1, 2, 3, 7, 9, 10])
+
+    def test_round_trip(self):
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                state = copy.deepcopy(STATE)
+                compacted = json.loads(json.dumps(compact.compact_state(state, compress)))
+
+                self.assertEqual(state, STATE)
+                self.assertNotIn("costs", compacted["bookmarks"]["message_opens"])
+                self.assertEqual(compacted["bookmarks"]["message_opens"]["OpenDate"],
+                                 "2026-01-01T00:00:00Z")
+                self.assertEqual(compacted["page_sizes"], STATE["page_sizes"])
+
+                expanded = compact.expand_state(compacted)
+                opens = expanded["bookmarks"]["message_opens"]
+                self.assertEqual(opens["costs"], STATE["bookmarks"]["message_opens"]["costs"])
+                self.assertEqual(opens["deferred"],
+                                 STATE["bookmarks"]["message_opens"]["deferred"])
+                # Sub-second parts are dropped
+                self.assertEqual(opens["synced_to"], {"10": "2026-01-05T00:00:00+00:00"})
+                self.assertEqual(expanded["bookmarks"]["messages"],
+                                 STATE["bookmarks"]["messages"])
+
+    def test_entries_that_cannot_be_encoded_are_kept_as_is(self):
+        state = {"bookmarks": {"message_opens": {"costs": {"abc": [1, 1.0]},
+                                                 "deferred": {"7": "not a date"}}}}
+        self.assertIs(compact.compact_state(state), state)
+
+    def test_unknown_version(self):
+        with self.assertRaises(ValueError):
+            compact.expand_state({"entities": {"v": 99}})
+
+    def test_prune(self):
+        state = copy.deepcopy(STATE)
+        pruned = compact.prune_state(state, {"messages": {"10", "11"}})
+
+        self.assertEqual(pruned, 3)
+        self.assertEqual(sorted(state["bookmarks"]["message_opens"]["costs"]), ["10", "11"])
+        self.assertEqual(state["bookmarks"]["message_opens"]["deferred"],
+                         {"11": "2026-01-02T00:00:00+00:00"})
+        # Lists were not read in full, so their entries stay
+        self.assertEqual(state["bookmarks"]["subscribed_contacts"]["costs"], {"3": [2, 1.0]})
+
+
+class TestContextState(unittest.TestCase):
+
+    @patch("tap_listrak.context.singer.write_state")
+    def test_state_is_written_compact_and_read_back(self, mock_write_state):
+        config = {"start_date": "2026-01-01T00:00:00Z", "compact_state": "zlib"}
+        ctx = Context(config, copy.deepcopy(STATE))
+        ctx.write_state()
+
+        written = mock_write_state.call_args.args[0]
+        self.assertIn("zlib", written["entities"])
+        self.assertEqual(ctx.get_costs("message_opens"),
+                         STATE["bookmarks"]["message_opens"]["costs"])
+
+        resumed = Context(config, json.loads(json.dumps(written)))
+        self.assertEqual(resumed.get_costs("message_opens"), ctx.get_costs("message_opens"))
+        self.assertEqual(resumed.get_deferred("message_opens"),
+                         ctx.get_deferred("message_opens"))
+
+    def test_state_is_copied_under_the_lock(self):
+        ctx = Context({"start_date": "2026-01-01T00:00:00Z"}, copy.deepcopy(STATE))
+        written = []
+        with ctx.lock:
+            writer = threading.Thread(target=lambda: written.append(ctx.encoded_state()))
+            writer.start()
+            writer.join(0.05)
+            self.assertTrue(writer.is_alive())
+            ctx.page_sizes.observe("ReportRangeMessageContactClick", 10, 10)
+        writer.join()
+
+        self.assertIsNot(written[0], ctx.state)
+        self.assertEqual(written[0], ctx.state)
+
+    def test_prune_entities(self):
+        ctx = Context({"start_date": "2026-01-01T00:00:00Z"}, copy.deepcopy(STATE))
+        ctx.mark_seen("lists", [])
+        ctx.prune_entities()
+        self.assertEqual(ctx.get_costs("subscribed_contacts"), {})
+        self.assertEqual(len(ctx.get_costs("message_opens")), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import pendulum
+from zeep.exceptions import Fault
+from tap_listrak import streams
+from tap_listrak.context import Context
+
+
+class TestSplitRange(unittest.TestCase):
+
+    def test_split_range_covers_whole_range(self):
+        start = pendulum.parse("2026-01-01T00:00:00Z")
+        end = pendulum.parse("2026-01-05T00:00:00Z")
+        ranges = streams.split_range(start, end, 4)
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(ranges[0][0], start)
+        self.assertEqual(ranges[-1][1], end)
+        for (_, prev_end), (next_start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(prev_end, next_start)
+
+    def test_contact_slices_limited_to_split_lists(self):
+        ctx = MagicMock()
+        ctx.config = {"subscribed_contacts_slices": "4", "subscribed_contacts_split_lists": [7]}
+        self.assertEqual(streams.contact_slices(ctx, {"ListID": 7}), 4)
+        self.assertEqual(streams.contact_slices(ctx, {"ListID": 8}), 1)
+        ctx.config = {}
+        self.assertEqual(streams.contact_slices(ctx, {"ListID": 7}), 1)
+
+
+class TestSlicedSubscribedContacts(unittest.TestCase):
+
+    def setUp(self):
+        self.state = {}
+        self.ctx = Context({"start_date": "2026-01-01T00:00:00Z",
+                            "subscribed_contacts_slices": 2}, self.state)
+        self.ctx.client = MagicMock()
+        self.ctx.now = pendulum.parse("2026-01-03T00:00:00Z")
+        self.ctx.write_state = MagicMock()
+        self.start_dt = pendulum.parse("2026-01-01T00:00:00Z")
+
+    @staticmethod
+    def fake_request(fail_on=None):
+        def request(tap_stream_id, service_fn, **kwargs):
+            key = (kwargs["StartDate"].day, kwargs["Page"])
+            if key == fail_on:
+                raise Fault("Server was unable to process request")
+            if kwargs["Page"] <= 2:
+                return [{"ContactID": "{}-{}".format(*key)}]
+            return []
+        return request
+
+    @patch('tap_listrak.streams.write_records')
+    def test_ranges_are_fetched_and_plan_cleared(self, mock_write):
+        with patch('tap_listrak.streams.request', side_effect=self.fake_request()) as mock_request:
+            streams.sync_list_subscribed_contacts(self.ctx, {"ListID": 1}, self.start_dt,
+                                                  streams.Cursor())
+
+        written = sorted(r["ContactID"] for c in mock_write.call_args_list for r in c.args[1])
+        self.assertEqual(written, ["1-1", "1-2", "2-1", "2-2"])
+        windows = {(c.kwargs["StartDate"].day, c.kwargs["EndDate"].day)
+                   for c in mock_request.call_args_list}
+        self.assertEqual(windows, {(1, 2), (2, 3)})
+        self.assertEqual(self.ctx.write_state.call_count, 6)
+        self.assertEqual(self.state["bookmarks"]["subscribed_contacts"]["slices"], {})
+
+    @patch('tap_listrak.streams.write_records')
+    def test_cost_counts_pages_of_every_range(self, _):
+        unit = streams.make_unit("subscribed_contacts", 1, self.start_dt,
+                                 streams.sync_list_subscribed_contacts,
+                                 self.ctx, {"ListID": 1}, self.start_dt)
+        with patch('tap_listrak.streams.request', side_effect=self.fake_request()):
+            self.assertTrue(streams.run_unit(self.ctx, unit))
+        self.assertEqual(self.ctx.get_costs("subscribed_contacts")["1"][0], 4)
+
+    @patch('tap_listrak.streams.write_records')
+    def test_failed_range_is_checkpointed_and_resumed(self, mock_write):
+        with patch('tap_listrak.streams.request', side_effect=self.fake_request(fail_on=(2, 2))), \
+             patch('time.sleep'):
+            with self.assertRaises(Fault):
+                streams.sync_list_subscribed_contacts(self.ctx, {"ListID": 1}, self.start_dt,
+                                                      streams.Cursor())
+
+        plan = self.state["bookmarks"]["subscribed_contacts"]["slices"]["1"]
+        self.assertEqual([r[2] for r in plan], [None, 2])
+
+        with patch('tap_listrak.streams.request', side_effect=self.fake_request()) as mock_request:
+            streams.sync_list_subscribed_contacts(self.ctx, {"ListID": 1}, self.start_dt,
+                                                  streams.Cursor())
+        self.assertEqual({(c.kwargs["StartDate"].day, c.kwargs["Page"])
+                          for c in mock_request.call_args_list}, {(2, 2), (2, 3)})
+        self.assertEqual(self.state["bookmarks"]["subscribed_contacts"]["slices"], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
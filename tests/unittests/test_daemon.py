@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+from singer.catalog import Catalog
+from tap_listrak import daemon
+
+CONFIG = {"start_date": "2026-01-01T00:00:00Z", "username": "u", "password": "p"}
+
+
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.clients = []
+
+    def sync(self, ctx):
+        if not self.clients:
+            ctx.client = self.client
+        self.clients.append(ctx.client)
+        ctx.state["cycles"] = ctx.state.get("cycles", 0) + 1
+
+    def test_client_and_state_carry_over(self):
+        tap = daemon.Daemon(CONFIG, {}, Catalog([]), self.sync, interval=0)
+        tap.run(max_cycles=3)
+
+        self.assertEqual(self.clients, [self.client] * 3)
+        self.assertEqual(tap.state["cycles"], 3)
+
+    def test_state_is_saved_after_each_cycle(self):
+        state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, state_dir)
+        path = os.path.join(state_dir, "state.json")
+        tap = daemon.Daemon(CONFIG, {}, Catalog([]), self.sync, path, interval=0)
+
+        tap.run(max_cycles=2)
+
+        with open(path) as state_file:
+            self.assertEqual(json.load(state_file)["cycles"], 2)
+
+    def test_failed_cycle_does_not_stop_the_daemon(self):
+        def sync(ctx):
+            ctx.client = self.client
+            self.sync(ctx)
+            if len(self.clients) == 1:
+                raise RuntimeError("boom")
+
+        tap = daemon.Daemon(CONFIG, {}, Catalog([]), sync, interval=0)
+        tap.run(max_cycles=2)
+
+        self.assertEqual(tap.cycles, 2)
+        self.assertEqual(tap.state["cycles"], 2)
+
+    def test_trigger_and_stop(self):
+        cycled = threading.Event()
+
+        def sync(ctx):
+            self.sync(ctx)
+            cycled.set()
+
+        tap = daemon.Daemon(CONFIG, {}, Catalog([]), sync, interval=3600)
+        thread = threading.Thread(target=tap.run)
+        thread.start()
+        self.assertTrue(cycled.wait(5))
+        cycled.clear()
+        # Without the trigger the second cycle would start in an hour
+        tap.trigger()
+        self.assertTrue(cycled.wait(5))
+        tap.stop()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(tap.cycles, 2)
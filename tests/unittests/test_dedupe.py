@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import patch
+from tap_listrak import dedupe, streams
+
+
+class TestDeduplicator(unittest.TestCase):
+
+    def test_event_streams(self):
+        self.assertIn("message_opens", dedupe.EVENT_STREAMS)
+        self.assertNotIn("messages", dedupe.EVENT_STREAMS)
+        self.assertNotIn("subscribed_contacts", dedupe.EVENT_STREAMS)
+
+    def test_drops_identical_records_only(self):
+        deduper = dedupe.Deduplicator()
+        open_1 = {"MsgID": 1, "EmailAddress": "a@b.c", "OpenDate": "2026-01-01T00:00:00Z"}
+        open_2 = dict(open_1, OpenDate="2026-01-02T00:00:00Z")
+        records = [open_1, open_2, dict(open_1)]
+
+        kept = list(deduper.filter("message_opens", records))
+
+        self.assertEqual(kept, [open_1, open_2])
+        self.assertEqual(deduper.dropped, {"message_opens": 1})
+
+    def test_same_record_in_other_stream_is_kept(self):
+        deduper = dedupe.Deduplicator()
+        record = {"MsgID": 1, "EmailAddress": "a@b.c"}
+        self.assertTrue(deduper.is_new("message_opens", record))
+        self.assertTrue(deduper.is_new("message_reads", record))
+
+    def test_other_streams_pass_through(self):
+        deduper = dedupe.Deduplicator()
+        records = [{"ListID": 1}, {"ListID": 1}]
+        self.assertIs(deduper.filter("lists", records), records)
+
+    def test_oldest_keys_are_evicted(self):
+        deduper = dedupe.Deduplicator(max_keys=2)
+        for i in range(3):
+            deduper.is_new("message_opens", {"MsgID": i})
+        self.assertEqual(deduper._size, 2)
+        self.assertTrue(deduper.is_new("message_opens", {"MsgID": 0}))
+        self.assertFalse(deduper.is_new("message_opens", {"MsgID": 2}))
+
+    def test_matches_exact_window_across_evictions(self):
+        max_keys = 50
+        deduper = dedupe.Deduplicator(max_keys=max_keys)
+        # A small index makes probe runs collide and wrap around
+        self.assertEqual(len(deduper._index), 128)
+        window = []
+        for i in range(2000):
+            record = {"MsgID": (i * 7919) % 120}
+            expected = record["MsgID"] not in window
+            self.assertEqual(deduper.is_new("message_opens", record), expected)
+            if expected:
+                window = (window + [record["MsgID"]])[-max_keys:]
+        self.assertEqual(deduper._size, max_keys)
+
+    def test_memory_is_compact(self):
+        deduper = dedupe.Deduplicator(max_keys=1000)
+        size = (deduper._ring.itemsize * len(deduper._ring)
+                + deduper._index.itemsize * len(deduper._index))
+        self.assertLessEqual(size, 24 * 1000)
+
+
+    @patch("tap_listrak.dedupe.metrics.log")
+    def test_log_metrics_tags_the_stream(self, mock_log):
+        deduper = dedupe.Deduplicator()
+        deduper.dropped["message_opens"] = 3
+        deduper.log_metrics()
+        point = mock_log.call_args.args[1]
+        self.assertEqual((point.metric, point.value, point.tags),
+                         ("duplicate_records", 3, {"stream": "message_opens"}))
+
+
+class TestWriteRecordsDedupe(unittest.TestCase):
+
+    def tearDown(self):
+        dedupe.configure_dedupe({})
+
+    @patch("tap_listrak.streams.singer.write_record")
+    def test_write_records_skips_duplicates_when_enabled(self, mock_write):
+        records = [{"MsgID": 1, "EmailAddress": "a@b.c"}] * 2
+        streams.write_records("message_clicks", records)
+        self.assertEqual(mock_write.call_count, 2)
+
+        mock_write.reset_mock()
+        dedupe.configure_dedupe({"dedupe_records": True})
+        streams.write_records("message_clicks", records)
+        streams.write_records("message_clicks", records)
+        self.assertEqual(mock_write.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
+import json
+import os
+import sys
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
-from tap_listrak import schemas, discover
-from tap_listrak.context import Context
+from tap_listrak import schemas, discover, main_impl
+from tap_listrak.context import Context, selected_fields
 from singer import metadata
 
 
@@ -102,8 +106,8 @@ class TestDiscoverMetadata(unittest.TestCase):
         self.assertEqual(inclusion, 'automatic')
 
     @patch('tap_listrak.schemas.load_schema')
-    def test_discover_sets_automatic_inclusion_for_all_fields(self, mock_load_schema):
-        """Test that all fields have automatic inclusion metadata."""
+    def test_discover_sets_automatic_inclusion_for_key_fields(self, mock_load_schema):
+        """Test that key fields are automatic and other fields are available and selected by default."""
         mock_load_schema.return_value = {
             'type': 'object',
             'properties': {
@@ -115,15 +119,16 @@ class TestDiscoverMetadata(unittest.TestCase):
 
         catalog = discover(self.ctx)
 
-        # Check a stream's fields have automatic inclusion
+        # Check a stream's fields inclusion
         lists_stream = next(s for s in catalog.streams if s.tap_stream_id == 'lists')
         lists_mdata = metadata.to_map(lists_stream.metadata)
 
-        # Verify all fields have automatic inclusion
-        for field_name in ['ListID', 'Name', 'CreatedDate']:
+        self.assertEqual(metadata.get(lists_mdata, ('properties', 'ListID'), 'inclusion'), 'automatic')
+        for field_name in ['Name', 'CreatedDate']:
             field_inclusion = metadata.get(lists_mdata, ('properties', field_name), 'inclusion')
-            self.assertEqual(field_inclusion, 'automatic',
-                           f"Field {field_name} should have automatic inclusion")
+            self.assertEqual(field_inclusion, 'available',
+                           f"Field {field_name} should have available inclusion")
+            self.assertTrue(metadata.get(lists_mdata, ('properties', field_name), 'selected-by-default'))
 
     @patch('tap_listrak.schemas.load_schema')
     def test_discover_sets_parent_stream_id_for_child_streams(self, mock_load_schema):
@@ -314,3 +319,70 @@ class TestStreamDependencyHierarchy(unittest.TestCase):
             self.assertNotEqual(inclusion, 'automatic',
                               f"{stream_id} should not have automatic stream-level inclusion")
 
+
+
+class TestFieldSelection(unittest.TestCase):
+    """Test that field selection in the catalog is compiled into projections."""
+
+    def _entry(self, field_mdata):
+        entry = MagicMock()
+        entry.tap_stream_id = 'lists'
+        entry.is_selected.return_value = True
+        entry.metadata = [{'breadcrumb': (), 'metadata': {'selected': True}}] + [
+            {'breadcrumb': ('properties', name), 'metadata': md}
+            for name, md in field_mdata.items()]
+        return entry
+
+    def test_all_fields_selected_has_no_projection(self):
+        entry = self._entry({
+            'ListID': {'inclusion': 'automatic'},
+            'Name': {'inclusion': 'available', 'selected-by-default': True},
+        })
+        self.assertIsNone(selected_fields(entry))
+
+    def test_deselected_fields_are_dropped(self):
+        entry = self._entry({
+            'ListID': {'inclusion': 'automatic', 'selected': False},
+            'Name': {'inclusion': 'available', 'selected': False},
+            'Flag': {'inclusion': 'available', 'selected-by-default': True},
+            'Other': {'inclusion': 'available', 'selected': True},
+        })
+        self.assertEqual(selected_fields(entry), frozenset(['ListID', 'Flag', 'Other']))
+
+    def test_context_compiles_projection_per_stream(self):
+        ctx = Context({"start_date": "2026-01-01T00:00:00Z"}, {})
+        catalog = MagicMock()
+        catalog.streams = [self._entry({
+            'ListID': {'inclusion': 'automatic'},
+            'Name': {'inclusion': 'available', 'selected': False},
+        })]
+        ctx.catalog = catalog
+        self.assertEqual(ctx.get_projection('lists'), frozenset(['ListID']))
+        self.assertIsNone(ctx.get_projection('messages'))
+
+    @patch('tap_listrak.run_sync')
+    def test_catalog_flag_is_used(self, mock_run_sync):
+        config = {"start_date": "2026-01-01T00:00:00Z", "username": "u", "password": "p"}
+        catalog = discover(Context(config, {})).to_dict()
+        for stream in catalog['streams']:
+            for entry in stream['metadata']:
+                if stream['tap_stream_id'] == 'lists' and not entry['breadcrumb']:
+                    entry['metadata']['selected'] = True
+                if tuple(entry['breadcrumb']) == ('properties', 'ListName'):
+                    entry['metadata']['selected'] = False
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {}
+            for name, value in (('config', config), ('catalog', catalog)):
+                paths[name] = os.path.join(tmp, name + '.json')
+                with open(paths[name], 'w') as f:
+                    json.dump(value, f)
+            argv = ['tap-listrak', '--config', paths['config'], '--catalog', paths['catalog']]
+            with patch.object(sys, 'argv', argv), \
+                 patch('tap_listrak.discover', side_effect=AssertionError('rediscovered')):
+                main_impl()
+
+        ctx, = mock_run_sync.call_args.args
+        self.assertIn('lists', ctx.selected_stream_ids)
+        projection = ctx.get_projection('lists')
+        self.assertIn('ListID', projection)
+        self.assertNotIn('ListName', projection)
@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import requests
+from zeep.exceptions import Fault, TransportError, XMLSyntaxError
+from tap_listrak import faults, http
+
+
+class TestClassify(unittest.TestCase):
+
+    def test_classify(self):
+        cases = [
+            (Fault("InvalidLogonAttempt"), faults.PERMANENT),
+            (TransportError("Forbidden", 403), faults.PERMANENT),
+            (TransportError("Too Many Requests", 429), faults.THROTTLING),
+            (Fault("Request rate limit exceeded"), faults.THROTTLING),
+            (Fault("InvalidMessageID: 123"), faults.PER_ENTITY),
+            (Fault("ListID 42 was not found"), faults.PER_ENTITY),
+            (TransportError("Bad Request", 400), faults.PERMANENT),
+            (TransportError("Not Found", 404, b"<h1>404 - File or directory not found.</h1>"),
+             faults.PERMANENT),
+            (TransportError("Bad Request", 400, b"InvalidMessageID: 123"), faults.PER_ENTITY),
+            (TransportError("404 Not Found: ListID 42 not found", 404), faults.PER_ENTITY),
+            (requests.exceptions.ConnectionError("Connection reset by peer"),
+             faults.RETRIABLE),
+            (requests.exceptions.ReadTimeout("Read timed out"), faults.RETRIABLE),
+            (TransportError("Bad Gateway", 502), faults.RETRIABLE),
+            (TransportError("Request Timeout", 408), faults.RETRIABLE),
+            (Fault("Server was unable to process request"), faults.RETRIABLE),
+            (XMLSyntaxError("truncated"), faults.RETRIABLE),
+        ]
+        for exc, expected in cases:
+            with self.subTest(exc=exc):
+                self.assertEqual(faults.classify(exc), expected)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = faults.CircuitBreaker(failure_threshold=2, cooldown=60)
+        breaker.record_failure("op", Fault("Server error"))
+        breaker.before_call("op")
+        breaker.record_failure("op", Fault("Server error"))
+        with self.assertRaises(faults.CircuitOpenError):
+            breaker.before_call("op")
+        # Other endpoints are unaffected
+        breaker.before_call("other")
+
+    def test_success_resets_failures(self):
+        breaker = faults.CircuitBreaker(failure_threshold=2, cooldown=60)
+        breaker.record_failure("op", Fault("Server error"))
+        breaker.record_success("op")
+        breaker.record_failure("op", Fault("Server error"))
+        breaker.before_call("op")
+
+    def test_per_entity_errors_do_not_count(self):
+        breaker = faults.CircuitBreaker(failure_threshold=1, cooldown=60)
+        breaker.record_failure("op", Fault("InvalidMessageID"))
+        breaker.before_call("op")
+
+    @patch("tap_listrak.faults.time.monotonic")
+    def test_half_open_after_cooldown(self, mock_monotonic):
+        breaker = faults.CircuitBreaker(failure_threshold=2, cooldown=60)
+        mock_monotonic.return_value = 0
+        breaker.record_failure("op", Fault("Server error"))
+        breaker.record_failure("op", Fault("Server error"))
+        mock_monotonic.return_value = 61
+        breaker.before_call("op")
+        # A single failed trial call re-opens the circuit
+        breaker.record_failure("op", Fault("Server error"))
+        with self.assertRaises(faults.CircuitOpenError):
+            breaker.before_call("op")
+
+
+class TestRequestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        timer_patcher = patch("tap_listrak.http.metrics.http_request_timer")
+        timer_patcher.start()
+        self.addCleanup(timer_patcher.stop)
+        sleep_patcher = patch("time.sleep", return_value=None)
+        sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+        http.configure_circuit_breaker({"circuit_failure_threshold": 2})
+        self.addCleanup(http.configure_circuit_breaker, {})
+
+    def test_open_circuit_skips_api_calls(self):
+        service_fn = MagicMock(side_effect=Fault("Server error"))
+        service_fn._op_name = "ReportRangeMessageContactOpen"
+        for _ in range(2):
+            with self.assertRaises(Fault):
+                http.request("message_opens", service_fn, MsgID=1)
+        self.assertEqual(service_fn.call_count, 10)
+
+        with self.assertRaises(faults.CircuitOpenError):
+            http.request("message_opens", service_fn, MsgID=2)
+        self.assertEqual(service_fn.call_count, 10)
+
+    def test_connection_errors_are_retried_and_open_the_circuit(self):
+        service_fn = MagicMock(side_effect=requests.exceptions.ConnectionError("reset"))
+        service_fn._op_name = "GetContactListCollection"
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                http.request("lists", service_fn)
+        self.assertEqual(service_fn.call_count, 10)
+        with self.assertRaises(faults.CircuitOpenError):
+            http.request("lists", service_fn)
+
+    def test_per_entity_fault_is_not_retried(self):
+        service_fn = MagicMock(side_effect=Fault("InvalidMessageID"))
+        with self.assertRaises(Fault):
+            http.request("message_opens", service_fn, MsgID=1)
+        self.assertEqual(service_fn.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from tap_listrak import http
+from tap_listrak.hedging import Hedger, LatencyTracker
+
+
+def warmed_hedger(endpoint, latency, samples=20, **kwargs):
+    hedger = Hedger(min_samples=samples, **kwargs)
+    for _ in range(samples):
+        hedger.latency.record(endpoint, latency)
+    hedger.calls = samples
+    return hedger
+
+
+class TestLatencyTracker(unittest.TestCase):
+
+    def test_percentile_requires_min_samples(self):
+        tracker = LatencyTracker(min_samples=3)
+        tracker.record("op", 1.0)
+        tracker.record("op", 2.0)
+        self.assertIsNone(tracker.percentile("op"))
+        tracker.record("op", 3.0)
+        self.assertEqual(tracker.percentile("op"), 3.0)
+
+    def test_percentile_is_per_endpoint(self):
+        tracker = LatencyTracker(min_samples=1)
+        for i in range(100):
+            tracker.record("a", i / 100)
+        tracker.record("b", 5.0)
+        self.assertEqual(tracker.percentile("a"), 0.95)
+        self.assertEqual(tracker.percentile("b"), 5.0)
+
+
+class TestHedger(unittest.TestCase):
+
+    def test_no_hedge_before_latency_is_known(self):
+        hedger = Hedger(min_samples=5)
+        service_fn = MagicMock(return_value="ok")
+        self.assertEqual(hedger.call("op", service_fn, {"Page": 1}), "ok")
+        service_fn.assert_called_once_with(Page=1)
+        self.assertEqual(hedger.hedges, 0)
+
+    def test_slow_call_is_hedged_and_fast_copy_wins(self):
+        hedger = warmed_hedger("op", 0.01, budget=1.0)
+        release = threading.Event()
+        calls = []
+
+        def service_fn(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                release.wait(2)
+                return "slow"
+            return "fast"
+
+        started = time.monotonic()
+        self.assertEqual(hedger.call("op", service_fn, {"Page": 3}), "fast")
+        self.assertLess(time.monotonic() - started, 1)
+        release.set()
+        self.assertEqual(calls, [{"Page": 3}, {"Page": 3}])
+        self.assertEqual(hedger.hedges, 1)
+        hedger.shutdown()
+
+    def test_budget_caps_hedges(self):
+        hedger = warmed_hedger("op", 0.001, budget=0.0)
+        service_fn = MagicMock(side_effect=lambda **kw: time.sleep(0.02) or "ok")
+        self.assertEqual(hedger.call("op", service_fn, {}), "ok")
+        self.assertEqual(service_fn.call_count, 1)
+        self.assertEqual(hedger.hedges, 0)
+        hedger.shutdown()
+
+    def test_error_from_one_copy_falls_back_to_other(self):
+        hedger = warmed_hedger("op", 0.01, budget=1.0)
+        calls = []
+
+        def service_fn(**kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                return "primary"
+            raise ValueError("hedge failed")
+
+        self.assertEqual(hedger.call("op", service_fn, {}), "primary")
+        hedger.shutdown()
+
+    def test_pool_does_not_limit_concurrent_calls(self):
+        hedger = warmed_hedger("op", 10.0, concurrency=8)
+        self.addCleanup(hedger.shutdown)
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(8, timeout=5)
+
+        def service_fn(**kwargs):
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            barrier.wait()
+            with lock:
+                in_flight.pop()
+            return "ok"
+
+        threads = [threading.Thread(target=hedger.call, args=("op", service_fn, {}))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(max(peak), 8)
+        self.assertEqual(hedger.hedges, 0)
+
+    def test_both_copies_failing_raises(self):
+        hedger = warmed_hedger("op", 0.01, budget=1.0)
+
+        def service_fn(**kwargs):
+            time.sleep(0.02)
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            hedger.call("op", service_fn, {})
+        hedger.shutdown()
+
+
+class TestRequestHedging(unittest.TestCase):
+
+    def tearDown(self):
+        http.configure_hedging({})
+
+    def test_configure_hedging(self):
+        self.assertIsNone(http.configure_hedging({}))
+        hedger = http.configure_hedging({"hedge_requests": True, "hedge_budget": "0.1"})
+        self.assertIs(http.HEDGER, hedger)
+        self.assertEqual(hedger.budget, 0.1)
+        hedger = http.configure_hedging({"hedge_requests": True, "message_workers": 8})
+        self.assertEqual(hedger._executor._max_workers, 16)
+
+    @patch("tap_listrak.http.metrics.http_request_timer")
+    def test_request_routes_through_hedger(self, _):
+        hedger = http.configure_hedging({"hedge_requests": True})
+        service_fn = MagicMock(return_value="ok")
+        service_fn._op_name = "ReportRangeMessageContactClick"
+        self.assertEqual(http.request("message_clicks", service_fn, Page=1), "ok")
+        self.assertEqual(hedger.calls, 1)
+        self.assertIsNone(hedger.latency.percentile("ReportRangeMessageContactClick"))
+
+
+if __name__ == '__main__':
+    unittest.main()
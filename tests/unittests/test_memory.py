@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import patch
+from tap_listrak import memory
+
+
+class TestMemoryTracker(unittest.TestCase):
+
+    def test_current_rss_is_positive(self):
+        self.assertGreater(memory.current_rss(), 0)
+
+    @patch("tap_listrak.memory.current_rss", return_value=10 * 1024 * 1024)
+    def test_check_records_peak_per_stream(self, _):
+        tracker = memory.MemoryTracker()
+        tracker.check("message_sends")
+        self.assertEqual(tracker.peaks, {"message_sends": 10 * 1024 * 1024})
+
+    @patch("tap_listrak.memory.gc.collect")
+    @patch("tap_listrak.memory.current_rss", return_value=200 * 1024 * 1024)
+    def test_check_raises_above_ceiling(self, _, mock_collect):
+        tracker = memory.MemoryTracker(max_rss_mb=100)
+        with self.assertRaises(memory.MemoryCeilingExceeded) as cm:
+            tracker.check("message_sends")
+        self.assertIn("message_sends", str(cm.exception))
+        mock_collect.assert_called_once()
+
+    @patch("tap_listrak.memory.gc.collect")
+    @patch("tap_listrak.memory.current_rss", side_effect=[150 * 1024 * 1024, 50 * 1024 * 1024])
+    def test_check_recovers_after_collection(self, _, mock_collect):
+        tracker = memory.MemoryTracker(max_rss_mb="100")
+        self.assertEqual(tracker.check("message_sends"), 50 * 1024 * 1024)
+        mock_collect.assert_called_once()
+
+    @patch("tap_listrak.memory.metrics.log")
+    def test_log_metrics_emits_gauge_per_stream(self, mock_log):
+        tracker = memory.MemoryTracker()
+        tracker.peaks = {"lists": 1, "messages": 2}
+        tracker.log_metrics()
+        points = [c.args[1] for c in mock_log.call_args_list]
+        self.assertEqual([(p.metric, p.value, p.tags) for p in points],
+                         [("peak_rss_bytes", 1, {"stream": "lists"}),
+                          ("peak_rss_bytes", 2, {"stream": "messages"})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from tap_listrak import streams
+from tap_listrak.context import Context
+from tap_listrak.pagination import PageSizes, REQUIRED_VERIFICATIONS
+
+
+def walk(page_sizes, endpoint, page_lens):
+    """Feeds the page lengths of one paginated walk to `page_sizes` the way
+    the sync loops do, returning how many requests were made."""
+    prev_len = None
+    for requests, page_len in enumerate(page_lens, 1):
+        page_sizes.observe(endpoint, prev_len, page_len)
+        if not page_len or page_sizes.is_last_page(endpoint, page_len):
+            return requests
+        prev_len = page_len
+    return len(page_lens)
+
+
+class TestPageSizes(unittest.TestCase):
+
+    def test_configured_size_is_trusted(self):
+        sizes = PageSizes({}, {"op": 100})
+        self.assertFalse(sizes.is_last_page("op", 100))
+        self.assertTrue(sizes.is_last_page("op", 99))
+
+    def test_unknown_size_never_stops_early(self):
+        sizes = PageSizes({})
+        self.assertFalse(sizes.is_last_page("op", 1))
+
+    def test_learns_size_from_full_page(self):
+        learned = {}
+        sizes = PageSizes(learned)
+        self.assertEqual(walk(sizes, "op", [100, 100, 30, 0]), 4)
+        self.assertEqual(learned, {"op": {"size": 100, "verified": 1}})
+
+    def test_learned_size_is_verified_before_use(self):
+        sizes = PageSizes({"op": {"size": 100, "verified": 0}})
+        for _ in range(REQUIRED_VERIFICATIONS):
+            self.assertEqual(walk(sizes, "op", [5, 0]), 2)
+        self.assertEqual(walk(sizes, "op", [5, 0]), 1)
+
+    def test_verify_mode_always_requests_trailing_page(self):
+        sizes = PageSizes({"op": {"size": 100, "verified": 10}}, verify=True)
+        self.assertEqual(walk(sizes, "op", [5, 0]), 2)
+
+    def test_data_after_short_page_disables_early_stop(self):
+        learned = {"op": {"size": 100, "verified": 0}}
+        sizes = PageSizes(learned)
+        self.assertEqual(walk(sizes, "op", [50, 50, 0]), 3)
+        self.assertEqual(learned["op"]["size"], 0)
+        walk(sizes, "op", [100, 100, 0])
+        self.assertEqual(learned["op"]["size"], 0)
+
+    def test_context_persists_learned_sizes_in_state(self):
+        state = {}
+        ctx = Context({"start_date": "2026-01-01T00:00:00Z"}, state)
+        ctx.observe_page("op", 100, 1)
+        self.assertEqual(state["page_sizes"], {"op": {"size": 100, "verified": 0}})
+
+
+class TestShortPageEndsPagination(unittest.TestCase):
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request')
+    @patch('tap_listrak.streams.write_records')
+    def test_sub_stream_stops_on_short_page(self, mock_write, mock_request, _):
+        ctx = MagicMock(spec=Context)
+        ctx.config = {}
+        ctx.now = MagicMock()
+        ctx.client = MagicMock()
+        ctx.get_deferred.return_value = {}
+        ctx.get_projection.return_value = None
+        ctx.get_costs.return_value = {}
+        ctx.should_stop.return_value = False
+        ctx.get_synced_to.return_value = {}
+        page_sizes = PageSizes({}, {"ReportRangeMessageContactClick": 2})
+        ctx.is_last_page.side_effect = page_sizes.is_last_page
+        mock_request.side_effect = [[{'ClickID': 1}, {'ClickID': 2}], [{'ClickID': 3}]]
+
+        streams.sync_message_sub_stream(ctx, [{'MsgID': 'M1'}], streams.MESSAGE_SUB_STREAMS[0])
+
+        self.assertEqual([c.kwargs['Page'] for c in mock_request.call_args_list], [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import pendulum
+from tap_listrak import planning
+from tap_listrak.context import Context
+
+
+def make_ctx(config=None, state=None, selected=None):
+    config = dict({"start_date": "2026-01-01T00:00:00Z"}, **(config or {}))
+    ctx = Context(config, state if state is not None else {})
+    ctx.client = MagicMock()
+    ctx.now = pendulum.parse("2026-06-01T00:00:00Z")
+    ctx.selected_stream_ids = set(selected or ["lists", "messages", "message_clicks",
+                                               "message_sends"])
+    return ctx
+
+
+MESSAGES = [
+    {"MsgID": 1, "ListID": 10, "SendDate": "2026-02-01T00:00:00Z",
+     "ClickCount": 12000, "DeliverCount": 4000},
+    {"MsgID": 2, "ListID": 10, "SendDate": "2026-03-01T00:00:00Z",
+     "ClickCount": 0, "DeliverCount": 100},
+]
+
+
+def fake_request(tap_stream_id, service_fn, **kwargs):
+    if tap_stream_id == "lists":
+        return [{"ListID": 10, "ListName": "Newsletter"}]
+    if tap_stream_id == "messages":
+        return {"ReportListMessageActivityResult": {"WSMessageActivity": MESSAGES}}
+    raise AssertionError("Unexpected request for " + tap_stream_id)
+
+
+@patch("tap_listrak.planning.request", side_effect=fake_request)
+@patch("tap_listrak.streams.request", side_effect=fake_request)
+class TestPlan(unittest.TestCase):
+
+    def test_only_lists_and_message_activity_are_requested(self, streams_request, planning_request):
+        planning.plan(make_ctx())
+        self.assertEqual(planning_request.call_count, 1)
+        self.assertEqual(streams_request.call_count, 1)
+
+    def test_requests_estimated_from_counts_and_page_size(self, *_):
+        ctx = make_ctx({"page_sizes": {"ReportRangeMessageContactClick": 5000}})
+        result = planning.plan(ctx)
+
+        clicks = result["streams"]["message_clicks"]
+        # 12000 clicks are two full pages and a short one; no clicks is one
+        # empty page
+        self.assertEqual(clicks["requests"], 4)
+        self.assertEqual(clicks["records"], 12000)
+        self.assertGreater(clicks["bytes"], 0)
+        self.assertEqual(result["streams"]["messages"]["records"], 2)
+        self.assertEqual(result["streams"]["lists"]["requests"], 1)
+        self.assertEqual(result["total"]["requests"],
+                         sum(s["requests"] for s in result["streams"].values()))
+
+    def test_history_sets_latency_and_unknown_page_size(self, *_):
+        state = {"bookmarks": {"message_sends": {"costs": {"1": [8, 16.0]}}}}
+        ctx = make_ctx(state=state)
+        sends = planning.plan(ctx)["streams"]["message_sends"]
+
+        # MsgID 1 took 8 pages last run, MsgID 2 has no history
+        self.assertEqual(sends["requests"], 9 + 2)
+        self.assertEqual(sends["seconds"], 22.0)
+
+    def test_workers_divide_time_but_not_below_longest_message(self, *_):
+        state = {"bookmarks": {"message_sends": {"costs": {"1": [8, 16.0]}}}}
+        ctx = make_ctx({"message_workers": 4}, state)
+        sends = planning.plan(ctx)["streams"]["message_sends"]
+        self.assertEqual(sends["seconds"], 18.0)
+
+    def test_unselected_streams_are_not_planned(self, *_):
+        result = planning.plan(make_ctx(selected=["lists"]))
+        self.assertEqual(list(result["streams"]), ["lists"])
+
+
+class TestSchemaRecordBytes(unittest.TestCase):
+
+    def test_projection_shrinks_estimate(self):
+        schema = {"properties": {"MsgID": {"type": ["integer"]},
+                                 "ClickDate": {"type": ["null", "string"], "format": "date-time"},
+                                 "LinkUrl": {"type": ["null", "string"]}}}
+        full = planning.schema_record_bytes(schema)
+        projected = planning.schema_record_bytes(schema, frozenset(["MsgID"]))
+        self.assertEqual(projected, 2 + len("MsgID") + 4 + 8)
+        self.assertGreater(full, projected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import pstats
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from tap_listrak import profiling, run_sync
+from tap_listrak.http import request
+
+
+class TestSampler(unittest.TestCase):
+
+    def tearDown(self):
+        profiling.set_current(None, None)
+
+    def test_sample_is_tagged_with_current_stream_and_endpoint(self):
+        """Each collapsed stack starts with the stream and endpoint in flight."""
+        profiling.set_current("message_clicks", "ReportRangeMessageContactClick")
+        sampler = profiling.Sampler(threading.get_ident())
+        sampler.sample()
+
+        (stack, count), = sampler.counts.items()
+        frames = stack.split(";")
+        self.assertEqual(frames[0], "stream=message_clicks")
+        self.assertEqual(frames[1], "endpoint=ReportRangeMessageContactClick")
+        self.assertIn(__name__ + ":test_sample_is_tagged_with_current_stream_and_endpoint", frames)
+        self.assertEqual(count, 1)
+
+    def test_sample_without_current_request(self):
+        """Samples taken outside a request use placeholder tags."""
+        sampler = profiling.Sampler(threading.get_ident())
+        sampler.sample()
+
+        stack = next(iter(sampler.counts))
+        self.assertTrue(stack.startswith("stream=-;endpoint=-;"))
+
+    def test_write_collapsed_format(self):
+        """The output has one `stack count` line per distinct stack."""
+        sampler = profiling.Sampler(threading.get_ident())
+        sampler.counts["a;b"] = 3
+        sampler.counts["a;c"] = 1
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.collapsed")
+            sampler.write(path)
+            with open(path) as f:
+                self.assertEqual(f.read(), "a;b 3\na;c 1\n")
+
+
+class TestProfile(unittest.TestCase):
+
+    def test_profile_writes_pstats_and_collapsed_stacks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with profiling.profile(tmp, interval=0.001):
+                time.sleep(0.05)
+
+            stats = pstats.Stats(os.path.join(tmp, "sync.pstats"))
+            self.assertTrue(stats.stats)
+            with open(os.path.join(tmp, "sync.collapsed")) as f:
+                lines = f.read().splitlines()
+            self.assertTrue(lines)
+            self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+
+    @patch("tap_listrak.http.metrics.http_request_timer")
+    def test_request_sets_current_endpoint(self, _):
+        service_fn = MagicMock(return_value="ok")
+        service_fn._op_name = "GetContactListCollection"
+        request("lists", service_fn)
+        self.assertEqual(profiling.current(),
+                         {"stream": "lists", "endpoint": "GetContactListCollection"})
+        profiling.set_current(None, None)
+
+    def test_worker_threads_are_profiled_and_sampled(self):
+        def busy_worker():
+            profiling.set_current("message_opens", "ReportRangeMessageContactOpen")
+            deadline = time.monotonic() + 0.1
+            while time.monotonic() < deadline:
+                sum(i * i for i in range(1000))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with profiling.profile(tmp, interval=0.001):
+                profiling.set_current("lists", "GetContactListCollection")
+                worker = threading.Thread(target=busy_worker)
+                worker.start()
+                worker.join()
+
+            stats = pstats.Stats(os.path.join(tmp, "sync.pstats"))
+            if profiling.PER_THREAD_PROFILES:
+                self.assertIn("busy_worker", {func[2] for func in stats.stats})
+            with open(os.path.join(tmp, "sync.collapsed")) as f:
+                stacks = f.read().splitlines()
+        worker_stacks = [s for s in stacks if "busy_worker" in s]
+        self.assertTrue(worker_stacks)
+        self.assertTrue(all(s.startswith("stream=message_opens;") for s in worker_stacks))
+        self.assertEqual(profiling.CURRENT, {})
+
+    def test_thread_pool_runs_under_profile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with profiling.profile(tmp, interval=0.001):
+                with ThreadPoolExecutor(max_workers=4) as pool:
+                    futures = [pool.submit(sum, range(i * 1000)) for i in range(8)]
+                    results = [future.result(timeout=10) for future in futures]
+        self.assertEqual(results, [sum(range(i * 1000)) for i in range(8)])
+
+    def test_thread_whose_profiler_cannot_start_still_runs(self):
+        profiles = profiling.ThreadProfiles()
+        with patch("tap_listrak.profiling.cProfile.Profile") as mock_profile:
+            mock_profile.return_value.enable.side_effect = ValueError(
+                "Another profiling tool is already active")
+            profiles._profile_thread(None, "call", None)
+        self.assertEqual(len(profiles.profilers), 1)
+
+
+class TestRunSync(unittest.TestCase):
+
+    @patch("tap_listrak.profiling.profile")
+    @patch("tap_listrak.sync")
+    def test_run_sync_without_profile(self, mock_sync, mock_profile):
+        ctx = MagicMock()
+        ctx.config = {}
+        run_sync(ctx)
+        mock_sync.assert_called_once_with(ctx)
+        mock_profile.assert_not_called()
+
+    @patch("tap_listrak.profiling.profile")
+    @patch("tap_listrak.sync")
+    def test_run_sync_with_profile_dir(self, mock_sync, mock_profile):
+        ctx = MagicMock()
+        ctx.config = {"profile_dir": "/tmp/prof", "profile_interval": "0.01"}
+        run_sync(ctx)
+        mock_sync.assert_called_once_with(ctx)
+        mock_profile.assert_called_once_with("/tmp/prof", 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
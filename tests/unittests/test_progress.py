@@ -0,0 +1,76 @@
+import logging
+import unittest
+from unittest.mock import MagicMock, patch
+from tap_listrak import progress
+from tap_listrak.http import request
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressReporter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.reporter = progress.ProgressReporter(interval=10, clock=self.clock)
+
+    def test_reports_at_most_once_per_interval(self):
+        with patch.object(progress.LOGGER, "info") as mock_info:
+            for _ in range(100):
+                self.reporter.request_done("message_opens", {"MsgID": 5, "Page": 1})
+                self.reporter.records_written("message_opens", 50)
+            mock_info.assert_not_called()
+
+            self.clock.now = 10
+            self.reporter.request_done("message_opens", {"MsgID": 6, "Page": 1})
+            self.reporter.request_done("message_opens", {"MsgID": 6, "Page": 2})
+
+        mock_info.assert_called_once()
+        line = mock_info.call_args.args[1]
+        self.assertIn("message_opens: 5000 records (500.0/s), 101 requests (10.10/s)", line)
+        self.assertIn("at MsgID 6", line)
+
+    def test_idle_streams_are_not_reported(self):
+        self.reporter.records_written("lists", 3)
+        self.clock.now = 10
+        self.reporter.maybe_report()
+        with patch.object(progress.LOGGER, "info") as mock_info:
+            self.reporter.records_written("messages", 1)
+            self.clock.now = 20
+            self.reporter.maybe_report()
+        line = mock_info.call_args.args[1]
+        self.assertTrue(line.startswith("messages:"))
+
+    def test_eta_from_completed_units(self):
+        self.reporter.units_started("message_sends", 10)
+        self.clock.now = 20
+        for _ in range(4):
+            self.reporter.unit_done("message_sends")
+        with patch.object(progress.LOGGER, "info") as mock_info:
+            self.reporter.records_written("message_sends", 1)
+        line = mock_info.call_args.args[1]
+        self.assertIn("4/10 done", line)
+        self.assertIn("ETA 0:00:30", line)
+
+
+class TestRequestLogging(unittest.TestCase):
+
+    @patch("tap_listrak.http.metrics.http_request_timer")
+    def test_pages_are_logged_at_debug_only(self, _):
+        service_fn = MagicMock(return_value=[])
+        service_fn._op_name = "ReportRangeMessageContactOpen"
+        reporter = progress.REPORTER
+        with patch.object(reporter, "request_done") as mock_done, \
+             self.assertLogs(progress.LOGGER, level=logging.DEBUG) as logs:
+            request("message_opens", service_fn, MsgID=1, Page=3)
+        mock_done.assert_called_once_with("message_opens", {"MsgID": 1, "Page": 3})
+        self.assertTrue(all(r.levelno == logging.DEBUG for r in logs.records))
+
+
+if __name__ == '__main__':
+    unittest.main()
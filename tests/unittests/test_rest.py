@@ -0,0 +1,167 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlparse
+import pendulum
+from zeep.exceptions import TransportError
+from tap_listrak import faults, http, pagination, rest
+from tap_listrak.rest import RestEngine
+
+CONTACTS = [{"contactId": str(i), "emailAddress": "c{}@example.com".format(i)} for i in range(5)]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """A local stand-in for the token endpoint and a cursor-paged resource."""
+    requests = []
+    tokens_issued = 0
+
+    def log_message(self, *args): # pylint: disable=arguments-differ
+        pass
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self): # pylint: disable=invalid-name
+        self.rfile.read(int(self.headers["Content-Length"]))
+        StandInHandler.tokens_issued += 1
+        self.reply(200, {"access_token": "token-1", "expires_in": 3600})
+
+    def do_GET(self): # pylint: disable=invalid-name
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        StandInHandler.requests.append((url.path, query))
+        if self.headers["Authorization"] != "Bearer token-1":
+            self.reply(401, {"message": "Unauthorized"})
+        elif url.path == "/List/7/Contact":
+            start = int(query.get("cursor", 0))
+            end = start + int(query["count"])
+            self.reply(200, {"status": 200, "data": CONTACTS[start:end],
+                             "nextPageCursor": str(end) if end < len(CONTACTS) else None})
+        else:
+            self.reply(404, {"message": "Not found"})
+
+
+class TestRestEngine(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = "http://127.0.0.1:{}".format(cls.server.server_port)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StandInHandler.requests = []
+        StandInHandler.tokens_issued = 0
+        self.config = {"rest_base_url": self.base_url, "rest_token_url": self.base_url + "/token",
+                       "rest_client_id": "id", "rest_client_secret": "secret",
+                       "rest_page_size": 2, "engines": {"subscribed_contacts": "rest"}}
+        http.configure_engines(self.config)
+        self.addCleanup(http.configure_engines, {})
+        self.service_fn = MagicMock()
+        self.service_fn._op_name = "ReportRangeSubscribedContacts"
+
+    def fetch(self, page):
+        with patch("tap_listrak.http.metrics.http_request_timer"):
+            return http.request("subscribed_contacts", self.service_fn, ListID=7,
+                                StartDate=pendulum.datetime(2026, 1, 1), Page=page)
+
+    def test_pages_are_walked_by_cursor(self):
+        pages = [self.fetch(page) for page in (1, 2, 3, 4)]
+
+        self.assertEqual([len(p) for p in pages], [2, 2, 1, 0])
+        self.assertEqual(pages[0][0], {"ContactID": "0", "EmailAddress": "c0@example.com"})
+        self.service_fn.assert_not_called()
+        # The end of the results is known from the cursor, so the fourth page
+        # needs no request
+        self.assertEqual(len(StandInHandler.requests), 3)
+        path, query = StandInHandler.requests[1]
+        self.assertEqual(path, "/List/7/Contact")
+        self.assertEqual(query, {"startDate": "2026-01-01T00:00:00+00:00", "count": "2",
+                                 "cursor": "2"})
+        self.assertEqual(StandInHandler.tokens_issued, 1)
+
+    def test_resumed_page_walks_earlier_pages(self):
+        self.assertEqual([r["ContactID"] for r in self.fetch(3)], ["4"])
+        self.assertEqual(len(StandInHandler.requests), 3)
+
+    def test_finished_walks_keep_only_the_end(self):
+        engine = http.ENGINES["subscribed_contacts"]
+        for page in (1, 2, 3):
+            self.fetch(page)
+        cursors, = engine.cursors.values()
+        self.assertEqual(cursors, {1: None, 4: False})
+
+        self.assertEqual(self.fetch(4), [])
+        self.assertEqual(len(StandInHandler.requests), 3)
+        # A page before the end is walked to again
+        self.assertEqual([r["ContactID"] for r in self.fetch(2)], ["2", "3"])
+
+    def test_walks_are_bounded(self):
+        engine = http.ENGINES["subscribed_contacts"]
+        with patch.object(rest, "MAX_CURSOR_WALKS", 2):
+            for list_id in (1, 2, 3):
+                with patch.object(engine, "fetch_page", return_value=([{}], "next")):
+                    engine.call("ReportRangeSubscribedContacts", {"ListID": list_id, "Page": 1})
+        self.assertEqual([dict(key[1])["ListID"] for key in engine.cursors], ["2", "3"])
+
+    def test_expired_token_is_refreshed(self):
+        engine = http.ENGINES["subscribed_contacts"]
+        engine.access_token()
+        engine.token = "revoked"
+        self.fetch(1)
+        self.assertEqual(StandInHandler.tokens_issued, 2)
+
+    def test_cursor_paged_endpoints_never_stop_on_short_pages(self):
+        self.fetch(1)
+        self.assertIn("ReportRangeSubscribedContacts", pagination.CURSOR_PAGED)
+        page_sizes = pagination.PageSizes({}, {"ReportRangeSubscribedContacts": 5000})
+        self.assertFalse(page_sizes.is_last_page("ReportRangeSubscribedContacts", 1))
+
+    def test_http_errors_are_transport_errors(self):
+        engine = RestEngine(self.config)
+        with self.assertRaises(TransportError) as err:
+            engine.get("/Missing", {})
+        self.assertEqual(err.exception.status_code, 404)
+        # A route that does not exist fails for every entity
+        self.assertEqual(faults.classify(err.exception), faults.PERMANENT)
+
+    def test_wrapped_responses_match_soap(self):
+        engine = RestEngine(self.config)
+        with patch.object(engine, "fetch_page", return_value=([], None)):
+            self.assertEqual(engine.call("ReportListMessageActivity", {"ListID": 7}),
+                             {"ReportListMessageActivityResult": None})
+
+
+class TestConfigureEngines(unittest.TestCase):
+
+    def tearDown(self):
+        http.configure_engines({})
+
+    def test_soap_is_default(self):
+        self.assertEqual(http.configure_engines({}), {})
+        self.assertEqual(http.configure_engines({"engines": {"lists": "soap"}}), {})
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            http.configure_engines({"engines": {"lists": "grpc"}})
+
+    def test_missing_route(self):
+        engine = http.configure_engines({"engines": {"message_opens": "rest"}})["message_opens"]
+        with self.assertRaises(ValueError):
+            engine.operation(None, "ReportRangeMessageContactOpen")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import threading
+import unittest
+from unittest.mock import patch
+from zeep.exceptions import Fault
+from tap_listrak import streams
+from tap_listrak.context import Context
+
+
+def make_ctx(costs=None):
+    ctx = Context({"start_date": "2026-01-01T00:00:00Z"}, {})
+    for entity_id, cost in (costs or {}).items():
+        ctx.record_cost("message_opens", entity_id, *cost)
+    return ctx
+
+
+class TestScheduleUnits(unittest.TestCase):
+
+    def test_units_are_ordered_longest_first(self):
+        ctx = make_ctx({"1": (2, 1.0), "2": (80, 40.0), "3": (10, 5.0)})
+        units = [streams.make_unit("message_opens", msg_id, None, None)
+                 for msg_id in ("new", "1", "2", "3")]
+
+        ordered = streams.schedule_units(ctx, units)
+
+        self.assertEqual([unit.entity_id for unit in ordered], ["2", "3", "1", "new"])
+
+    def test_units_run_in_given_order_on_one_worker(self):
+        ctx = make_ctx({"1": (2, 1.0), "2": (80, 40.0)})
+        order = []
+        units = [streams.make_unit("message_opens", msg_id, None,
+                                   lambda msg_id, cursor: order.append(msg_id), msg_id)
+                 for msg_id in ("1", "2")]
+
+        results = streams.run_units(ctx, units)
+
+        self.assertEqual(order, ["1", "2"])
+        self.assertEqual(results, [True] * 2)
+
+    def test_run_unit_records_pages_and_seconds(self):
+        ctx = make_ctx()
+
+        def sync_fn(cursor):
+            cursor.page += 3
+
+        streams.run_unit(ctx, streams.make_unit("message_opens", 7, None, sync_fn))
+
+        pages, seconds = ctx.get_costs("message_opens")["7"]
+        self.assertEqual(pages, 3)
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_failed_unit_keeps_previous_cost(self):
+        ctx = make_ctx({"7": (5, 9.0)})
+
+        def sync_fn(cursor):
+            raise Fault("Server was unable to process request")
+
+        with patch("time.sleep"):
+            streams.run_unit(ctx, streams.make_unit("message_opens", 7, "2026-01-01T00:00:00Z",
+                                                    sync_fn))
+        self.assertEqual(ctx.get_costs("message_opens")["7"], [5, 9.0])
+
+
+class TestRunUnitsOnWorkers(unittest.TestCase):
+
+    def test_results_follow_given_order(self):
+        ctx = make_ctx({"1": (1, 1.0), "2": (1, 2.0)})
+        threads = set()
+
+        def sync_fn(msg_id, cursor):
+            threads.add(threading.current_thread().name)
+            if msg_id == "1":
+                raise Fault("MsgID 1 not found")
+
+        units = [streams.make_unit("message_opens", msg_id, "2026-01-01T00:00:00Z",
+                                   sync_fn, msg_id)
+                 for msg_id in ("1", "2")]
+        results = streams.run_units(ctx, units, workers=2)
+
+        self.assertEqual(results, [False, True])
+        self.assertTrue(all(name.startswith("entity") for name in threads))
+        self.assertEqual(ctx.get_deferred("message_opens"), {"1": "2026-01-01T00:00:00Z"})
+
+    def test_units_are_submitted_longest_first(self):
+        ctx = make_ctx({"1": (2, 1.0), "2": (80, 40.0), "3": (10, 5.0)})
+        submitted = []
+
+        def submit(pool, fn, unit):
+            submitted.append(unit.entity_id)
+            return pool.submit(fn, unit)
+
+        units = [streams.make_unit("message_opens", msg_id, None, lambda cursor: None)
+                 for msg_id in ("1", "2", "3")]
+        with patch("tap_listrak.streams.scope.submit", side_effect=submit):
+            results = streams.run_units(ctx, units, workers=2)
+
+        self.assertEqual(submitted, ["2", "3", "1"])
+        self.assertEqual(results, [True] * 3)
+
+    def test_permanent_error_stops_the_pool(self):
+        ctx = make_ctx()
+
+        def sync_fn(cursor):
+            raise Fault("InvalidLogonAttempt")
+
+        units = [streams.make_unit("message_opens", i, None, sync_fn) for i in range(3)]
+        with self.assertRaises(Fault):
+            streams.run_units(ctx, units, workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
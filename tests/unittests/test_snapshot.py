@@ -0,0 +1,157 @@
+import os
+import tempfile
+import unittest
+import pendulum
+from unittest.mock import MagicMock, patch
+from tap_listrak import streams, sync
+from tap_listrak.context import Context
+from tap_listrak.snapshot import ParentSnapshot
+
+LISTS = [{'ListID': 1, 'ListName': 'Newsletter'}, {'ListID': 2, 'ListName': 'Offers'}]
+MESSAGES = [{'MsgID': 10, 'ListID': 1, 'SendDate': '2026-01-15T00:00:00Z', 'Subject': 'Sale',
+             'ClickCount': 3, 'OpenCount': 5, 'ReadCount': 1, 'RemoveCount': 0,
+             'DeliverCount': 100}]
+
+
+class TestParentSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "parents.db")
+        self.snapshot = ParentSnapshot(self.path, streams.PARENT_FIELDS)
+        self.addCleanup(self.snapshot.close)
+
+    def test_round_trip(self):
+        self.assertFalse(self.snapshot.has_parents())
+        self.snapshot.save_lists(LISTS)
+        self.snapshot.save_messages(1, MESSAGES)
+
+        reopened = ParentSnapshot(self.path, streams.PARENT_FIELDS)
+        self.addCleanup(reopened.close)
+        self.assertTrue(reopened.has_parents())
+        self.assertEqual(reopened.lists(), LISTS)
+        (msg,) = reopened.messages(1)
+        self.assertEqual(msg['MsgID'], 10)
+        self.assertEqual(msg['ClickCount'], 3)
+        self.assertNotIn('Subject', msg)
+        self.assertEqual(reopened.messages(2), [])
+
+    def test_unchanged_messages_are_not_rewritten(self):
+        self.snapshot.save_messages(1, MESSAGES)
+        before = self.snapshot.conn.total_changes
+        self.snapshot.save_messages(1, MESSAGES)
+        self.assertEqual(self.snapshot.conn.total_changes, before)
+
+        self.snapshot.save_messages(1, [dict(MESSAGES[0], ClickCount=4)])
+        self.assertEqual(self.snapshot.conn.total_changes, before + 1)
+        self.assertEqual(self.snapshot.messages(1)[0]['ClickCount'], 4)
+
+    def test_save_lists_replaces_removed_lists(self):
+        self.snapshot.save_lists(LISTS)
+        self.snapshot.save_lists(LISTS[:1])
+        self.assertEqual(self.snapshot.lists(), LISTS[:1])
+
+
+@patch('tap_listrak.schemas.load_and_write_schema')
+class TestSyncWithSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.config = {'start_date': '2026-01-01T00:00:00Z',
+                       'parent_snapshot_path': os.path.join(tmp.name, "parents.db")}
+
+    def make_ctx(self, **config):
+        ctx = Context(dict(self.config, **config), {})
+        ctx.client = MagicMock()
+        ctx.selected_stream_ids = {'lists', 'messages', 'message_clicks'}
+        ctx.write_state = MagicMock()
+        self.addCleanup(lambda: ctx.cache.get('parent_snapshot', MagicMock()).close())
+        return ctx
+
+    @staticmethod
+    def fake_request(tap_stream_id, service_fn, **kwargs):
+        if tap_stream_id == 'lists':
+            return LISTS
+        if tap_stream_id == 'messages':
+            messages = MESSAGES if kwargs['ListID'] == 1 else []
+            return {'ReportListMessageActivityResult': {'WSMessageActivity': messages}}
+        return []
+
+    @patch('tap_listrak.streams.write_records')
+    def test_children_sync_from_snapshot_without_parent_walk(self, mock_write, _):
+        with patch('tap_listrak.streams.request', side_effect=self.fake_request):
+            streams.sync_lists(self.make_ctx())
+
+        ctx = self.make_ctx(sync_from_parent_snapshot=True)
+        mock_write.reset_mock()
+        with patch('tap_listrak.streams.request', side_effect=self.fake_request) as mock_request, \
+             patch('tap_listrak.streams.sync_message_sub_stream') as mock_sub_stream:
+            streams.sync_lists(ctx)
+
+        mock_request.assert_not_called()
+        mock_write.assert_not_called()
+        parents = mock_sub_stream.call_args.args[1]
+        self.assertEqual([p['MsgID'] for p in parents], [10])
+        self.assertFalse(ctx.advances_bookmarks())
+
+    def test_messages_missing_from_snapshot_are_synced_from_old_bookmark(self, _):
+        new_message = dict(MESSAGES[0], MsgID=11, SendDate='2026-01-16T00:00:00Z')
+        click_starts = {}
+
+        def fake_request(tap_stream_id, service_fn, **kwargs):
+            if tap_stream_id == 'message_clicks':
+                click_starts.setdefault(kwargs['MsgID'], []).append(kwargs['StartDate'])
+                return []
+            if tap_stream_id == 'messages':
+                return {'ReportListMessageActivityResult': {
+                    'WSMessageActivity': messages if kwargs['ListID'] == 1 else []}}
+            return self.fake_request(tap_stream_id, service_fn, **kwargs)
+
+        state = {}
+        runs = [({}, '2026-01-20T00:00:00Z', MESSAGES),
+                ({'sync_from_parent_snapshot': True}, '2026-01-21T00:00:00Z', MESSAGES),
+                ({}, '2026-01-22T00:00:00Z', MESSAGES + [new_message])]
+        for config, now, messages in runs:
+            ctx = Context(dict(self.config, **config), state)
+            ctx.client = MagicMock()
+            ctx.selected_stream_ids = {'lists', 'messages', 'message_clicks'}
+            ctx.write_state = MagicMock()
+            ctx.now = pendulum.parse(now)
+            with patch('tap_listrak.streams.request', side_effect=fake_request), \
+                 patch('tap_listrak.streams.write_records'):
+                sync(ctx)
+            ctx.cache['parent_snapshot'].close()
+            if config:
+                # The snapshot run leaves the stream bookmark where it was
+                self.assertEqual(ctx.get_bookmark(['message_clicks', 'ClickDate']),
+                                 '2026-01-20T00:00:00+00:00')
+
+        self.assertEqual([start.isoformat() for start in click_starts[10]],
+                         ['2026-01-01T00:00:00+00:00', '2026-01-20T00:00:00+00:00',
+                          '2026-01-21T00:00:00+00:00'])
+        self.assertEqual([start.isoformat() for start in click_starts[11]],
+                         ['2026-01-20T00:00:00+00:00'])
+        self.assertEqual(ctx.get_bookmark(['message_clicks', 'ClickDate']),
+                         '2026-01-22T00:00:00+00:00')
+        self.assertEqual(ctx.get_synced_to('message_clicks'), {})
+
+    @patch('tap_listrak.streams.write_records')
+    def test_empty_snapshot_falls_back_to_parent_walk(self, mock_write, _):
+        ctx = self.make_ctx(sync_from_parent_snapshot=True)
+        with patch('tap_listrak.streams.request', side_effect=self.fake_request) as mock_request:
+            streams.sync_lists(ctx)
+        self.assertIn('lists', {c.args[0] for c in mock_request.call_args_list})
+        self.assertTrue(ctx.cache['parent_snapshot'].has_parents())
+
+    def test_snapshot_counts_never_skip_messages(self, _):
+        ctx = self.make_ctx(skip_unchanged_message_counts=True)
+        sub_stream = streams.MESSAGE_SUB_STREAMS[0]
+        self.assertTrue(streams.skips_unchanged_messages(ctx, sub_stream))
+        ctx.cache['parents_from_snapshot'] = True
+        self.assertFalse(streams.skips_unchanged_messages(ctx, sub_stream))
+
+
+if __name__ == '__main__':
+    unittest.main()
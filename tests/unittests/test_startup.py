@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Cumulative microseconds `import tap_listrak` may take. Generous, so that
+# only a regression such as zeep being imported eagerly again trips it.
+STARTUP_BUDGET_US = 1500000
+
+HEAVY_MODULES = ("zeep", "lxml", "tap_listrak.streams", "tap_listrak.http")
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable] + list(args), capture_output=True, text=True,
+                          check=True, cwd=os.path.dirname(os.path.dirname(os.path.dirname(
+                              os.path.abspath(__file__)))))
+
+
+def import_times(stderr):
+    """Parses `-X importtime` output into {module: cumulative microseconds}."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_is_within_budget_and_skips_heavy_modules(self):
+        times = import_times(run_python("-X", "importtime", "-c", "import tap_listrak").stderr)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, times)
+        self.assertLess(times["tap_listrak"], STARTUP_BUDGET_US)
+
+    def test_discovery_does_not_load_zeep(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as config:
+            json.dump({"start_date": "2026-01-01T00:00:00Z", "username": "u", "password": "p"},
+                      config)
+        self.addCleanup(os.remove, config.name)
+        code = ("import sys, tap_listrak\n"
+                "sys.argv = ['tap-listrak', '-c', {!r}, '-d']\n"
+                "tap_listrak.main()\n"
+                "sys.stderr.write(repr(sorted(set(sys.modules) & set({!r}))))\n"
+                ).format(config.name, HEAVY_MODULES)
+        result = run_python("-c", code)
+        self.assertTrue(json.loads(result.stdout)["streams"])
+        self.assertTrue(result.stderr.endswith("[]"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import signal
+import unittest
+from unittest.mock import MagicMock, patch
+import pendulum
+from tap_listrak import streams
+from tap_listrak.context import Context
+from tap_listrak.stopping import Stopper, stop_on_signals
+
+START = "2026-01-01T00:00:00Z"
+
+
+def make_ctx(config=None, state=None):
+    ctx = Context(dict({"start_date": START}, **(config or {})), state or {})
+    ctx.client = MagicMock()
+    ctx.catalog = MagicMock(streams=[])
+    ctx.now = pendulum.parse("2026-01-05T00:00:00Z")
+    return ctx
+
+
+class TestShouldStop(unittest.TestCase):
+
+    def test_runs_until_stopped(self):
+        ctx = make_ctx()
+        self.assertFalse(ctx.should_stop())
+        ctx.request_stop("received SIGTERM")
+        ctx.request_stop("received SIGINT")
+        self.assertTrue(ctx.should_stop())
+        self.assertEqual(ctx.stop_reason, "received SIGTERM")
+
+    def test_deadline(self):
+        with patch("tap_listrak.context.time.monotonic", return_value=100.0):
+            ctx = make_ctx({"max_runtime_seconds": 60})
+        with patch("tap_listrak.context.time.monotonic", return_value=159.0):
+            self.assertFalse(ctx.should_stop())
+        with patch("tap_listrak.context.time.monotonic", return_value=160.0):
+            self.assertTrue(ctx.should_stop())
+        self.assertIn("max_runtime_seconds", ctx.stop_reason)
+
+
+class TestStoppedUnits(unittest.TestCase):
+
+    def test_unit_ends_after_page_in_flight(self):
+        ctx = make_ctx()
+        msg = {"MsgID": 7}
+        sub_stream = streams.MESSAGE_SUB_STREAMS[0]
+
+        def page(*args, **kwargs): # pylint: disable=unused-argument
+            ctx.request_stop("received SIGTERM")
+            return [{"EmailAddress": "a@b.c"}]
+
+        unit = streams.make_unit(sub_stream.tap_stream_id, 7, pendulum.parse(START),
+                                 streams.sync_message_sub_stream_records,
+                                 ctx, msg, sub_stream, pendulum.parse(START), ctx.now)
+        with patch("tap_listrak.streams.request", side_effect=page) as mock_request, \
+             patch("tap_listrak.streams.write_records") as mock_write:
+            self.assertFalse(streams.run_unit(ctx, unit))
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(mock_write.call_count, 1)
+        self.assertEqual(unit.cursor.page, 2)
+        self.assertEqual(ctx.synced, {})
+        self.assertEqual(ctx.get_deferred(sub_stream.tap_stream_id), {})
+        self.assertEqual(ctx.retry_queue, [])
+
+    def test_units_are_not_started_once_stopping(self):
+        ctx = make_ctx()
+        ctx.request_stop("received SIGTERM")
+        sync_fn = MagicMock()
+        self.assertFalse(streams.run_unit(ctx, streams.make_unit("message_opens", 7, None,
+                                                                 sync_fn)))
+        sync_fn.assert_not_called()
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def test_synced_entities_resume_from_stopped_run(self):
+        ctx = make_ctx()
+        ctx.mark_synced("message_opens", 7)
+        ctx.request_stop("received SIGTERM")
+        ctx.checkpoint_synced()
+
+        synced_to = ctx.get_synced_to("message_opens")
+        self.assertEqual(synced_to, {"7": ctx.now.isoformat()})
+        start_dt = pendulum.parse(START)
+        self.assertEqual(streams.entity_start_date({}, 7, start_dt, synced_to), ctx.now)
+        self.assertEqual(streams.entity_start_date({}, 8, start_dt, synced_to), start_dt)
+        # A later failure widens the window again
+        self.assertEqual(streams.entity_start_date({"7": START}, 7, start_dt, synced_to),
+                         start_dt)
+
+    @patch("tap_listrak.streams.update_sub_stream_bookmarks")
+    def test_stopped_run_keeps_bookmarks(self, mock_update):
+        ctx = make_ctx()
+        ctx.write_state = MagicMock()
+        ctx.request_stop("received SIGTERM")
+        streams.finish_message_children(ctx, "2026-01-04T00:00:00Z")
+        mock_update.assert_not_called()
+        ctx.write_state.assert_called_once_with()
+
+    def test_completed_run_clears_synced_to(self):
+        ctx = make_ctx(state={"bookmarks": {"message_opens": {
+            "synced_to": {"7": "2026-01-03T00:00:00Z"}}}})
+        ctx.selected_stream_ids = {"message_opens"}
+        streams.update_sub_stream_bookmarks(ctx)
+        self.assertEqual(ctx.get_synced_to("message_opens"), {})
+        self.assertEqual(ctx.get_bookmark(["message_opens", "OpenDate"]), ctx.now.isoformat())
+
+
+class TestSignals(unittest.TestCase):
+
+    def test_sigterm_requests_stop(self):
+        request_stop = MagicMock()
+        handler = signal.getsignal(signal.SIGTERM)
+        with stop_on_signals(request_stop):
+            os.kill(os.getpid(), signal.SIGTERM)
+        request_stop.assert_called_once_with("received SIGTERM")
+        self.assertIs(signal.getsignal(signal.SIGTERM), handler)
+
+    def test_second_signal_interrupts(self):
+        with self.assertRaises(KeyboardInterrupt):
+            with stop_on_signals(MagicMock()):
+                os.kill(os.getpid(), signal.SIGINT)
+                os.kill(os.getpid(), signal.SIGINT)
+
+    def test_stopper_reaches_later_contexts(self):
+        stopper = Stopper()
+        first, second = make_ctx(), make_ctx()
+        stopper.add(first)
+        stopper.request_stop("received SIGTERM")
+        stopper.add(second)
+        self.assertTrue(first.should_stop())
+        self.assertEqual(second.stop_reason, "received SIGTERM")
@@ -1,10 +1,19 @@
+import gc
 import unittest
+import weakref
 import pendulum
 from unittest.mock import MagicMock, patch
+from zeep.exceptions import Fault
 from datetime import datetime, timezone
 from tap_listrak import streams
 from tap_listrak.context import Context
 
+
+def written_records(mock_write_records):
+    """Materializes the record iterators passed to a mocked write_records."""
+    return [(c.args[0], list(c.args[1])) for c in mock_write_records.call_args_list]
+
+
 class TestSyncFunctions(unittest.TestCase):
 
     def setUp(self):
@@ -16,6 +25,12 @@ class TestSyncFunctions(unittest.TestCase):
         self.ctx.client = MagicMock()  # Mock the client attribute
         self.ctx.client.service = MagicMock()  # Mock the service attribute
         self.ctx.config = {'start_date': '2026-01-01T00:00:00Z', 'interval_days': 365}
+        self.ctx.get_deferred.return_value = {}
+        self.ctx.is_last_page.return_value = False
+        self.ctx.get_projection.return_value = None
+        self.ctx.get_costs.return_value = {}
+        self.ctx.should_stop.return_value = False
+        self.ctx.get_synced_to.return_value = {}
         self.ctx.selected_stream_ids = []
 
     @patch('tap_listrak.schemas.load_and_write_schema')
@@ -40,17 +55,17 @@ class TestSyncFunctions(unittest.TestCase):
         # Assert that write_records was called with the correct data for both lists
         self.assertEqual(mock_write_records.call_count, 2)
 
+        written = written_records(mock_write_records)
+
         # Verify first list contacts
-        mock_write_records.assert_any_call(
-            streams.IDS.SUBSCRIBED_CONTACTS,
-            [{'ContactID': '123', 'Email': 'test@example.com', 'ListID': '1'}]
-        )
+        self.assertIn((streams.IDS.SUBSCRIBED_CONTACTS,
+                       [{'ContactID': '123', 'Email': 'test@example.com', 'ListID': '1'}]),
+                      written)
 
         # Verify second list contacts
-        mock_write_records.assert_any_call(
-            streams.IDS.SUBSCRIBED_CONTACTS,
-            [{'ContactID': '456', 'Email': 'test2@example.com', 'ListID': '2'}]
-        )
+        self.assertIn((streams.IDS.SUBSCRIBED_CONTACTS,
+                       [{'ContactID': '456', 'Email': 'test2@example.com', 'ListID': '2'}]),
+                      written)
 
         # Assert that bookmarks and state were updated
         self.ctx.set_bookmark.assert_called_with(streams.BOOK.SUBSCRIBED_CONTACTS, self.ctx.now)
@@ -143,15 +158,15 @@ class TestSyncFunctions(unittest.TestCase):
         # Assert that write_records was called with the correct data
         self.assertEqual(mock_write_records.call_count, 2)
 
-        mock_write_records.assert_any_call(
-            streams.IDS.MESSAGE_CLICKS,
-            [{'ClickID': '1', 'ClickDate': '2026-01-16T00:00:00Z', 'MsgID': '1'}]
-        )
+        written = written_records(mock_write_records)
 
-        mock_write_records.assert_any_call(
-            streams.IDS.MESSAGE_CLICKS,
-            [{'ClickID': '2', 'ClickDate': '2026-01-21T00:00:00Z', 'MsgID': '2'}]
-        )
+        self.assertIn((streams.IDS.MESSAGE_CLICKS,
+                       [{'ClickID': '1', 'ClickDate': '2026-01-16T00:00:00Z', 'MsgID': '1'}]),
+                      written)
+
+        self.assertIn((streams.IDS.MESSAGE_CLICKS,
+                       [{'ClickID': '2', 'ClickDate': '2026-01-21T00:00:00Z', 'MsgID': '2'}]),
+                      written)
 
     @patch('tap_listrak.streams.sync_message_sub_stream')
     def test_sync_sub_streams(self, mock_sync_message_sub_stream):
@@ -198,9 +213,10 @@ class TestSyncFunctions(unittest.TestCase):
         self.assertEqual(mock_request.call_count, 2)
 
         # Assert that write_records was called with the correct data
-        mock_write_records.assert_called_once_with(
-            streams.IDS.MESSAGE_SENDS,
-            [{'RecipientID': '1', 'Email': 'user@example.com', 'MsgID': '1'}]
+        self.assertEqual(
+            written_records(mock_write_records),
+            [(streams.IDS.MESSAGE_SENDS,
+              [{'RecipientID': '1', 'Email': 'user@example.com', 'MsgID': '1'}])]
         )
 
     @patch('tap_listrak.schemas.load_and_write_schema')
@@ -441,10 +457,16 @@ class TestSyncFunctions(unittest.TestCase):
         lists = [{'ListID': '1', 'Name': 'Test List'}]
         streams.sync_messages(self.ctx, lists)
 
-        # Assert that child sync functions were called
-        messages = [{'MsgID': '1', 'SendDate': '2026-01-15T00:00:00Z'}]
-        mock_sync_subs.assert_called_once_with(self.ctx, messages)
-        mock_sync_sends.assert_called_once_with(self.ctx, messages)
+        # Assert that child sync functions were called with slim parent
+        # messages
+        mock_sync_subs.assert_called_once()
+        mock_sync_sends.assert_called_once()
+        for mock_sync in (mock_sync_subs, mock_sync_sends):
+            ctx, parents = mock_sync.call_args.args
+            self.assertIs(ctx, self.ctx)
+            self.assertEqual([(p['MsgID'], p['SendDate']) for p in parents],
+                             [('1', '2026-01-15T00:00:00Z')])
+            self.assertTrue(all(isinstance(p, streams.ParentMessage) for p in parents))
 
     @patch('tap_listrak.schemas.load_and_write_schema')
     @patch('tap_listrak.streams.request')
@@ -465,6 +487,349 @@ class TestSyncFunctions(unittest.TestCase):
         # Assert schema was loaded for message_opens
         mock_load_schema.assert_called_with(streams.IDS.MESSAGE_OPENS)
 
+class TestRecordPipeline(unittest.TestCase):
+    """Records flow from response to output one at a time."""
+
+    @patch('tap_listrak.streams.singer.write_record')
+    def test_write_records_consumes_iterator(self, mock_write_record):
+        records = (r for r in [{'id': 1}, {'id': 2}])
+        streams.write_records('message_clicks', records)
+        self.assertEqual(mock_write_record.call_count, 2)
+        mock_write_record.assert_called_with('message_clicks', {'id': 2})
+
+    def test_pipeline_is_lazy(self):
+        """No record is transformed before the writer asks for it."""
+        seen = []
+
+        def page():
+            for i in range(3):
+                seen.append(i)
+                yield {'ClickDate': datetime(2026, 1, i + 1)}
+
+        records = streams.add_msg_id({'MsgID': 7}, streams.transform_records(page()))
+        self.assertEqual(seen, [])
+        first = next(records)
+        self.assertEqual(seen, [0])
+        self.assertEqual(first, {'ClickDate': '2026-01-01T00:00:00.000000Z', 'MsgID': 7})
+
+    def test_transform_records_drops_unselected_fields(self):
+        records = [{'EmailAddress': 'a@b.com', 'ClickDate': datetime(2026, 1, 1), 'Url': 'x'}]
+        self.assertEqual(list(streams.transform_records(records, frozenset(['EmailAddress']))),
+                         [{'EmailAddress': 'a@b.com'}])
+
+    def test_project_records_leaves_parents_intact(self):
+        messages = [{'MsgID': 1, 'Subject': 's', 'SendDate': 'd'}]
+        self.assertIs(streams.project_records(messages, None), messages)
+        self.assertEqual(list(streams.project_records(messages, frozenset(['MsgID']))),
+                         [{'MsgID': 1}])
+        self.assertEqual(messages, [{'MsgID': 1, 'Subject': 's', 'SendDate': 'd'}])
+
+    def test_transform_dts_handles_nested_structures(self):
+        data = {'a': [{'b': datetime(2026, 1, 2, 3, 4, 5)}], 'c': None}
+        self.assertEqual(streams.transform_dts(data),
+                         {'a': [{'b': '2026-01-02T03:04:05.000000Z'}], 'c': None})
+
+
+class TestDeferredEntities(unittest.TestCase):
+    """Failures for a single message or list are deferred, not fatal."""
+
+    def setUp(self):
+        self.ctx = MagicMock(spec=Context)
+        self.ctx.update_start_date_bookmark.return_value = pendulum.parse("2026-01-10T00:00:00Z")
+        self.ctx.now = pendulum.parse("2026-02-02T00:00:00Z")
+        self.ctx.client = MagicMock()
+        self.ctx.config = {'start_date': '2026-01-01T00:00:00Z'}
+        self.ctx.get_deferred.return_value = {}
+        self.ctx.is_last_page.return_value = False
+        self.ctx.get_projection.return_value = None
+        self.ctx.get_costs.return_value = {}
+        self.ctx.should_stop.return_value = False
+        self.ctx.get_synced_to.return_value = {}
+        self.ctx.selected_stream_ids = ['message_sends']
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request')
+    @patch('tap_listrak.streams.write_records')
+    def test_failed_message_is_deferred_and_sync_continues(self, mock_write, mock_request, _):
+        mock_request.side_effect = [
+            Fault("Server was unable to process request"),  # M1 exhausted retries
+            [{'ClickID': '2'}],                              # M2 page 1
+            [],                                              # M2 page 2
+        ]
+        messages = [{'MsgID': 'M1'}, {'MsgID': 'M2'}]
+        streams.sync_message_sub_stream(self.ctx, messages, streams.MESSAGE_SUB_STREAMS[0])
+
+        self.ctx.defer.assert_called_once_with(
+            'message_clicks', 'M1', self.ctx.update_start_date_bookmark.return_value)
+        self.ctx.clear_deferred.assert_called_once_with('message_clicks', 'M2')
+        self.assertEqual(mock_write.call_count, 1)
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request')
+    def test_permanent_fault_is_raised(self, mock_request, _):
+        mock_request.side_effect = Fault("InvalidLogonAttempt")
+        with self.assertRaises(Fault):
+            streams.sync_message_sub_stream(self.ctx, [{'MsgID': 'M1'}], streams.MESSAGE_SUB_STREAMS[0])
+        self.ctx.defer.assert_not_called()
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request')
+    @patch('tap_listrak.streams.write_records')
+    def test_deferred_message_resumes_from_deferred_start(self, mock_write, mock_request, _):
+        self.ctx.get_deferred.return_value = {'M1': '2026-01-03T00:00:00+00:00'}
+        mock_request.return_value = []
+        streams.sync_message_sub_stream(self.ctx, [{'MsgID': 'M1'}, {'MsgID': 'M2'}],
+                                        streams.MESSAGE_SUB_STREAMS[0])
+
+        starts = [c.kwargs['StartDate'] for c in mock_request.call_args_list]
+        self.assertEqual(starts, [pendulum.parse("2026-01-03T00:00:00Z"),
+                                  pendulum.parse("2026-01-10T00:00:00Z")])
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request')
+    @patch('tap_listrak.streams.write_records')
+    def test_deferred_send_is_synced_despite_old_send_date(self, mock_write, mock_request, _):
+        self.ctx.get_deferred.return_value = {'M1': '2026-01-01T00:00:00+00:00'}
+        mock_request.return_value = {'ReportMessageContactSentResult': None}
+        messages = [{'MsgID': 'M1', 'SendDate': '2026-01-02T00:00:00Z'},
+                    {'MsgID': 'M2', 'SendDate': '2026-01-02T00:00:00Z'}]
+        streams.sync_message_sends_if_selected(self.ctx, messages)
+
+        self.assertEqual([c.kwargs['MsgID'] for c in mock_request.call_args_list], ['M1'])
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request')
+    @patch('tap_listrak.streams.write_records')
+    def test_transient_failure_is_queued_for_retry(self, mock_write, mock_request, _):
+        mock_request.side_effect = [
+            [{'ClickID': '1'}],                              # M1 page 1
+            Fault("Server was unable to process request"),  # M1 page 2
+        ]
+        streams.sync_message_sub_stream(self.ctx, [{'MsgID': 'M1'}], streams.MESSAGE_SUB_STREAMS[0])
+
+        (unit,), _ = self.ctx.queue_retry.call_args
+        self.assertEqual((unit.tap_stream_id, unit.entity_id, unit.cursor.page),
+                         ('message_clicks', 'M1', 2))
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request')
+    def test_per_entity_failure_is_not_queued(self, mock_request, _):
+        mock_request.side_effect = Fault("InvalidMessageID")
+        streams.sync_message_sub_stream(self.ctx, [{'MsgID': 'M1'}], streams.MESSAGE_SUB_STREAMS[0])
+        self.ctx.defer.assert_called_once()
+        self.ctx.queue_retry.assert_not_called()
+
+    @patch('tap_listrak.streams.http.configure_circuit_breaker')
+    @patch('tap_listrak.streams.request')
+    @patch('tap_listrak.streams.write_records')
+    def test_retry_failed_units_resumes_at_failed_page(self, mock_write, mock_request, mock_breaker):
+        start_dt = self.ctx.update_start_date_bookmark.return_value
+        sub_stream = streams.MESSAGE_SUB_STREAMS[0]
+        msg = {'MsgID': 'M1'}
+        self.ctx.retry_queue = [streams.RetryUnit(
+            'message_clicks', 'M1', start_dt, streams.Cursor(2),
+            streams.sync_message_sub_stream_records,
+            (self.ctx, msg, sub_stream, start_dt, self.ctx.now))]
+        mock_request.side_effect = [[{'ClickID': '2'}], []]
+
+        streams.retry_failed_units(self.ctx)
+
+        self.assertEqual([c.kwargs['Page'] for c in mock_request.call_args_list], [2, 3])
+        mock_breaker.assert_called_once_with(self.ctx.config)
+        self.ctx.clear_deferred.assert_called_once_with('message_clicks', 'M1')
+        self.assertEqual(self.ctx.retry_queue, [])
+
+    @patch('tap_listrak.streams.http.configure_circuit_breaker')
+    @patch('tap_listrak.streams.request')
+    def test_retry_failed_units_leaves_failures_deferred(self, mock_request, _):
+        start_dt = self.ctx.update_start_date_bookmark.return_value
+        msg = {'MsgID': 'M1', 'SendDate': '2026-01-15T00:00:00Z'}
+        self.ctx.retry_queue = [streams.RetryUnit(
+            'message_sends', 'M1', start_dt, streams.Cursor(),
+            streams.sync_message_sends, (self.ctx, msg))]
+        mock_request.side_effect = Fault("Server was unable to process request")
+
+        streams.retry_failed_units(self.ctx)
+
+        self.ctx.defer.assert_called_once_with('message_sends', 'M1', start_dt)
+        self.ctx.clear_deferred.assert_not_called()
+        self.assertEqual(self.ctx.retry_queue, [])
+
+    def test_context_defer_keeps_earliest_start(self):
+        ctx = Context({"start_date": "2026-01-01T00:00:00Z"}, {})
+        ctx.defer('message_opens', 5, pendulum.parse("2026-01-10T00:00:00Z"))
+        ctx.defer('message_opens', 5, pendulum.parse("2026-01-12T00:00:00Z"))
+        self.assertEqual(ctx.get_deferred('message_opens'), {'5': '2026-01-10T00:00:00+00:00'})
+        ctx.clear_deferred('message_opens', 5)
+        self.assertEqual(ctx.get_deferred('message_opens'), {})
+
+
+class TestSkipUnchangedMessageCounts(unittest.TestCase):
+    """Sub-stream calls are skipped when message counts show nothing new."""
+
+    def setUp(self):
+        self.ctx = MagicMock(spec=Context)
+        self.ctx.update_start_date_bookmark.return_value = pendulum.parse("2026-01-10T00:00:00Z")
+        self.ctx.now = pendulum.parse("2026-02-02T00:00:00Z")
+        self.ctx.client = MagicMock()
+        self.ctx.config = {'start_date': '2026-01-01T00:00:00Z',
+                           'skip_unchanged_message_counts': True}
+        self.ctx.cache = {'messages_observed_at': pendulum.parse("2026-02-02T00:05:00Z")}
+        self.ctx.get_deferred.return_value = {}
+        self.ctx.is_last_page.return_value = False
+        self.ctx.get_projection.return_value = None
+        self.ctx.get_costs.return_value = {}
+        self.ctx.should_stop.return_value = False
+        self.ctx.get_synced_to.return_value = {}
+        self.ctx.get_bookmark.return_value = {'M2': 3, 'M3': 3}
+        self.messages = [
+            {'MsgID': 'M1', 'ClickCount': 0},  # never clicked
+            {'MsgID': 'M2', 'ClickCount': 3},  # unchanged since last run
+            {'MsgID': 'M3', 'ClickCount': 4},  # new clicks
+            {'MsgID': 'M4', 'ClickCount': 1},  # not seen before
+        ]
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request', return_value=[])
+    @patch('tap_listrak.streams.write_records')
+    def test_only_changed_messages_are_requested(self, mock_write, mock_request, _):
+        streams.sync_message_sub_stream(self.ctx, self.messages, streams.MESSAGE_SUB_STREAMS[0])
+
+        self.assertEqual([c.kwargs['MsgID'] for c in mock_request.call_args_list], ['M3', 'M4'])
+        # Fetched up to when the counts were observed, not ctx.now
+        for call in mock_request.call_args_list:
+            self.assertEqual(call.kwargs['EndDate'], self.ctx.cache['messages_observed_at'])
+        self.ctx.set_bookmark.assert_called_once_with(
+            ['message_clicks', 'message_counts'], {'M2': 3, 'M3': 4, 'M4': 1})
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request', return_value=[])
+    @patch('tap_listrak.streams.write_records')
+    def test_deferred_messages_are_never_skipped(self, mock_write, mock_request, _):
+        self.ctx.get_deferred.return_value = {'M2': '2026-01-03T00:00:00+00:00'}
+        streams.sync_message_sub_stream(self.ctx, self.messages[:2], streams.MESSAGE_SUB_STREAMS[0])
+        self.assertEqual([c.kwargs['MsgID'] for c in mock_request.call_args_list], ['M2'])
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request', return_value=[])
+    @patch('tap_listrak.streams.write_records')
+    def test_sub_stream_without_count_is_never_skipped(self, mock_write, mock_request, _):
+        bounces = streams.MESSAGE_SUB_STREAMS[4]
+        self.assertIsNone(bounces.count_field)
+        streams.sync_message_sub_stream(self.ctx, self.messages, bounces)
+        self.assertEqual(mock_request.call_count, 4)
+        self.assertEqual(mock_request.call_args.kwargs['EndDate'], self.ctx.now)
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.request', return_value=[])
+    @patch('tap_listrak.streams.write_records')
+    def test_disabled_by_default(self, mock_write, mock_request, _):
+        self.ctx.config = {'start_date': '2026-01-01T00:00:00Z'}
+        streams.sync_message_sub_stream(self.ctx, self.messages, streams.MESSAGE_SUB_STREAMS[0])
+        self.assertEqual(mock_request.call_count, 4)
+        self.ctx.set_bookmark.assert_not_called()
+
+
+class TestParentMessage(unittest.TestCase):
+
+    RECORD = {'MsgID': 7, 'SendDate': '2026-01-15T00:00:00Z', 'Subject': 'Sale',
+              'ClickCount': 3, 'OpenCount': 9, 'ReadCount': 4, 'RemoveCount': 0,
+              'DeliverCount': 100, 'OrderTotal': 12.5}
+
+    def test_keeps_only_fields_children_read(self):
+        msg = streams.ParentMessage(self.RECORD)
+        self.assertEqual(msg['MsgID'], 7)
+        self.assertEqual(msg.get('ClickCount'), 3)
+        self.assertEqual(msg.get('Subject'), None)
+        self.assertEqual(msg.send_dt, pendulum.parse('2026-01-15T00:00:00Z'))
+        with self.assertRaises(KeyError):
+            msg['Subject']  # pylint: disable=pointless-statement
+        self.assertFalse(hasattr(msg, '__dict__'))
+
+    def test_send_datetime_accepts_records_and_handles(self):
+        msg = streams.ParentMessage(self.RECORD)
+        self.assertEqual(streams.send_datetime(msg), streams.send_datetime(self.RECORD))
+
+    @patch('tap_listrak.streams.sync_message_children')
+    @patch('tap_listrak.streams.write_records', new=lambda tap_stream_id, records: list(records))
+    @patch('tap_listrak.streams.request')
+    def test_full_records_are_freed_before_children_sync(self, mock_request, mock_children):
+        class Record(dict):
+            pass
+
+        records = [Record(self.RECORD)]
+        ref = weakref.ref(records[0])
+        mock_request.return_value = {
+            'ReportListMessageActivityResult': {'WSMessageActivity': [{}]}}
+        alive = []
+
+        def sync_children(ctx, parents, max_send_dt):
+            gc.collect()
+            alive.append(ref() is not None)
+            return max_send_dt
+
+        mock_children.side_effect = sync_children
+        ctx = Context({'start_date': '2026-01-01T00:00:00Z', 'interval_days': 3650}, {})
+        ctx.client = MagicMock()
+        ctx.write_state = MagicMock()
+        ctx.selected_stream_ids = {'messages'}
+        with patch('tap_listrak.streams.transform', side_effect=lambda _: [records.pop()]):
+            streams.sync_messages(ctx, [{'ListID': 1}])
+
+        self.assertEqual(alive, [False])
+
+    @patch('tap_listrak.streams.request')
+    def test_sub_stream_sync_uses_handle(self, mock_request):
+        ctx = MagicMock(spec=Context)
+        ctx.get_projection.return_value = None
+        ctx.is_last_page.return_value = False
+        ctx.should_stop.return_value = False
+        mock_request.side_effect = [[{'EmailAddress': 'a@b.c'}], []]
+        with patch('tap_listrak.streams.write_records') as mock_write:
+            streams.sync_message_sub_stream_records(
+                ctx, streams.ParentMessage(self.RECORD), streams.MESSAGE_SUB_STREAMS[0],
+                None, None, streams.Cursor())
+        self.assertEqual(list(mock_write.call_args.args[1]), [{'EmailAddress': 'a@b.c', 'MsgID': 7}])
+
+
+class TestParseDatetime(unittest.TestCase):
+
+    def test_matches_pendulum(self):
+        for value in ["2026-01-15T00:00:00Z", "2026-01-15T03:04:05.000123Z",
+                      "2026-01-15T03:04:05+02:00", "2026-01-15T03:04:05"]:
+            with self.subTest(value=value):
+                self.assertEqual(streams.parse_datetime(value), pendulum.parse(value))
+
+    def test_other_formats_fall_back_to_pendulum(self):
+        with patch('tap_listrak.streams.pendulum.parse',
+                   return_value=pendulum.parse("2026-01-15T00:00:00Z")) as mock_parse:
+            streams.parse_datetime("not-iso-2026")
+        mock_parse.assert_called_once_with("not-iso-2026")
+
+    def test_new_max_send_dt_compares_instants(self):
+        messages = [{'SendDate': '2026-01-15T10:00:00+02:00'},
+                    {'SendDate': '2026-01-15T09:00:00Z'}]
+        self.assertEqual(streams.new_max_send_dt(messages, None), '2026-01-15T09:00:00Z')
+        self.assertEqual(streams.new_max_send_dt(messages, '2026-02-01T00:00:00.000000Z'),
+                         '2026-02-01T00:00:00.000000Z')
+
+    @patch('tap_listrak.schemas.load_and_write_schema')
+    @patch('tap_listrak.streams.run_units')
+    def test_message_sends_filter_avoids_pendulum(self, mock_run_units, _):
+        ctx = MagicMock(spec=Context)
+        ctx.selected_stream_ids = ['message_sends']
+        ctx.update_start_date_bookmark.return_value = pendulum.parse("2026-01-12T00:00:00Z")
+        ctx.get_deferred.return_value = {}
+        ctx.get_synced_to.return_value = {}
+        ctx.config = {}
+        messages = [{'MsgID': '1', 'SendDate': '2026-01-10T00:00:00.000000Z'},
+                    {'MsgID': '2', 'SendDate': '2026-01-20T00:00:00.000000Z'}]
+        with patch('tap_listrak.streams.pendulum.parse', side_effect=AssertionError):
+            streams.sync_message_sends_if_selected(ctx, messages)
+        units = mock_run_units.call_args.args[1]
+        self.assertEqual([unit.entity_id for unit in units], ['2'])
+
+
 class TestSyncEdgeCases(unittest.TestCase):
     """
     Tests for edge cases where the Listrak SOAP API returns a non-null
@@ -480,6 +845,12 @@ class TestSyncEdgeCases(unittest.TestCase):
         self.ctx.client = MagicMock()
         self.ctx.client.service = MagicMock()
         self.ctx.config = {'start_date': '2026-01-01T00:00:00Z', 'interval_days': 365}
+        self.ctx.get_deferred.return_value = {}
+        self.ctx.is_last_page.return_value = False
+        self.ctx.get_projection.return_value = None
+        self.ctx.get_costs.return_value = {}
+        self.ctx.should_stop.return_value = False
+        self.ctx.get_synced_to.return_value = {}
         self.ctx.selected_stream_ids = ['messages']
 
     @patch('tap_listrak.schemas.load_and_write_schema')
@@ -581,6 +952,12 @@ class TestPaginationPageIncrement(unittest.TestCase):
         self.ctx.client = MagicMock()
         self.ctx.client.service = MagicMock()
         self.ctx.config = {'start_date': '2026-01-01T00:00:00Z', 'interval_days': 365}
+        self.ctx.get_deferred.return_value = {}
+        self.ctx.is_last_page.return_value = False
+        self.ctx.get_projection.return_value = None
+        self.ctx.get_costs.return_value = {}
+        self.ctx.should_stop.return_value = False
+        self.ctx.get_synced_to.return_value = {}
         self.ctx.selected_stream_ids = ['message_sends']
 
     @patch('tap_listrak.schemas.load_and_write_schema')
@@ -681,8 +1058,7 @@ class TestGenIntervals(unittest.TestCase):
         """Context.now must be timezone-aware after the pendulum.now('UTC') fix."""
         config = {"start_date": "2026-01-01T00:00:00Z", "username": "u", "password": "p"}
         state = {}
-        with patch("tap_listrak.context.get_client", return_value=MagicMock()):
-            ctx = Context(config, state)
+        ctx = Context(config, state)
         self.assertIsNotNone(ctx.now.tzinfo,
             "ctx.now must be timezone-aware to avoid comparison errors with pendulum-parsed datetimes")
 
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import MagicMock, patch
+from zeep.exceptions import TransportError
+from tap_listrak import http, telemetry
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def test_render(self):
+        metrics = telemetry.Telemetry()
+        metrics.inc("listrak_records_total", 3, stream="message_opens")
+        metrics.inc("listrak_requests_in_flight", stream="lists", endpoint="Get")
+        metrics.dec("listrak_requests_in_flight", stream="lists", endpoint="Get")
+        metrics.observe("listrak_request_duration_seconds", 0.3, endpoint="Get")
+        metrics.observe("listrak_request_duration_seconds", 500, endpoint="Get")
+
+        lines = metrics.render().splitlines()
+
+        self.assertIn("# TYPE listrak_records_total counter", lines)
+        self.assertIn('listrak_records_total{stream="message_opens"} 3', lines)
+        self.assertIn('listrak_requests_in_flight{endpoint="Get",stream="lists"} 0', lines)
+        self.assertIn('listrak_request_duration_seconds_bucket{endpoint="Get",le="0.25"} 0',
+                      lines)
+        self.assertIn('listrak_request_duration_seconds_bucket{endpoint="Get",le="0.5"} 1',
+                      lines)
+        self.assertIn('listrak_request_duration_seconds_bucket{endpoint="Get",le="+Inf"} 2',
+                      lines)
+        self.assertIn('listrak_request_duration_seconds_count{endpoint="Get"} 2', lines)
+        self.assertNotIn("# TYPE listrak_retries_total counter", lines)
+
+    def test_label_values_are_escaped(self):
+        self.assertEqual(telemetry.format_labels((("endpoint", 'a"b\\'),)),
+                         '{endpoint="a\\"b\\\\"}')
+
+    def test_unknown_metric(self):
+        with self.assertRaises(KeyError):
+            telemetry.Telemetry().inc("listrak_nope")
+
+    def test_write_textfile(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "tap_listrak.prom")
+        metrics = telemetry.Telemetry()
+        metrics.inc("listrak_records_total", stream="lists")
+
+        metrics.write_textfile(path)
+
+        with open(path) as textfile:
+            self.assertEqual(textfile.read(), metrics.render())
+        self.assertEqual(os.listdir(directory), ["tap_listrak.prom"])
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(telemetry, "TELEMETRY", telemetry.Telemetry())
+        self.metrics = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requests_are_counted_and_timed(self):
+        service_fn = MagicMock(return_value=[], _op_name="ReportRangeMessageContactOpen")
+        http.request("message_opens", service_fn)
+
+        labels = {"stream": "message_opens", "endpoint": "ReportRangeMessageContactOpen"}
+        self.assertEqual(self.metrics.get("listrak_requests_total", outcome="ok", **labels), 1)
+        self.assertEqual(self.metrics.get("listrak_requests_in_flight", **labels), 0)
+        self.assertEqual(self.metrics.get("listrak_request_duration_seconds", **labels).counts
+                         .count(0), len(telemetry.LATENCY_BUCKETS))
+
+    @patch("time.sleep")
+    def test_failures_and_retries(self, _):
+        service_fn = MagicMock(side_effect=TransportError("503", 503),
+                               _op_name="GetContactListCollection")
+        http.configure_circuit_breaker({})
+        with self.assertRaises(TransportError):
+            http.request("lists", service_fn)
+
+        self.assertEqual(self.metrics.get("listrak_requests_total", outcome="error",
+                                          stream="lists", endpoint="GetContactListCollection"),
+                         5)
+        self.assertEqual(self.metrics.get("listrak_retries_total", kind="throttling",
+                                          endpoint="GetContactListCollection"), 4)
+
+    def test_response_bytes(self):
+        response = MagicMock(content=b"12345")
+        response.request.headers = {
+            "SOAPAction": '"http://webservices.listrak.com/v31/GetContactListCollection"'}
+        telemetry.count_response_bytes(response)
+        response.request.headers = {}
+        telemetry.count_response_bytes(response)
+
+        self.assertEqual(self.metrics.get("listrak_response_bytes_total",
+                                          endpoint="GetContactListCollection"), 5)
+        self.assertEqual(self.metrics.get("listrak_response_bytes_total", endpoint="rest"), 5)
+
+
+class TestExporter(unittest.TestCase):
+
+    def test_serves_metrics(self):
+        exporter = telemetry.Exporter(port=0, interval=60)
+        self.addCleanup(exporter.shutdown)
+        telemetry.TELEMETRY.inc("listrak_records_total", 0, stream="lists")
+        url = "http://127.0.0.1:{}/metrics".format(exporter._server.server_port)
+
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode("utf-8")
+
+        self.assertIn("# TYPE listrak_records_total counter", body)
+
+    def test_configure_keeps_running_exporter(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        config = {"metrics_textfile": os.path.join(directory, "tap.prom")}
+        self.addCleanup(telemetry.configure_telemetry, {})
+
+        exporter = telemetry.configure_telemetry(config)
+        self.assertIs(telemetry.configure_telemetry(dict(config)), exporter)
+        self.assertIsNone(telemetry.configure_telemetry({}))
+        # Shutting down writes the textfile a last time
+        self.assertTrue(os.path.exists(config["metrics_textfile"]))